@@ -0,0 +1,194 @@
+import hashlib
+import json
+import threading
+import time
+
+import speech_recognition as sr
+
+from metrics import LatencyStats
+
+# Routing strategies for ASRRouter
+PRIORITY = "priority"  # always try backends in the order given
+LATENCY = "latency"    # try the backend with the lowest recent latency first
+
+DEFAULT_COOLDOWN_SECONDS = 30.0
+LATENCY_SMOOTHING = 0.2
+
+
+# Speech-to-text engine. recognize() returns the text or raises
+# sr.UnknownValueError (no speech understood) or sr.RequestError (engine unavailable).
+class ASRBackend:
+    name = "backend"
+
+    def recognize(self, audio, language):
+        raise NotImplementedError
+
+
+# Google Web Speech API (needs the network)
+class GoogleBackend(ASRBackend):
+    name = "google"
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def recognize(self, audio, language):
+        return self.recognizer.recognize_google(audio, language=language)
+
+
+# Offline Vosk model running on the CPU. One model per language:
+# model_paths maps a language (as passed to recognize) to a model directory,
+# and "default" is used for any other language.
+class VoskBackend(ASRBackend):
+    name = "vosk"
+    sample_rate = 16000
+
+    def __init__(self, model_paths):
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("The offline ASR backend needs the 'vosk' package (pip install vosk)")
+        self._vosk = vosk
+        vosk.SetLogLevel(-1)
+        self.model_paths = model_paths if isinstance(model_paths, dict) else {"default": model_paths}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def recognize(self, audio, language):
+        model = self._model(language)
+        kaldi = self._vosk.KaldiRecognizer(model, self.sample_rate)
+        kaldi.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(kaldi.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def _model(self, language):
+        path = self.model_paths.get(language, self.model_paths.get("default"))
+        if path is None:
+            raise sr.RequestError(f"No offline model for language {language}")
+        with self._lock:
+            if path not in self._models:
+                self._models[path] = self._vosk.Model(path)
+            return self._models[path]
+
+
+# Local Whisper model through speech_recognition (needs the openai-whisper package)
+class WhisperBackend(ASRBackend):
+    name = "whisper"
+
+    def __init__(self, recognizer, model="base"):
+        self.recognizer = recognizer
+        self.model = model
+
+    def recognize(self, audio, language):
+        # Whisper wants a language name or code like "english"/"en", not a region code like "en-IN"
+        return self.recognizer.recognize_whisper(audio, model=self.model, language=language.split("-")[0])
+
+
+# Deterministic stand-in for tests and benchmarks. Transcripts are looked up
+# by the SHA-1 of the raw audio; a JSON file {sha1: text} or a dict can be given.
+# Unknown audio is served from the optional list of fallback lines, in order.
+class FileBackend(ASRBackend):
+    name = "file"
+
+    def __init__(self, transcripts=None, lines=(), delay=0.0):
+        if isinstance(transcripts, str):
+            with open(transcripts, encoding="utf-8") as f:
+                transcripts = json.load(f)
+        self.transcripts = dict(transcripts or {})
+        self.delay = delay  # simulated recognition time
+        self._lines = list(lines)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(audio):
+        return hashlib.sha1(audio.get_raw_data()).hexdigest()
+
+    def recognize(self, audio, language):
+        if self.delay:
+            time.sleep(self.delay)
+        text = self.transcripts.get(self.key(audio))
+        if text is None:
+            with self._lock:
+                text = self._lines.pop(0) if self._lines else None
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+# Tries several backends for each utterance. A backend that raises
+# sr.RequestError (e.g. no network) is put on cooldown and the next one is
+# used, so recognition keeps running offline. With LATENCY routing the
+# backend with the lowest smoothed latency goes first.
+class ASRRouter:
+    def __init__(self, backends, routing=PRIORITY, cooldown_seconds=DEFAULT_COOLDOWN_SECONDS):
+        if routing not in (PRIORITY, LATENCY):
+            raise ValueError(f"Unknown ASR routing: {routing}")
+        self.backends = list(backends)
+        self.routing = routing
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = {
+            backend.name: {"calls": 0, "failures": 0, "failovers": 0, "smoothed": None,
+                           "down_until": 0.0, "latency": LatencyStats()}
+            for backend in self.backends
+        }
+
+    def recognize(self, audio, language):
+        errors = []
+        for backend in self._ordered():
+            state = self._state[backend.name]
+            start = time.perf_counter()
+            try:
+                text = backend.recognize(audio, language)
+            except sr.UnknownValueError:
+                # The engine worked, there just was no speech it understood
+                self._record(state, time.perf_counter() - start)
+                raise
+            except (sr.RequestError, OSError) as e:
+                with self._lock:
+                    state["failures"] += 1
+                    state["down_until"] = time.monotonic() + self.cooldown_seconds
+                errors.append(f"{backend.name}: {e}")
+                continue
+            self._record(state, time.perf_counter() - start)
+            if errors:
+                with self._lock:
+                    state["failovers"] += 1
+            return text
+        raise sr.RequestError("; ".join(errors) or "No ASR backend available")
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "calls": state["calls"],
+                    "failures": state["failures"],
+                    "failovers": state["failovers"],
+                    "available": state["down_until"] <= time.monotonic(),
+                    "latency": state["latency"].summary(),
+                }
+                for name, state in self._state.items()
+            }
+
+    # Healthy backends first; backends on cooldown are still tried as a last resort
+    def _ordered(self):
+        now = time.monotonic()
+        with self._lock:
+            def key(indexed):
+                index, backend = indexed
+                state = self._state[backend.name]
+                down = state["down_until"] > now
+                if self.routing == LATENCY and state["smoothed"] is not None:
+                    return down, state["smoothed"], index
+                # With LATENCY routing an untried backend goes first, so every backend gets measured
+                return down, 0.0 if self.routing == LATENCY else index, index
+            return [backend for _, backend in sorted(enumerate(self.backends), key=key)]
+
+    def _record(self, state, seconds):
+        with self._lock:
+            state["calls"] += 1
+            state["down_until"] = 0.0
+            smoothed = state["smoothed"]
+            state["smoothed"] = seconds if smoothed is None else (1 - LATENCY_SMOOTHING) * smoothed + LATENCY_SMOOTHING * seconds
+        state["latency"].add(seconds)
@@ -0,0 +1,300 @@
+import contextlib
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from decoding import get_profile
+from metrics import LatencyStats
+from segmenter import DEFAULT_MAX_WORDS, join_chunks, split_text
+from translation_cache import translation_cache
+
+# Default micro-batching limits
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 30        # only waited while other streams or an open burst can add to the batch
+# Threads that submitted within this many seconds count as concurrent streams
+STREAM_WINDOW_SECONDS = 2.0
+# Models that may run generate() at the same time (e.g. fan-out to several targets)
+DEFAULT_GROUP_WORKERS = 4
+# A bucket's longest input may be at most this many times its shortest one
+DEFAULT_BUCKET_RATIO = 2.0
+
+
+# One pending translation request
+class _Segment:
+    def __init__(self, text, model_name, tokenizer, model, profile):
+        self.text = text
+        self.model_name = model_name
+        self.tokenizer = tokenizer
+        self.model = model
+        self.profile = profile
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+# Put on the queue when a burst ends, so a waiting batch is cut right away
+_WAKE = object()
+
+
+# Collects segments from many recognizer streams into micro-batches and runs
+# one padded generate() per model per batch. Results come back through futures.
+# When a batch holds several models, their groups run concurrently; torch
+# releases the GIL inside generate(), so fan-out costs about one model's latency.
+# Long texts are split into sentence/clause chunks first, and each model's
+# chunks are bucketed by token length, so a run-on utterance is never one huge
+# (quadratic, truncated) sequence and short chunks aren't padded to long ones.
+# Each request may name a decoding profile (see decoding.py); segments are
+# grouped by (model, profile) and cached per profile.
+# A batch only waits max_wait_ms for more segments while there is someone to
+# wait for: several submitting threads (streams), or a burst() that is still
+# submitting. A single synchronous stream gets its translation without the wait.
+class BatchTranslator:
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, cache=translation_cache,
+                 group_workers=DEFAULT_GROUP_WORKERS, max_chunk_words=DEFAULT_MAX_WORDS, bucket_ratio=DEFAULT_BUCKET_RATIO):
+        self.max_batch_size = max_batch_size
+        self.max_chunk_words = max_chunk_words
+        self.bucket_ratio = bucket_ratio
+        self.cache = cache
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_stats = {}  # batch size -> {"batches", "segments", "generate_seconds", "latency"}
+        self._profile_stats = {}  # profile name -> {"segments", "generate_seconds", "latency"}
+        self._group_executor = ThreadPoolExecutor(max_workers=group_workers) if group_workers > 1 else None
+        # Started on the first request, so importing this module starts no threads
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._streams = {}  # submitting thread id -> last submission (monotonic)
+        self._bursts = 0
+        self._state_lock = threading.Lock()
+
+    # Segments submitted inside `with translator.burst():` share a batch (e.g. a text's chunks,
+    # or every hop of a fan-out): the batch waits for them until the block ends
+    @contextlib.contextmanager
+    def burst(self):
+        with self._state_lock:
+            self._bursts += 1
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._bursts -= 1
+            self._queue.put(_WAKE)
+
+    # Queue a text for translation and return a Future with the translated text.
+    # profile is a decoding profile name (e.g. "live"); None keeps the model's defaults.
+    def submit(self, text, model_name, tokenizer, model, profile=None):
+        profile = get_profile(profile)
+        chunks = split_text(text, self.max_chunk_words) if self.max_chunk_words else []
+        if len(chunks) <= 1:
+            return self._submit_chunk(text, model_name, tokenizer, model, profile)
+        with self.burst():
+            return _gather([self._submit_chunk(chunk, model_name, tokenizer, model, profile) for chunk in chunks])
+
+    def _submit_chunk(self, text, model_name, tokenizer, model, profile):
+        if self.cache is not None:
+            cached = self.cache.get(cache_key(model_name, profile), text)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+        segment = _Segment(text, model_name, tokenizer, model, profile)
+        self._ensure_running()
+        with self._state_lock:
+            self._streams[threading.get_ident()] = time.monotonic()
+        self._queue.put(segment)
+        return segment.future
+
+    def _ensure_running(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    # Translate one segment and wait for the result
+    def translate(self, text, model_name, tokenizer, model, profile=None):
+        return self.submit(text, model_name, tokenizer, model, profile).result()
+
+    # Throughput and latency per batch size
+    def stats(self):
+        report = {}
+        with self._stats_lock:
+            items = list(self._batch_stats.items())
+        for batch_size, entry in sorted(items):
+            generate_seconds = entry["generate_seconds"]
+            report[batch_size] = {
+                "batches": entry["batches"],
+                "segments": entry["segments"],
+                "segments_per_second": round(entry["segments"] / generate_seconds, 2) if generate_seconds else 0.0,
+                "latency": entry["latency"].summary(),
+            }
+        return report
+
+    # Generate time and latency per decoding profile ("default" for the model's own settings)
+    def profile_stats(self):
+        with self._stats_lock:
+            items = list(self._profile_stats.items())
+        return {
+            name: {
+                "segments": entry["segments"],
+                "generate_ms_per_segment": round(1000 * entry["generate_seconds"] / entry["segments"], 2)
+                if entry["segments"] else 0.0,
+                "latency": entry["latency"].summary(),
+            }
+            for name, entry in sorted(items)
+        }
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Group by model and profile so each generate() call sees one model and one set of settings
+            groups = defaultdict(list)
+            for segment in batch:
+                groups[(segment.model_name, segment.profile)].append(segment)
+            if self._group_executor is None or len(groups) == 1:
+                for segments in groups.values():
+                    self._run_group(segments)
+            else:
+                # list() waits for every group before the next batch is collected
+                list(self._group_executor.map(self._run_group, groups.values()))
+
+    # Block for the first segment, take whatever else is queued, then keep collecting
+    # while more can come (see _should_wait) until the batch is full or the wait expires
+    def _collect(self):
+        first = self._queue.get()
+        while first is _WAKE:
+            first = self._queue.get()
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                segment = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._should_wait():
+                    break
+                try:
+                    segment = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if segment is not _WAKE:
+                batch.append(segment)
+        return batch
+
+    # True while another stream or an open burst may still add to the batch
+    def _should_wait(self):
+        now = time.monotonic()
+        with self._state_lock:
+            if self._bursts:
+                return True
+            for ident, seen in list(self._streams.items()):
+                if now - seen > STREAM_WINDOW_SECONDS:
+                    del self._streams[ident]
+            return len(self._streams) > 1
+
+    # Split one model's segments into buckets of similar token length and generate each bucket
+    def _run_group(self, segments):
+        try:
+            lengths = [len(ids) for ids in segments[0].tokenizer([segment.text for segment in segments])["input_ids"]]
+        except Exception as e:
+            for segment in segments:
+                segment.future.set_exception(e)
+            return
+        order = sorted(range(len(segments)), key=lengths.__getitem__)
+        bucket = []
+        for index in order:
+            if bucket and lengths[index] > self.bucket_ratio * max(1, lengths[bucket[0]]):
+                self._generate([segments[i] for i in bucket])
+                bucket = []
+            bucket.append(index)
+        self._generate([segments[i] for i in bucket])
+
+    def _generate(self, segments):
+        tokenizer = segments[0].tokenizer
+        model = segments[0].model
+        profile = segments[0].profile
+        start = time.perf_counter()
+        try:
+            import torch  # deferred so importing this module stays cheap
+            inputs = tokenizer([segment.text for segment in segments], return_tensors="pt", padding=True)
+            settings = {}
+            if profile is not None:
+                settings = profile.generate_kwargs(max(len(ids) for ids in inputs["input_ids"]))
+            with torch.no_grad():
+                translated = model.generate(**inputs, **settings)
+            texts = tokenizer.batch_decode(translated, skip_special_tokens=True)
+        except Exception as e:
+            for segment in segments:
+                segment.future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        for segment, text in zip(segments, texts):
+            segment.future.set_result(text)
+        # Callers already have their results; a failing cache only costs a later cache miss
+        if self.cache is not None:
+            try:
+                for segment, text in zip(segments, texts):
+                    self.cache.put(cache_key(segment.model_name, profile), segment.text, text)
+            except Exception as e:
+                print(f"Could not cache translations: {e}")
+        self._record(len(segments), finished - start, [finished - segment.submitted for segment in segments],
+                     profile.name if profile is not None else "default")
+
+    def _record(self, batch_size, generate_seconds, latencies, profile_name):
+        with self._stats_lock:
+            profile_entry = self._profile_stats.get(profile_name)
+            if profile_entry is None:
+                profile_entry = self._profile_stats[profile_name] = {
+                    "segments": 0,
+                    "generate_seconds": 0.0,
+                    "latency": LatencyStats(),
+                }
+            profile_entry["segments"] += batch_size
+            profile_entry["generate_seconds"] += generate_seconds
+            entry = self._batch_stats.get(batch_size)
+            if entry is None:
+                entry = self._batch_stats[batch_size] = {
+                    "batches": 0,
+                    "segments": 0,
+                    "generate_seconds": 0.0,
+                    "latency": LatencyStats(),
+                }
+            entry["batches"] += 1
+            entry["segments"] += batch_size
+            entry["generate_seconds"] += generate_seconds
+        for latency in latencies:
+            entry["latency"].add(latency)
+            profile_entry["latency"].add(latency)
+
+
+# Translations made with a decoding profile are cached apart from the model's default output
+def cache_key(model_name, profile):
+    return model_name if profile is None else f"{model_name}#{profile.name}"
+
+
+# Combine the futures of a text's chunks into one future for the whole text
+def _gather(futures):
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_chunk_done(_):
+        with lock:
+            remaining[0] -= 1
+            finished = remaining[0] == 0
+        if not finished:
+            return
+        try:
+            combined.set_result(join_chunks([future.result() for future in futures]))
+        except Exception as e:
+            combined.set_exception(e)
+
+    for future in futures:
+        future.add_done_callback(on_chunk_done)
+    return combined
+
+
+# Shared translation service used by all subtitle scripts
+batch_translator = BatchTranslator()
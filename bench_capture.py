@@ -0,0 +1,116 @@
+import argparse
+import array
+import io
+import json
+import os
+import random
+import time
+import wave
+
+import speech_recognition as sr
+
+from bench_e2e import SAMPLE_RATE, TRANSCRIPTS_FILE, generate_fixtures
+from capture import CaptureEngine
+
+
+# Counts what is read from the source and remembers when the audio ran out
+class _CountingStream:
+    def __init__(self, stream):
+        self.stream = stream
+        self.eof = False
+
+    def read(self, size):
+        data = self.stream.read(size)
+        if not data:
+            self.eof = True
+        return data
+
+
+# Function to join the fixtures into one lecture-like recording, with background
+# noise that gets louder halfway through (so the noise floor has to adapt)
+def build_recording(directory, repeats, seed=0):
+    with open(os.path.join(directory, TRANSCRIPTS_FILE), encoding="utf-8") as f:
+        names = sorted(json.load(f))
+    samples = array.array("h")
+    for _ in range(repeats):
+        for name in names:
+            with wave.open(os.path.join(directory, name), "rb") as w:
+                samples.frombytes(w.readframes(w.getnframes()))
+    rng = random.Random(seed)
+    half = len(samples) // 2
+    for i in range(len(samples)):
+        noise = rng.gauss(0, 60 if i < half else 180)
+        samples[i] = max(-32768, min(32767, int(samples[i] + noise)))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue(), len(samples) / SAMPLE_RATE
+
+
+# Function to segment the recording with recognizer.listen(), as the scripts do today
+def run_listen(recording, chunk):
+    recognizer = sr.Recognizer()
+    segments = 0
+    with sr.AudioFile(io.BytesIO(recording)) as source:
+        source.CHUNK = chunk
+        source.stream = _CountingStream(source.stream)
+        start = time.process_time()
+        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        while not source.stream.eof:
+            audio = recognizer.listen(source, phrase_time_limit=15)
+            if audio.frame_data:
+                segments += 1
+        cpu = time.process_time() - start
+    return cpu, segments
+
+
+# Function to segment the recording with the ring buffer capture engine
+def run_ring(recording, chunk):
+    segments = []
+    engine = CaptureEngine(segments.append)
+    with sr.AudioFile(io.BytesIO(recording)) as source:
+        source.CHUNK = chunk
+        start = time.process_time()
+        engine.run(source)
+        cpu = time.process_time() - start
+    return cpu, len(segments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU per audio second: recognizer.listen() vs. the ring buffer capture")
+    parser.add_argument("--fixtures", default="bench_fixtures")
+    parser.add_argument("--repeats", type=int, default=3, help="copies of the fixture set in the recording")
+    parser.add_argument("--chunk", type=int, default=1024, help="frames per read; sr.Microphone uses 1024")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.fixtures, TRANSCRIPTS_FILE)):
+        generate_fixtures(args.fixtures)
+    recording, audio_seconds = build_recording(args.fixtures, args.repeats)
+
+    report = {"audio_seconds": round(audio_seconds, 1), "chunk": args.chunk, "paths": {}}
+    for name, run in (("listen", run_listen), ("ring_buffer", run_ring)):
+        cpu, segments = run(recording, args.chunk)
+        report["paths"][name] = {
+            "cpu_seconds": round(cpu, 3),
+            "cpu_ms_per_audio_second": round(1000 * cpu / audio_seconds, 3),
+            "segments": segments,
+        }
+        print(f"{name}: {report['paths'][name]['cpu_ms_per_audio_second']} ms CPU per audio second, {segments} segments")
+    listen_cpu = report["paths"]["listen"]["cpu_seconds"]
+    ring_cpu = report["paths"]["ring_buffer"]["cpu_seconds"]
+    report["speedup"] = round(listen_cpu / ring_cpu, 2) if ring_cpu else None
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import time
+
+import torch
+
+from bench_quantization import CORPUS, DEFAULT_MODELS
+from decoding import PROFILES, TRANSCRIPT
+from metrics import LatencyStats, corpus_bleu
+from model_pool import ModelPool, configure_torch_threads
+
+
+# Function to translate the corpus one sentence at a time (as live subtitles arrive) with one profile
+def run_profile(tokenizer, model, profile, sentences, repeats):
+    latency = LatencyStats()
+    outputs = []
+    output_tokens = 0
+    with torch.no_grad():
+        for repeat in range(repeats):
+            for sentence in sentences:
+                start = time.perf_counter()
+                inputs = tokenizer(sentence, return_tensors="pt", padding=True)
+                settings = profile.generate_kwargs(inputs["input_ids"].shape[1]) if profile is not None else {}
+                translated = model.generate(**inputs, **settings)
+                text = tokenizer.decode(translated[0], skip_special_tokens=True)
+                latency.add(time.perf_counter() - start)
+                if repeat == 0:
+                    outputs.append(text)
+                    output_tokens += translated.shape[1]
+    return {"latency": latency.summary(), "output_tokens": output_tokens}, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and quality of each decoding profile")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads")
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument("--references", help="optional JSON file {model_name: [reference, ...]}")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    configure_torch_threads(args.threads)
+    references = {}
+    if args.references:
+        with open(args.references, encoding="utf-8") as f:
+            references = json.load(f)
+
+    profiles = dict(PROFILES, default=None)  # default = the model's own generate() settings
+    report = {"threads": torch.get_num_threads(), "models": {}}
+    pool = ModelPool(quantize=args.quantize)
+    for model_name in args.models:
+        tokenizer, model = pool.get(model_name)
+        run_profile(tokenizer, model, None, CORPUS[:2], 1)  # warm-up
+        results = {}
+        outputs = {}
+        for name, profile in profiles.items():
+            results[name], outputs[name] = run_profile(tokenizer, model, profile, CORPUS, args.repeats)
+        for name in profiles:
+            # Scored against the beam search transcript output: how much quality a faster profile gives up
+            results[name]["bleu_vs_transcript"] = round(corpus_bleu(outputs[name], outputs[TRANSCRIPT]), 2)
+            if model_name in references:
+                results[name]["bleu"] = round(corpus_bleu(outputs[name], references[model_name]), 2)
+        report["models"][model_name] = results
+        pool.clear()
+        summary = ", ".join(f"{name} p50 {entry['latency']['p50_ms']} ms (BLEU vs transcript {entry['bleu_vs_transcript']})"
+                            for name, entry in results.items())
+        print(f"{model_name}: {summary}")
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
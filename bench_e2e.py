@@ -0,0 +1,331 @@
+import argparse
+import array
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import wave
+
+import speech_recognition as sr
+
+from asr_backends import ASRRouter, FileBackend
+from batch_translator import BatchTranslator
+from bench_quantization import CORPUS
+from decoding import PROFILES
+from glossary import Glossary
+from metrics import LatencyStats, peak_rss_mb
+from pipeline import Pipeline, Stage
+from quick_translate import translate_with_glossary
+from routing import RoutePlanner, RoutedTranslator
+from subtitle_writer import SubtitleFileWriter
+from transcript_writer import TranscriptJournal
+from translation_cache import TranslationCache
+
+SAMPLE_RATE = 16000
+TRANSCRIPTS_FILE = "transcripts.json"
+CAPTURE_ENERGY_THRESHOLD = 300  # recognizer.listen() threshold; fixed so every replay captures the same audio
+STUB_DEFAULT_BEAMS = 4  # opus-mt's own generate() default
+
+# Models registered by ss5/ss7/ss8
+SCRIPT_MODELS = {
+    name: name for name in [
+        'Helsinki-NLP/opus-mt-en-fr', 'Helsinki-NLP/opus-mt-gu-en', 'Helsinki-NLP/opus-mt-fr-en',
+        'Helsinki-NLP/opus-mt-es-en', 'Helsinki-NLP/opus-mt-hi-en', 'Helsinki-NLP/opus-mt-te-en',
+        'Helsinki-NLP/opus-mt-en-te', 'Helsinki-NLP/opus-mt-en-gu', 'Helsinki-NLP/opus-mt-en-es',
+        'Helsinki-NLP/opus-mt-en-hi',
+    ]
+}
+
+# The capture -> recognize -> translate -> persist paths of the scripts. ss5, ss7 and ss8
+# run the same MarianMT path (routed English -> Hindi, journal transcript), so they are one variant.
+VARIANTS = {
+    "marian": {"engine": "marian", "target": "Hindi"},  # ss5, ss7, ss8
+    "ss9": {"engine": "googletrans", "target": "hi"},   # text-to-speech is not part of the benchmark
+    "ss10": {"engine": "googletrans", "target": "gu", "subtitle_file": True},
+}
+
+GLOSSARY_TERMS = [
+    "Signal", "System", "Fourier transform", "Laplace", "Frequency", "Amplitude", "Phase", "Sampling", "Bandwidth",
+    "Filter", "Modulation", "Digital Signal Processing", "Impulse Response", "signal system", "z transform"
+]
+
+
+# Stand-in Marian tokenizer/model: deterministic output, cost grows with the number of tokens.
+# ms_per_token is the cost with the model's default 4 beams; it scales with num_beams.
+class StubTokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [text.split() for text in texts]}
+
+    def batch_decode(self, outputs, **kwargs):
+        return outputs
+
+
+class StubModel:
+    def __init__(self, ms_per_token):
+        self.ms_per_token = ms_per_token
+
+    def generate(self, input_ids, num_beams=STUB_DEFAULT_BEAMS, max_new_tokens=None, **kwargs):
+        tokens = sum(len(ids) for ids in input_ids)
+        time.sleep(self.ms_per_token * tokens * num_beams / STUB_DEFAULT_BEAMS / 1000.0)
+        return [" ".join(list(reversed(ids))[:max_new_tokens]) for ids in input_ids]
+
+
+class StubModelPool:
+    def __init__(self, ms_per_token):
+        self.ms_per_token = ms_per_token
+
+    def get(self, model_name):
+        return StubTokenizer(), StubModel(self.ms_per_token)
+
+
+# Stand-in for googletrans.Translator with a fixed round-trip time
+class StubTranslator:
+    class _Result:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, round_trip_ms):
+        self.round_trip_ms = round_trip_ms
+
+    def translate(self, text, src="en", dest="hi"):
+        time.sleep(self.round_trip_ms / 1000.0)
+        return self._Result(f"{dest}:{text}")
+
+
+# Function to write one synthetic WAV per corpus sentence, with a voiced burst per word
+def generate_fixtures(directory, sentences=CORPUS):
+    os.makedirs(directory, exist_ok=True)
+    transcripts = {}
+    for index, sentence in enumerate(sentences):
+        samples = array.array("h")
+        silence = [0] * int(0.4 * SAMPLE_RATE)
+        samples.extend(silence)
+        pitch = 110 + 7 * index  # distinct audio per fixture
+        for word in sentence.split():
+            length = int((0.12 + 0.03 * len(word)) * SAMPLE_RATE)
+            for n in range(length):
+                envelope = math.sin(math.pi * n / length)
+                t = n / SAMPLE_RATE
+                value = sum(math.sin(2 * math.pi * pitch * h * t) / h for h in (1, 2, 3))
+                samples.append(int(8000 * envelope * value))
+            samples.extend([0] * int(0.08 * SAMPLE_RATE))
+        samples.extend(silence)
+        name = f"utterance_{index:02d}.wav"
+        with wave.open(os.path.join(directory, name), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(samples.tobytes())
+        transcripts[name] = sentence
+    with open(os.path.join(directory, TRANSCRIPTS_FILE), "w", encoding="utf-8") as f:
+        json.dump(transcripts, f, indent=2)
+
+
+# Function to make a recognizer for the capture stage
+def make_recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.dynamic_energy_threshold = False
+    recognizer.energy_threshold = CAPTURE_ENERGY_THRESHOLD
+    return recognizer
+
+
+# Function to capture one utterance from a fixture the way listen_phrases() does from the microphone
+def capture_phrase(recognizer, path):
+    with sr.AudioFile(path) as source:
+        return recognizer.listen(source, phrase_time_limit=15)
+
+
+# Function to list the fixtures as (path, transcript, duration, key of the audio the capture stage will produce)
+def load_fixtures(directory):
+    with open(os.path.join(directory, TRANSCRIPTS_FILE), encoding="utf-8") as f:
+        transcripts = json.load(f)
+    recognizer = make_recognizer()
+    fixtures = []
+    for name in sorted(transcripts):
+        path = os.path.join(directory, name)
+        with wave.open(path, "rb") as f:
+            duration = f.getnframes() / f.getframerate()
+        fixtures.append((path, transcripts[name], duration, FileBackend.key(capture_phrase(recognizer, path))))
+    return fixtures
+
+
+# Function to build translate(text) for a variant; also returns its BatchTranslator (None for googletrans)
+def build_translator(variant, args, cache):
+    if variant["engine"] == "marian":
+        pool = StubModelPool(args.ms_per_token) if args.mt == "stub" else None
+        if pool is None:
+            from model_pool import model_pool as pool
+        batcher = BatchTranslator(cache=cache)
+        router = RoutedTranslator(RoutePlanner(SCRIPT_MODELS), translator=batcher, pool=pool)
+        profile = None if args.profile == "default" else args.profile
+        return lambda text: router.translate(text, "English", variant["target"], profile=profile), batcher
+    translator = StubTranslator(args.round_trip_ms)
+    glossary = Glossary(GLOSSARY_TERMS)
+    return lambda text: translate_with_glossary(text, translator, glossary, variant["target"], cache=cache), None
+
+
+# Function to replay the fixtures through one variant's pipeline and measure it
+def run_variant(name, fixtures, args, workdir):
+    variant = VARIANTS[name]
+    cache = TranslationCache(":memory:")
+    translate, batcher = build_translator(variant, args, cache)
+    asr = ASRRouter([FileBackend({key: text for _, text, _, key in fixtures}, delay=args.asr_ms / 1000.0)])
+    recognizer = make_recognizer()
+
+    if variant["engine"] == "marian":
+        transcript = TranscriptJournal(os.path.join(workdir, f"{name}.jsonl"), os.path.join(workdir, f"{name}.docx"))
+        persist = lambda item: transcript.append(item["translated"], source=item["text"], language=variant["target"],
+                                                 source_language="English")
+        close = transcript.close
+    elif variant.get("subtitle_file"):
+        writer = SubtitleFileWriter(os.path.join(workdir, f"{name}.srt"), cue_format="srt")
+        persist = lambda item: writer.write(item["translated"], item["start"], item["end"])
+        close = writer.close
+    else:
+        persist = lambda item: None
+        close = lambda: None
+
+    total = len(fixtures) * args.repeats
+    end_to_end = LatencyStats()
+    finished = {"count": 0, "completed": 0}
+    lock = threading.Lock()
+    all_done = threading.Event()
+
+    def finish(ok):
+        with lock:
+            finished["count"] += 1
+            finished["completed"] += ok
+            if finished["count"] == total:
+                all_done.set()
+
+    # Listen/VAD over the utterance's audio, as in the scripts' capture loop
+    def capture_item(item):
+        try:
+            item["audio"] = capture_phrase(recognizer, item["path"])
+        except (OSError, ValueError) as e:
+            print(f"Could not capture {item['path']}: {e}")
+            finish(False)
+            return None
+        return item
+
+    def recognize_item(item):
+        try:
+            item["text"] = asr.recognize(item["audio"], language="en-US")
+        except (sr.UnknownValueError, sr.RequestError):
+            finish(False)
+            return None
+        return item
+
+    def translate_item(item):
+        item["translated"] = translate(item["text"])
+        return item
+
+    def persist_item(item):
+        persist(item)
+        end_to_end.add(time.perf_counter() - item["spoken"])
+        finish(True)
+
+    # Every utterance is measured, so unlike the scripts no stage drops items here
+    capture_stage = Stage("capture", capture_item, maxsize=4)
+    asr_stage = Stage("asr", recognize_item, maxsize=4)
+    mt_stage = Stage("mt", translate_item, maxsize=4)
+    persist_stage = Stage("persist", persist_item, maxsize=256)
+    capture_stage.then(asr_stage)
+    asr_stage.then(mt_stage)
+    mt_stage.then(persist_stage)
+    pipeline = Pipeline(capture_stage, asr_stage, mt_stage, persist_stage)
+    pipeline.start()
+
+    start = time.perf_counter()
+    clock = 0.0
+    audio_seconds = 0.0
+    for _ in range(args.repeats):
+        for path, _, duration, _ in fixtures:
+            if args.realtime:
+                # Hand each utterance over when a live speaker would have finished it
+                time.sleep(max(0.0, start + clock + duration - time.perf_counter()))
+            item = {"path": path, "spoken": time.perf_counter(), "start": clock, "end": clock + duration}
+            capture_stage.put(item)
+            clock += duration
+            audio_seconds += duration
+    completed_in_time = all_done.wait(args.timeout)
+    wall = time.perf_counter() - start
+    pipeline.stop()
+    close()
+
+    stages = pipeline.stats()
+    return {
+        "variant": name,
+        "engine": variant["engine"],
+        "mt": args.mt if variant["engine"] == "marian" else "stub",
+        "profile": args.profile if variant["engine"] == "marian" else None,
+        "utterances": total,
+        "completed": finished["completed"],
+        "timed_out": not completed_in_time,
+        "wall_seconds": round(wall, 3),
+        "throughput": {
+            "utterances_per_second": round(finished["completed"] / wall, 2) if wall else 0.0,
+            "audio_seconds_per_second": round(audio_seconds / wall, 2) if wall else 0.0,
+        },
+        "end_to_end": end_to_end.summary(),
+        "stages": {stage: {"wait": entry["wait"], "service": entry["service"]} for stage, entry in stages.items()},
+        "asr": asr.stats(),
+        "cache": cache.stats(),
+        # Throughput and p50/p99 latency per micro-batch size
+        "batching": batcher.stats() if batcher is not None else None,
+        # Generate time and latency per decoding profile
+        "profiles": batcher.profile_stats() if batcher is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless end-to-end latency benchmark on recorded audio fixtures")
+    parser.add_argument("--fixtures", default="bench_fixtures", help="directory of WAV files and transcripts.json")
+    parser.add_argument("--generate-fixtures", action="store_true", help="write synthetic fixtures first")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--repeats", type=int, default=1, help="replays of the fixture set (later ones hit the cache)")
+    parser.add_argument("--realtime", action="store_true", help="pace the replay like a live speaker")
+    parser.add_argument("--mt", choices=("stub", "marian"), default="stub", help="MarianMT backend for the marian variant")
+    parser.add_argument("--ms-per-token", type=float, default=2.0, help="stub Marian cost per input token (4 beams)")
+    parser.add_argument("--profile", choices=list(PROFILES) + ["default"], default="live",
+                        help="decoding profile for the marian variant; default = the model's own generate() settings")
+    parser.add_argument("--round-trip-ms", type=float, default=80.0, help="stub googletrans request time")
+    parser.add_argument("--asr-ms", type=float, default=0.0, help="simulated recognition time per utterance")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.generate_fixtures or not os.path.exists(os.path.join(args.fixtures, TRANSCRIPTS_FILE)):
+        generate_fixtures(args.fixtures)
+    fixtures = load_fixtures(args.fixtures)
+
+    report = {"fixtures": len(fixtures), "repeats": args.repeats, "realtime": args.realtime, "variants": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.variants:
+            result = run_variant(name, fixtures, args, workdir)
+            report["variants"][name] = result
+            e2e = result["end_to_end"]
+            print(f"{name}: p50 {e2e['p50_ms']} ms, p95 {e2e['p95_ms']} ms, p99 {e2e['p99_ms']} ms, "
+                  f"{result['throughput']['utterances_per_second']} utterances/s")
+            for batch_size, entry in (result["batching"] or {}).items():
+                print(f"  batch size {batch_size}: {entry['batches']} batches, "
+                      f"{entry['segments_per_second']} segments/s, p50 {entry['latency']['p50_ms']} ms, "
+                      f"p99 {entry['latency']['p99_ms']} ms")
+            for profile, entry in (result["profiles"] or {}).items():
+                print(f"  profile {profile}: {entry['segments']} segments, "
+                      f"{entry['generate_ms_per_segment']} ms generate per segment, "
+                      f"p50 {entry['latency']['p50_ms']} ms, p99 {entry['latency']['p99_ms']} ms")
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import random
+import string
+import time
+
+from glossary import Glossary, protect_terms
+
+# Glossary sizes to benchmark, from the built-in list up to a large course glossary
+GLOSSARY_SIZES = [15, 150, 1500, 15000, 50000]
+
+UTTERANCE = "today we compute the Fourier transform of the impulse response and look at the signal system in the frequency domain"
+REPEATS = 200
+
+
+# Function to make a random term of one to three words
+def random_term(rng):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))) for _ in range(rng.randint(1, 3))]
+    return " ".join(words)
+
+
+# The old per-word check: rebuild the lowercased list for every word
+def naive_scan(text, terms):
+    kept = 0
+    for word in text.split():
+        if word.lower() in [term.lower() for term in terms]:
+            kept += 1
+    return kept
+
+
+def main():
+    rng = random.Random(0)
+    base_terms = ["Fourier transform", "Impulse Response", "signal system", "Frequency"]
+    print(f"{'terms':>8} {'build ms':>10} {'trie us/utt':>12} {'naive us/utt':>13}")
+    for size in GLOSSARY_SIZES:
+        terms = base_terms + [random_term(rng) for _ in range(size - len(base_terms))]
+
+        start = time.perf_counter()
+        glossary = Glossary(terms)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            protect_terms(UTTERANCE, glossary)
+        trie_us = (time.perf_counter() - start) / REPEATS * 1e6
+
+        # The naive scan gets slow quickly, so run it fewer times
+        naive_repeats = max(1, REPEATS * 15 // size)
+        start = time.perf_counter()
+        for _ in range(naive_repeats):
+            naive_scan(UTTERANCE, terms)
+        naive_us = (time.perf_counter() - start) / naive_repeats * 1e6
+
+        print(f"{size:>8} {build_ms:>10.1f} {trie_us:>12.1f} {naive_us:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import time
+
+from bench_quantization import CORPUS
+from process_pool import ProcessTranslationPool
+
+# One classroom per language pair
+DEFAULT_MODELS = [
+    'Helsinki-NLP/opus-mt-en-hi',
+    'Helsinki-NLP/opus-mt-en-gu',
+    'Helsinki-NLP/opus-mt-en-te',
+    'Helsinki-NLP/opus-mt-en-fr',
+]
+
+
+# Function to measure translated segments per second for one worker count
+def measure(workers, models, requests_per_model, quantize):
+    # Spread each pair over enough workers that every core has work
+    replicas = max(1, -(-workers // len(models)))
+    pool = ProcessTranslationPool(workers=workers, quantize=quantize, replicas=replicas)
+    try:
+        # Warm up: every worker loads the models routed to it
+        warmup = [pool.submit(CORPUS[:1], model_name) for model_name in models for _ in range(replicas)]
+        for future in warmup:
+            future.result()
+
+        start = time.perf_counter()
+        futures = []
+        for i in range(requests_per_model):
+            sentence = CORPUS[i % len(CORPUS)]
+            for model_name in models:
+                futures.append(pool.submit([sentence], model_name))
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.close()
+    return {
+        "workers": workers,
+        "segments": len(futures),
+        "seconds": round(elapsed, 2),
+        "segments_per_second": round(len(futures) / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling curve of the multi-process translation pool")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--requests", type=int, default=40, help="requests per model")
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+
+    curve = []
+    for workers in range(1, args.max_workers + 1):
+        result = measure(workers, args.models, args.requests, args.quantize)
+        result["speedup"] = round(result["segments_per_second"] / curve[0]["segments_per_second"], 2) if curve else 1.0
+        curve.append(result)
+        print(f"{workers:>3} workers: {result['segments_per_second']:>8} segments/s  (x{result['speedup']})")
+    print(json.dumps(curve, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import gc
+import json
+import time
+
+import torch
+
+from metrics import LatencyStats, corpus_bleu, current_rss_mb
+from model_pool import ModelPool, configure_torch_threads
+
+# English -> target models from target_language_codes
+DEFAULT_MODELS = [
+    'Helsinki-NLP/opus-mt-en-hi',
+    'Helsinki-NLP/opus-mt-en-gu',
+    'Helsinki-NLP/opus-mt-en-te',
+    'Helsinki-NLP/opus-mt-en-fr',
+    'Helsinki-NLP/opus-mt-en-es',
+]
+
+# Fixed lecture-style test corpus
+CORPUS = [
+    "Today we will study the Fourier transform of continuous time signals.",
+    "The impulse response completely describes a linear time invariant system.",
+    "In the frequency domain, convolution becomes simple multiplication.",
+    "Please write down the definition of the Laplace transform.",
+    "Sampling a signal below the Nyquist rate causes aliasing.",
+    "The bandwidth of this filter is about two kilohertz.",
+    "Amplitude modulation shifts the spectrum of the message signal.",
+    "Let us look at the phase response of the system.",
+    "A causal system does not depend on future values of the input.",
+    "We can find the output by convolving the input with the impulse response.",
+    "The z transform is the discrete time counterpart of the Laplace transform.",
+    "Stability requires the region of convergence to include the unit circle.",
+    "This example shows a low pass filter with a sharp cutoff.",
+    "Digital signal processing is used in every mobile phone.",
+    "Next week we will have a short quiz on these topics.",
+    "Energy signals have finite energy and zero average power.",
+    "The discrete Fourier transform can be computed with the FFT algorithm.",
+    "Any periodic signal can be written as a sum of sinusoids.",
+    "Please submit the assignment before Friday evening.",
+    "Are there any questions before we move on to the next chapter?",
+]
+
+
+def run_mode(model_name, quantize, sentences, repeats):
+    gc.collect()
+    rss_before = current_rss_mb()
+    pool = ModelPool(quantize=quantize)
+    tokenizer, model = pool.get(model_name)
+    rss_after_load = current_rss_mb()
+
+    latency = LatencyStats()
+    outputs = []
+    with torch.no_grad():
+        for repeat in range(repeats):
+            for sentence in sentences:
+                start = time.perf_counter()
+                inputs = tokenizer(sentence, return_tensors="pt", padding=True)
+                translated = model.generate(**inputs)
+                text = tokenizer.decode(translated[0], skip_special_tokens=True)
+                latency.add(time.perf_counter() - start)
+                if repeat == 0:
+                    outputs.append(text)
+
+    result = {
+        "latency": latency.summary(),
+        "model_mb": pool.stats()["used_mb"],
+        "rss_load_mb": round(rss_after_load - rss_before, 1) if rss_before is not None else None,
+        "rss_mb": round(current_rss_mb() or 0, 1),
+    }
+    pool.clear()
+    del tokenizer, model, pool
+    gc.collect()
+    return result, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and dynamic int8 MarianMT inference")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads")
+    parser.add_argument("--interop-threads", type=int, default=None)
+    parser.add_argument("--references", help="optional JSON file {model_name: [reference, ...]}")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    configure_torch_threads(args.threads, args.interop_threads)
+    references = {}
+    if args.references:
+        with open(args.references, encoding="utf-8") as f:
+            references = json.load(f)
+
+    report = {"threads": torch.get_num_threads(), "models": {}}
+    for model_name in args.models:
+        fp32, fp32_outputs = run_mode(model_name, False, CORPUS, args.repeats)
+        int8, int8_outputs = run_mode(model_name, True, CORPUS, args.repeats)
+        entry = {
+            "fp32": fp32,
+            "int8": int8,
+            # int8 output scored against fp32 output: how much quality quantization costs
+            "bleu_int8_vs_fp32": round(corpus_bleu(int8_outputs, fp32_outputs), 2),
+            "speedup_p50": round(fp32["latency"]["p50_ms"] / int8["latency"]["p50_ms"], 2)
+            if int8["latency"]["p50_ms"] else None,
+        }
+        if model_name in references:
+            fp32_bleu = corpus_bleu(fp32_outputs, references[model_name])
+            int8_bleu = corpus_bleu(int8_outputs, references[model_name])
+            entry["bleu_fp32"] = round(fp32_bleu, 2)
+            entry["bleu_int8"] = round(int8_bleu, 2)
+            entry["bleu_delta"] = round(int8_bleu - fp32_bleu, 2)
+        report["models"][model_name] = entry
+        print(f"{model_name}: p50 {fp32['latency']['p50_ms']} ms -> {int8['latency']['p50_ms']} ms, "
+              f"{fp32['model_mb']} MB -> {int8['model_mb']} MB, BLEU vs fp32 {entry['bleu_int8_vs_fp32']}")
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import time
+from urllib.parse import quote
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from batch_translator import BatchTranslator
+from bench_e2e import SCRIPT_MODELS, StubModelPool
+from bench_quantization import CORPUS
+from metrics import LatencyStats, peak_rss_mb
+from routing import RoutePlanner, RoutedTranslator
+from subtitle_server import SubtitleServer
+from translation_cache import TranslationCache
+
+# Languages the scripts offer as targets
+LANGUAGES = ["English", "Gujarati", "French", "Spanish", "Hindi", "Telugu"]
+
+
+# Function to raise the open file limit far enough for every client socket
+def raise_file_limit(needed):
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+async def _connect(port, slow):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if slow:
+        # A tiny receive window, and it is never read: the server's buffers for it fill up
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2048)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    return await asyncio.open_connection(sock=sock)
+
+
+# Simulated student: SSE or WebSocket, records the delay of every subtitle it receives
+class Client:
+    def __init__(self, index, language, kind, slow, latency):
+        self.index = index
+        self.language = language
+        self.kind = kind
+        self.slow = slow
+        self.latency = latency
+        self.received = 0
+        self.wrong_language = 0
+        self.disconnected = False
+
+    async def run(self, port, connected, done):
+        reader, writer = await _connect(port, self.slow)
+        path = "/events" if self.kind == "sse" else "/ws"
+        request = f"GET {path}?language={quote(self.language)} HTTP/1.1\r\nHost: localhost\r\n"
+        if self.kind == "websocket":
+            key = base64.b64encode(os.urandom(16)).decode("ascii")
+            request += f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n"
+        writer.write((request + "\r\n").encode("ascii"))
+        await reader.readuntil(b"\r\n\r\n")
+        connected()
+        try:
+            if self.slow:
+                await done.wait()
+                # Anything still in the socket was sent before the drop; a dropped client then sees EOF
+                while await reader.read(65536):
+                    pass
+                self.disconnected = True
+                return
+            while True:
+                data = await (self._read_sse(reader) if self.kind == "sse" else self._read_frame(reader))
+                if data is None:
+                    continue
+                payload = json.loads(data)
+                if payload["type"] != "subtitle":
+                    continue
+                self.latency.add(time.time() - payload["published"])
+                self.received += 1
+                self.wrong_language += payload["language"] != self.language
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.disconnected = True
+        finally:
+            writer.close()
+
+    async def _read_sse(self, reader):
+        event = await reader.readuntil(b"\n\n")
+        for line in event.split(b"\n"):
+            if line.startswith(b"data: "):
+                return line[6:]
+        return None  # keepalive comment
+
+    async def _read_frame(self, reader):
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack("!Q", await reader.readexactly(8))
+        payload = await reader.readexactly(length)
+        return payload if first & 0x0F == 0x1 else None
+
+
+# Function run in each client process: connect its share of the clients, report when
+# they are all connected, then read until the expected number of subtitles arrived
+def client_process(port, specs, expected, published, results, timeout):
+    async def run():
+        latency = LatencyStats(max_samples=1 << 20)
+        clients = [Client(index, language, kind, slow, latency) for index, language, kind, slow in specs]
+        connected = {"count": 0}
+        all_connected = asyncio.Event()
+        done = asyncio.Event()
+
+        def on_connected():
+            connected["count"] += 1
+            if connected["count"] == len(clients):
+                all_connected.set()
+
+        tasks = [asyncio.ensure_future(client.run(port, on_connected, done)) for client in clients]
+        await asyncio.wait_for(all_connected.wait(), timeout)
+        results.put(("connected", len(clients)))
+
+        # The parent sets expected (events minus those the server skipped) once everything is published
+        while not published.is_set():
+            await asyncio.sleep(0.05)
+        deadline = time.perf_counter() + timeout
+        healthy = [client for client in clients if not client.slow]
+        while time.perf_counter() < deadline:
+            if all(client.received >= expected.value or client.disconnected for client in healthy):
+                break
+            await asyncio.sleep(0.05)
+        done.set()
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        results.put(("done", {
+            "latencies": list(latency.samples),
+            "healthy_complete": sum(client.received >= expected.value for client in healthy),
+            "healthy_disconnected": sum(client.disconnected for client in healthy),
+            "slow_dropped": sum(client.disconnected for client in clients if client.slow),
+            "wrong_language": sum(client.wrong_language for client in clients),
+        }))
+
+    raise_file_limit(len(specs) + 256)
+    asyncio.run(run())
+
+
+# Function to connect the clients from several processes (students are separate machines;
+# one process for all of them would measure its own GIL), publish events and collect delivery delays
+def load_test(server, args):
+    slow_every = args.clients // args.slow_clients if args.slow_clients else 0
+    specs = []
+    for index in range(args.clients):
+        kind = "websocket" if index % 5 == 0 else "sse"  # one in five uses WebSocket
+        slow = bool(slow_every) and index % slow_every == 1 and index // slow_every < args.slow_clients
+        specs.append((index, LANGUAGES[index % len(LANGUAGES)], kind, slow))
+    expected = multiprocessing.Value("i", 0)
+    published = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=client_process, args=(server.port, specs[i::args.processes], expected,
+                                                             published, results, args.timeout), daemon=True)
+        for i in range(args.processes)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for _ in processes:
+        results.get(timeout=args.timeout)
+    # The server registers a client just after sending its headers
+    while sum(server.stats()["clients"].values()) < len(specs):
+        time.sleep(0.01)
+    connect_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.events):
+        # Long lines so that slow clients' buffers fill within the run
+        text = " ".join(CORPUS[(i + j) % len(CORPUS)] for j in range(args.sentences_per_event))
+        server.publish({"text": text, "language": "English", "target": "Hindi", "translated": f"hi:{text}"})
+        time.sleep(args.interval)
+    # Let the last event through translation before counting what was skipped
+    while server.broadcast + server.skipped < args.events:
+        time.sleep(0.01)
+    expected.value = args.events - server.skipped
+    published.set()
+
+    latency = LatencyStats(max_samples=args.clients * args.events)
+    report = {"healthy_complete": 0, "healthy_disconnected": 0, "slow_dropped": 0, "wrong_language": 0}
+    for _ in processes:
+        _, result = results.get(timeout=2 * args.timeout)
+        for seconds in result.pop("latencies"):
+            latency.add(seconds)
+        for key, value in result.items():
+            report[key] += value
+    broadcast_seconds = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    report.update({
+        "clients": len(specs),
+        "websocket_clients": sum(kind == "websocket" for _, _, kind, _ in specs),
+        "slow_clients": sum(slow for _, _, _, slow in specs),
+        "processes": args.processes,
+        "connect_seconds": round(connect_seconds, 3),
+        "events": args.events,
+        "expected_per_client": expected.value,
+        "broadcast_seconds": round(broadcast_seconds, 3),
+        "delivered": latency.count,
+        "delivery": latency.summary(),
+        "delivery_histogram": latency.histogram(),
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the subtitle server with many local clients")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--slow-clients", type=int, default=5, help="clients that never read")
+    parser.add_argument("--processes", type=int, default=4, help="client processes")
+    parser.add_argument("--events", type=int, default=400)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between published subtitles")
+    parser.add_argument("--sentences-per-event", type=int, default=6)
+    parser.add_argument("--ms-per-token", type=float, default=0.2, help="stub Marian cost per input token")
+    parser.add_argument("--client-queue", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    raise_file_limit(args.clients + 256)
+    translator = BatchTranslator(cache=TranslationCache(":memory:"))
+    router = RoutedTranslator(RoutePlanner(SCRIPT_MODELS), translator=translator, pool=StubModelPool(args.ms_per_token))
+    server = SubtitleServer(router, LANGUAGES, host="127.0.0.1", port=0, client_queue=args.client_queue)
+    server.start()
+    try:
+        report = load_test(server, args)
+    finally:
+        stats = server.stats()
+        server.stop()
+    report["server"] = stats
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    delivery = report["delivery"]
+    print(f"{report['clients']} clients: {report['healthy_complete']} got every subtitle, "
+          f"{report['slow_dropped']}/{report['slow_clients']} slow clients dropped, "
+          f"delivery p50 {delivery['p50_ms']} ms, p95 {delivery['p95_ms']} ms, p99 {delivery['p99_ms']} ms")
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
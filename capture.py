@@ -0,0 +1,212 @@
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+# Defaults for capture and voice activity detection
+DEFAULT_CAPACITY_SECONDS = 120  # audio kept in the ring; segments must be used before it wraps
+DEFAULT_FRAME_MS = 20
+DEFAULT_BLOCK_MS = 200          # VAD runs once per this much new audio, not once per chunk
+DEFAULT_SPEECH_RATIO = 3.0      # speech is this many times louder than the noise floor
+DEFAULT_MIN_ENERGY = 100.0      # never treat quieter frames as speech, however low the floor gets
+DEFAULT_PAUSE_SECONDS = 0.8
+DEFAULT_MAX_SEGMENT_SECONDS = 15
+DEFAULT_PREROLL_SECONDS = 0.3
+FLOOR_FALL_RATE = 0.3           # noise floor follows quieter audio quickly...
+FLOOR_RISE_RATE = 0.02          # ...and louder background noise slowly
+
+
+# Preallocated ring of 16-bit mono samples over a bytearray. Every chunk is
+# written twice, at its position and one capacity further on, so any window of
+# up to `capacity` samples is contiguous and can be handed out as a memoryview
+# without copying.
+class RingBuffer:
+    def __init__(self, capacity, sample_width=2):
+        if sample_width != 2:
+            raise ValueError("RingBuffer expects 16-bit samples")
+        self.capacity = capacity
+        self.sample_width = sample_width
+        self._buffer = bytearray(2 * capacity * sample_width)
+        self._samples = np.frombuffer(self._buffer, dtype=np.int16)
+        self._view = memoryview(self._buffer)
+        self.written = 0  # total samples written so far
+
+    # Copy one chunk of raw audio into the ring; returns the absolute index of its first sample
+    def write(self, data):
+        width = self.sample_width
+        size = self.capacity * width
+        start = self.written
+        position = (start % self.capacity) * width
+        offset = 0
+        while offset < len(data):
+            count = min(len(data) - offset, size - position)
+            part = data[offset:offset + count]
+            self._buffer[position:position + count] = part
+            self._buffer[position + size:position + size + count] = part
+            offset += count
+            position = 0
+        self.written += len(data) // width
+        return start
+
+    # NumPy view of samples [start, end) (absolute indices); no copy
+    def samples(self, start, end):
+        position = start % self.capacity
+        return self._samples[position:position + (end - start)]
+
+    # memoryview of the raw bytes of samples [start, end); no copy
+    def bytes_view(self, start, end):
+        position = start % self.capacity
+        return self._view[position * self.sample_width:(position + end - start) * self.sample_width]
+
+    # True while samples from `start` on have not been overwritten yet
+    def is_valid(self, start):
+        return self.written - start <= self.capacity
+
+
+# Segment handed to ASR. audio.frame_data is a memoryview into the ring, valid
+# until about capacity_seconds more audio has been captured; call
+# is_valid() (or copy with bytes(audio.frame_data)) if it may be held longer.
+class Segment:
+    def __init__(self, ring, start, end, sample_rate):
+        self.ring = ring
+        self.start = start
+        self.end = end
+        self.sample_rate = sample_rate
+        self.audio = sr.AudioData(ring.bytes_view(start, end), sample_rate, ring.sample_width)
+
+    @property
+    def duration(self):
+        return (self.end - self.start) / self.sample_rate
+
+    def is_valid(self):
+        return self.ring.is_valid(self.start)
+
+
+# Replaces recognizer.listen(): reads the source into a ring buffer, runs a
+# vectorized energy VAD over each block and calls on_segment(Segment) for each
+# utterance. The noise floor adapts all the time instead of only once at startup.
+class CaptureEngine:
+    def __init__(self, on_segment, capacity_seconds=DEFAULT_CAPACITY_SECONDS, frame_ms=DEFAULT_FRAME_MS,
+                 block_ms=DEFAULT_BLOCK_MS,
+                 speech_ratio=DEFAULT_SPEECH_RATIO, min_energy=DEFAULT_MIN_ENERGY, pause_seconds=DEFAULT_PAUSE_SECONDS,
+                 max_segment_seconds=DEFAULT_MAX_SEGMENT_SECONDS, preroll_seconds=DEFAULT_PREROLL_SECONDS,
+                 initial_floor=None):
+        self.on_segment = on_segment
+        self.capacity_seconds = capacity_seconds
+        self.frame_ms = frame_ms
+        self.block_ms = block_ms
+        self.speech_ratio = speech_ratio
+        self.min_energy = min_energy
+        self.pause_seconds = pause_seconds
+        self.max_segment_seconds = max_segment_seconds
+        self.preroll_seconds = preroll_seconds
+        self.noise_floor = initial_floor
+        self.segments = 0
+        self.ring = None
+
+    # Read from an open source (sr.Microphone or sr.AudioFile) until stop_event is set or the stream ends
+    def run(self, source, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        sample_rate = source.SAMPLE_RATE
+        self.ring = RingBuffer(int(self.capacity_seconds * sample_rate), source.SAMPLE_WIDTH)
+        frame = max(1, int(sample_rate * self.frame_ms / 1000))
+        block_frames = max(1, self.block_ms // self.frame_ms)
+        self._frame = frame
+        self._pause_frames = max(1, int(self.pause_seconds * 1000 / self.frame_ms))
+        self._max_samples = int(self.max_segment_seconds * sample_rate)
+        self._preroll = int(self.preroll_seconds * sample_rate)
+        self._sample_rate = sample_rate
+        self._speech_start = None
+        self._last_speech_end = None
+        self._silent_frames = 0
+
+        analyzed = 0  # next sample index the VAD has not looked at
+        while not stop_event.is_set():
+            data = source.stream.read(source.CHUNK)
+            if not data:
+                break
+            self.ring.write(data)
+
+            # Analyze all complete frames that arrived since the last block at once
+            count = (self.ring.written - analyzed) // frame
+            if count < block_frames:
+                continue
+            block = self.ring.samples(analyzed, analyzed + count * frame).reshape(count, frame).astype(np.float32)
+            energy = np.sqrt(np.einsum("ij,ij->i", block, block) / frame)
+            speech = self._classify(energy)
+            if self._speech_start is not None or speech.any():
+                self._segment(speech, analyzed)
+            analyzed += count * frame
+
+        if self._speech_start is not None:
+            self._emit(self._speech_start, self._last_speech_end)
+
+    # Vectorized speech/non-speech decision for a block of frame energies; updates the noise floor
+    def _classify(self, energy):
+        if self.noise_floor is None:
+            self.noise_floor = float(np.percentile(energy, 10))
+        threshold = max(self.min_energy, self.speech_ratio * self.noise_floor)
+        speech = energy > threshold
+        # Only non-speech frames move the floor, so a long utterance can't raise it to speech level
+        quiet = energy[~speech]
+        if len(quiet):
+            level = float(quiet.mean())
+            rate = FLOOR_FALL_RATE if level < self.noise_floor else FLOOR_RISE_RATE
+            self.noise_floor += rate * (level - self.noise_floor)
+        return speech
+
+    # Walk a block's speech/silence runs (not its frames) and emit finished segments.
+    # A segment ends after pause_frames of silence, or is cut at max_segment_seconds.
+    def _segment(self, speech, base):
+        frame = self._frame
+        count = len(speech)
+        speech_frames = np.flatnonzero(speech)
+        quiet_frames = np.flatnonzero(~speech)
+
+        def next_in(frames, i):
+            position = np.searchsorted(frames, i)
+            return int(frames[position]) if position < len(frames) else count
+
+        i = 0
+        while i < count:
+            if self._speech_start is None:
+                i = next_in(speech_frames, i)
+                if i == count:
+                    return
+                self._speech_start = max(0, base + i * frame - self._preroll, self.ring.written - self.ring.capacity)
+                self._silent_frames = 0
+            # Frame at which the segment reaches its maximum length
+            limit = max(i, -(-(self._speech_start + self._max_samples - base) // frame) - 1)
+            if speech[i]:
+                run_end = next_in(quiet_frames, i)
+                if limit < run_end:
+                    self._cut(base + (limit + 1) * frame)
+                    i = limit + 1
+                    continue
+                self._last_speech_end = base + run_end * frame
+                self._silent_frames = 0
+                i = run_end
+            else:
+                run_end = next_in(speech_frames, i)
+                pause_end = i + self._pause_frames - self._silent_frames - 1
+                if limit < min(run_end, pause_end, count):
+                    self._cut(base + (limit + 1) * frame)
+                    i = limit + 1
+                elif pause_end < min(run_end, count):
+                    self._emit(self._speech_start, self._last_speech_end)
+                    self._speech_start = None
+                    i = pause_end + 1
+                else:
+                    self._silent_frames += run_end - i
+                    i = run_end
+
+    def _cut(self, end):
+        self._emit(self._speech_start, end)
+        self._speech_start = None
+        self._silent_frames = 0
+
+    def _emit(self, start, end):
+        if end is None or end <= start:
+            return
+        self.segments += 1
+        self.on_segment(Segment(self.ring, start, end, self._sample_rate))
@@ -0,0 +1,53 @@
+LIVE = "live"
+TRANSCRIPT = "transcript"
+
+# Tokens of slack on top of length_ratio, so very short inputs aren't cut off
+LENGTH_SLACK = 10
+
+
+# Named generate() settings. Each output (on-screen subtitles, the saved
+# transcript) picks its own profile, so the live path can decode greedily with
+# a length cap while the document gets beam search.
+class DecodingProfile:
+    def __init__(self, name, num_beams=1, max_new_tokens=None, length_ratio=None, early_stopping=False):
+        self.name = name
+        self.num_beams = num_beams
+        self.max_new_tokens = max_new_tokens  # hard cap on output tokens
+        self.length_ratio = length_ratio      # cap relative to the longest input in the batch
+        self.early_stopping = early_stopping
+
+    # Keyword arguments for model.generate() on a batch whose longest input has input_length tokens
+    def generate_kwargs(self, input_length):
+        kwargs = {"num_beams": self.num_beams, "do_sample": False}
+        limit = self.max_new_tokens
+        if self.length_ratio:
+            relative = int(self.length_ratio * input_length) + LENGTH_SLACK
+            limit = min(limit, relative) if limit else relative
+        if limit:
+            kwargs["max_new_tokens"] = limit
+        if self.num_beams > 1:
+            kwargs["early_stopping"] = self.early_stopping
+        return kwargs
+
+    def __repr__(self):
+        return f"DecodingProfile({self.name!r}, num_beams={self.num_beams})"
+
+
+PROFILES = {
+    # Greedy, with a cap relative to the input only: a runaway (repeating) output stops early and
+    # can't stall the subtitles, but no real translation comes near 3x its source's tokens, so a
+    # chunk is never cut off however long it is (an absolute cap would truncate unchunked text)
+    LIVE: DecodingProfile(LIVE, num_beams=1, length_ratio=3.0),
+    # Beam search for the saved document, where a second or two per segment doesn't matter
+    TRANSCRIPT: DecodingProfile(TRANSCRIPT, num_beams=4, max_new_tokens=256, early_stopping=True),
+}
+
+
+# Function to look up a profile by name; None means the model's own generate() defaults
+def get_profile(profile):
+    if profile is None or isinstance(profile, DecodingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown decoding profile: {profile}") from None
@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+
+DEFAULT_FPS = 60
+
+# Set by startup_profiler.py to the launch time: report when the first window
+# is up, then close it
+STARTUP_PROBE = os.environ.get("SUBTITLE_STARTUP_PROBE")
+
+
+# Thread-safe channel between pipeline threads and the Tk labels.
+# Worker threads only call push(); the Tk thread drains the pending texts on a
+# fixed after() tick and renders just the latest text per label, so bursts
+# are coalesced and no Tk call ever happens off the main thread.
+class SubtitleDisplay:
+    def __init__(self, root, label=None, fps=DEFAULT_FPS):
+        self.root = root
+        self.interval_ms = max(1, int(1000 / fps))
+        self.labels = {}
+        self.pushed = 0
+        self.rendered = 0
+        self._pending = {}  # label name -> latest text
+        self._lock = threading.Lock()
+        if label is not None:
+            self.add_label("main", label)
+        root.after(self.interval_ms, self._tick)
+        if STARTUP_PROBE:
+            root.after(0, self._report_startup)
+
+    # Register another label (e.g. one per target language); call from the Tk thread
+    def add_label(self, name, label):
+        self.labels[name] = label
+
+    # Queue a subtitle for a label; safe to call from any thread
+    def push(self, text, target="main"):
+        with self._lock:
+            self._pending[target] = text
+            self.pushed += 1
+
+    def stats(self):
+        with self._lock:
+            return {"pushed": self.pushed, "rendered": self.rendered, "coalesced": self.pushed - self.rendered}
+
+    def _tick(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for target, text in pending.items():
+            label = self.labels.get(target)
+            if label is not None:
+                label.config(text=text)
+                with self._lock:
+                    self.rendered += 1
+        self.root.after(self.interval_ms, self._tick)
+
+    def _report_startup(self):
+        self.root.update_idletasks()
+        print(f"first_window_seconds={time.time() - float(STARTUP_PROBE):.3f}", flush=True)
+        self.root.destroy()
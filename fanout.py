@@ -0,0 +1,47 @@
+import time
+
+from metrics import LatencyStats
+
+
+# Translates one utterance into several target languages at once.
+# Every opus-mt pair has its own encoder and vocabulary, so encoder output
+# can't be shared between targets. Instead the router translates hops shared
+# by several targets (e.g. gu->en) once, and submits the remaining hops
+# together. They land in the same micro-batch, where the batch translator
+# runs each model's generate() concurrently.
+class FanOutTranslator:
+    def __init__(self, targets, router, profile=None):
+        self.targets = list(targets)
+        self.router = router
+        self.profile = profile  # decoding profile for every target
+        self.total = LatencyStats()  # until the slowest target is done
+
+    # Load every model on the routes from source up front so the first utterance doesn't pay for it
+    def warm_up(self, source):
+        for target in self.targets:
+            for model_name in self.router.planner.route(source, target):
+                self.router.pool.get(model_name)
+
+    # Returns {target language: translated text}; if translation fails every target maps to None
+    def translate(self, text, source):
+        start = time.perf_counter()
+        try:
+            translations = self.router.translate_many(text, source, self.targets, self.profile)
+        except Exception as e:
+            print(f"Fan-out translation failed: {e}")
+            return {target: None for target in self.targets}
+        self.total.add(time.perf_counter() - start)
+        return translations
+
+    # Translate into main_target and every fan-out target in one routed call, so the main subtitle's hops
+    # share micro-batches with the others. Returns (main translation, {target language: translated text});
+    # a failure raises, like a single-target translation would.
+    def translate_with(self, text, source, main_target):
+        start = time.perf_counter()
+        targets = self.targets if main_target in self.targets else self.targets + [main_target]
+        translations = self.router.translate_many(text, source, targets, self.profile)
+        self.total.add(time.perf_counter() - start)
+        return translations[main_target], {target: translations[target] for target in self.targets}
+
+    def stats(self):
+        return {"total": self.total.summary()}
@@ -0,0 +1,129 @@
+import re
+
+# Placeholders look like [[0]], [[1]], ... Translators sometimes add spaces
+# inside the brackets, so restoring accepts those too.
+PLACEHOLDER = "[[{}]]"
+PLACEHOLDER_PATTERN = re.compile(r"\[\[\s*(\d+)\s*\]\]")
+
+# Words are runs of letters/digits; hyphens and spaces between them are equivalent
+WORD_PATTERN = re.compile(r"\w+")
+
+# Sentence and clause punctuation between two words: a term never spans it
+BOUNDARY_PATTERN = re.compile(r"[.,;:!?।()\[\]\"]")
+
+# Key marking the end of a term inside the trie
+_END = ""
+
+
+# Precompiled, case-insensitive glossary index.
+# Terms are stored in a trie of lowercased words, so scanning an utterance
+# costs O(words x longest term length) no matter how many terms there are.
+class Glossary:
+    def __init__(self, terms=()):
+        self._root = {}
+        self.size = 0
+        self.max_words = 0
+        for term in terms:
+            self.add(term)
+
+    # Function to build a glossary from a file with one term per line ('#' starts a comment)
+    @classmethod
+    def from_file(cls, path):
+        return cls().load(path)
+
+    # Function to add the terms listed in a file to this glossary
+    def load(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                term = line.split("#", 1)[0].strip()
+                if term:
+                    self.add(term)
+        return self
+
+    def add(self, term):
+        words = [word.lower() for word in WORD_PATTERN.findall(term)]
+        if not words:
+            return
+        node = self._root
+        for word in words:
+            node = node.setdefault(word, {})
+        if _END not in node:
+            node[_END] = True
+            self.size += 1
+            self.max_words = max(self.max_words, len(words))
+
+    def __len__(self):
+        return self.size
+
+    # Return True if the whole word/phrase is a glossary term (punctuation is ignored)
+    def contains(self, text):
+        node = self._root
+        words = WORD_PATTERN.findall(text)
+        if not words:
+            return False
+        for word in words:
+            node = node.get(word.lower())
+            if node is None:
+                return False
+        return _END in node
+
+    # Return (start, end) character spans of the longest non-overlapping terms, left to right.
+    # A term may not run across sentence or clause punctuation ("signal. System").
+    def find(self, text):
+        tokens = [(match.group(0).lower(), match.start(), match.end()) for match in WORD_PATTERN.finditer(text)]
+        # breaks[j]: punctuation separates token j from the one before it
+        breaks = [False] + [BOUNDARY_PATTERN.search(text, tokens[j - 1][2], tokens[j][1]) is not None
+                            for j in range(1, len(tokens))]
+        spans = []
+        i = 0
+        while i < len(tokens):
+            node = self._root
+            match_end = None
+            j = i
+            while j < len(tokens):
+                if j > i and breaks[j]:
+                    break
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    match_end = j
+            if match_end is None:
+                i += 1
+            else:
+                spans.append((tokens[i][1], tokens[match_end - 1][2]))
+                i = match_end
+        return spans
+
+
+# Function to replace glossary terms with placeholders.
+# Returns the protected text and the original terms in placeholder order.
+def protect_terms(text, glossary):
+    parts = []
+    terms = []
+    position = 0
+    for start, end in glossary.find(text):
+        parts.append(text[position:start])
+        parts.append(PLACEHOLDER.format(len(terms)))
+        terms.append(text[start:end])
+        position = end
+    parts.append(text[position:])
+    return "".join(parts), terms
+
+
+# Function to put the original terms back. Returns None if a placeholder was lost in translation.
+def restore_terms(translated_text, terms):
+    found = set()
+
+    def replace(match):
+        index = int(match.group(1))
+        if index >= len(terms):
+            return match.group(0)
+        found.add(index)
+        return terms[index]
+
+    restored = PLACEHOLDER_PATTERN.sub(replace, translated_text)
+    if len(found) != len(terms):
+        return None
+    return restored
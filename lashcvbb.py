@@ -1,118 +1,229 @@
 import tkinter as tk
-from tkinter import ttk
 import speech_recognition as sr
-from transformers import MarianMTModel, MarianTokenizer
-from docx import Document
-# import smtplib8
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMETex
-from email.mime.application import MIMEApplication
+import threading
+from model_pool import model_pool
+from batch_translator import batch_translator
+from transcript_writer import TranscriptJournal
+from pipeline import Pipeline, Stage, DROP_OLDEST
+from streaming import StreamingTranscriber
+from display import SubtitleDisplay
+from mail_dispatcher import MailDispatcher
+from asr_backends import ASRRouter, GoogleBackend, VoskBackend
+from retranslation import TranscriptRetranslator
 
 # Initialize the speech recognizer
 recognizer = sr.Recognizer()
 
-# Hindi language model setup for English to Hindi translation
+# Speech recognition backends: Google first, then an offline model when the network drops.
+# Set offline_asr_model to a Vosk model directory to keep recognizing without Wi-Fi.
+offline_asr_model = None
+asr_backends = [GoogleBackend(recognizer)]
+if offline_asr_model:
+    asr_backends.append(VoskBackend(offline_asr_model))
+asr = ASRRouter(asr_backends)
+
+# Hindi language model setup for English to Hindi translation (loaded in the background at startup)
 language_model_name = 'Helsinki-NLP/opus-mt-en-hi'
-tokenizer = MarianTokenizer.from_pretrained(language_model_name)
-model = MarianMTModel.from_pretrained(language_model_name)
 
-# Initialize Word document
-doc = Document()
-doc.add_heading('Real-time Translated Subtitles', 0)
+# Transcript journal; the Word document is written at checkpoints and at session end
+transcript = TranscriptJournal('translated_subtitles.jsonl', 'translated_subtitles.docx')
 
 # Function to save translated text to a Word document
-def save_to_word(translated_text):
-    doc.add_paragraph(translated_text)
-    doc.save('translated_subtitles.docx')
+def save_to_word(translated_text, source_text=None):
+    transcript.append(translated_text, source=source_text)
     print("Saved to document.")
 
-# Function to translate text from English to Hindi
+# Decoding profile per output (see decoding.py): the live subtitles decode greedily with a length cap,
+# the transcript uses beam search. None keeps the model's own generate() settings.
+decoding_profiles = {"subtitles": "live", "transcript": "transcript"}
+
+# Once the live stream has been quiet for a while, and again at end_session, the transcript is
+# re-translated with beam search in a low-priority background process and the document replaced
+retranslate_transcripts = True
+retranslator = TranscriptRetranslator(lambda source, target: [language_model_name],
+                                      profile=decoding_profiles["transcript"])
+retranslator.add(transcript, source_language="English", language="Hindi")
+if retranslate_transcripts:
+    retranslator.start()
+
+# Function to translate text from English to Hindi (with the subtitles' decoding profile)
 def translate(text):
-    inputs = tokenizer(text, return_tensors="pt", padding=True)
-    translated = model.generate(**inputs)
-    translated_text = tokenizer.decode(translated[0], skip_special_tokens=True)
-    return translated_text
+    retranslator.notify()  # live work first: a running re-translation pass pauses
+    # Waits for the warm-up load if it hasn't finished yet
+    tokenizer, model = model_pool.get(language_model_name)
+    return batch_translator.translate(text, language_model_name, tokenizer, model, decoding_profiles["subtitles"])
+
+# Function to load the model off the Tk thread and report when it is ready
+def warm_up_model():
+    model_pool.get(language_model_name)
+    subtitle_display.push("अनुवाद मॉडल तैयार है।", target="status")
+
+# Function to show a subtitle in the GUI
+def show_subtitle(text):
+    subtitle_display.push(text)
+
+# Pipeline stages: capture -> ASR -> MT -> display and persistence.
+# Each stage has its own worker thread and bounded queue, so capture never waits on slow work.
+stop_listening = threading.Event()
+
+def recognize_item(item):
+    try:
+        # Recognize the speech (Google, or the offline backend if Google is unreachable)
+        item["text"] = asr.recognize(item["audio"], language=item["language_code"])
+    except sr.UnknownValueError:
+        print("Sorry, I did not understand that.")
+        show_subtitle("क्षमा करें, समझ में नहीं आया।")
+        return None
+    except sr.RequestError as e:
+        print(f"Could not request results; {e}")
+        show_subtitle(f"त्रुटि: {e}")
+        return None
+    print(f"Recognized (English): {item['text']}")
+    if item["text"].lower() == "exit":
+        print("Exiting...")
+        stop_listening.set()
+    return item
+
+def translate_item(item):
+    item["translated"] = translate(item["text"])
+    print(f"Translated: {item['translated']}")
+    return item
+
+def display_item(item):
+    show_subtitle(item["translated"])
+
+def persist_item(item):
+    # Save the live translation; the re-translation pass replaces it in the document later
+    save_to_word(item["translated"], item["text"])
+
+asr_stage = Stage("asr", recognize_item, maxsize=4, drop_policy=DROP_OLDEST)
+mt_stage = Stage("mt", translate_item, maxsize=4)
+display_stage = Stage("display", display_item, maxsize=1, drop_policy=DROP_OLDEST)
+persist_stage = Stage("persist", persist_item, maxsize=256)
+asr_stage.then(mt_stage)
+mt_stage.then(display_stage, persist_stage)
+pipeline = Pipeline(asr_stage, mt_stage, display_stage, persist_stage)
+
+# Streaming mode: partial subtitles on short audio windows instead of waiting for the whole phrase.
+# A higher stability shows fewer revisions but adds latency.
+streaming_mode = False
+streaming_settings = {"partial_interval": 0.5, "pause_seconds": 0.6, "stability": 2}
+
+def recognize_streamed(audio):
+    return asr.recognize(audio, language='en-IN')
+
+# Function called when a streamed segment is complete
+def on_final_segment(text, translated_text):
+    print(f"Recognized: {text}")
+    print(f"Translated: {translated_text}")
+    item = {"text": text, "translated": translated_text}
+    display_stage.put(item)
+    persist_stage.put(item)
+    if text.lower() == "exit":
+        print("Exiting...")
+        stop_listening.set()
+
+def listen_streaming(source):
+    transcriber = StreamingTranscriber(recognize_streamed, translate, show_subtitle, on_final_segment,
+                                       energy_threshold=recognizer.energy_threshold, **streaming_settings)
+    transcriber.run(source, stop_listening)
+
+# Ring buffer capture: a 20 ms frame VAD with a noise floor that keeps adapting, instead of recognizer.listen()
+ring_capture = False
+
+# Function to capture utterances with the ring buffer engine and hand them to the pipeline
+def listen_ring(source):
+    from capture import CaptureEngine  # NumPy is only imported when ring capture is used
 
-# Function to continuously listen for audio input
+    def on_segment(segment):
+        # segment.audio shares the ring's memory; it is recognized long before the ring wraps
+        asr_stage.put({"audio": segment.audio, "language_code": 'en-IN'})
+    CaptureEngine(on_segment).run(source, stop_listening)
+
+# Function to capture whole phrases (up to 15 seconds) and hand them to the pipeline
+def listen_phrases(source):
+    while not stop_listening.is_set():
+        try:
+            print("Listening...")
+            audio = recognizer.listen(source, timeout=15, phrase_time_limit=15)
+        except sr.WaitTimeoutError:
+            print("No audio input detected. Retrying...")
+            continue
+        except KeyboardInterrupt:
+            print("Process interrupted by user.")
+            break
+        asr_stage.put({"audio": audio, "language_code": 'en-IN'})
+
+# Function to continuously capture audio and hand it to the pipeline
 def continuous_listen():
+    pipeline.start()
     with sr.Microphone() as source:
         recognizer.adjust_for_ambient_noise(source)
-        while True:
-            try:
-                print("Listening...")
-                audio = recognizer.listen(source, timeout=15, phrase_time_limit=15)
-                
-                text = recognizer.recognize_google(audio, language='en-IN')  # Recognize English speech
-                print(f"Recognized (English): {text}")
-
-                # Translate the recognized English text to Hindi
-                translated_text = translate(text)
-                print(f"Translated: {translated_text}")
-
-                # Update the subtitle label in the GUI
-                subtitle_label.config(text=translated_text)
-                root.update_idletasks()
-
-                # Save the translated text to the Word document
-                save_to_word(translated_text)
-
-                if text.lower() == "exit":
-                    print("Exiting...")
-                    break
-
-            except sr.UnknownValueError:
-                print("Sorry, I did not understand that.")
-                subtitle_label.config(text="क्षमा करें, समझ में नहीं आया।")
-                root.update_idletasks()
-
-            except sr.RequestError as e:
-                print(f"Could not request results; {e}")
-                subtitle_label.config(text=f"त्रुटि: {e}")
-                root.update_idletasks()
-
-            except KeyboardInterrupt:
-                print("Process interrupted by user.")
-                break
-
-# Function to send email with the translated document
-def send_email(recipients, document_path):
-    sender_email = "youremail@example.com"
-    sender_password = "yourpassword"
+        if streaming_mode:
+            listen_streaming(source)
+        elif ring_capture:
+            listen_ring(source)
+        else:
+            listen_phrases(source)
+    pipeline.stop()
+    print(f"Pipeline stats: {pipeline.stats()}")
+    print(f"Batch translator (per batch size): {batch_translator.stats()}")
+    print(f"ASR backends: {asr.stats()}")
 
-    for recipient_email in recipients:
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = "Translated Subtitles Document"
+# Mail settings; one authenticated connection is reused for many recipients
+sender_email = "youremail@example.com"
+sender_password = "yourpassword"
+mail_dispatcher = MailDispatcher('smtp.gmail.com', 587, sender_email, sender_password)
 
-        body = "निम्नलिखित दस्तावेज़ इस सत्र के अनुवादित सबटाइटल से संबंधित है।"
-        msg.attach(MIMEText(body, 'plain'))
+# Function to report email delivery progress
+def report_email_progress(sent, failed, total, recipient, error):
+    if error is None:
+        print(f"Email sent to {recipient}! ({sent + failed}/{total})")
+    else:
+        print(f"Failed to send email to {recipient}: {error} ({sent + failed}/{total})")
 
-        with open(document_path, 'rb') as file:
-            part = MIMEApplication(file.read(), Name='translated_subtitles.docx')
-            part['Content-Disposition'] = 'attachment; filename="translated_subtitles.docx"'
-            msg.attach(part)
+# Function called once every recipient has been handled
+def report_email_done(sent, failed):
+    print(f"Session ended and document sent to {sent} students ({failed} failed).")
 
-        try:
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, recipient_email, msg.as_string())
-            server.quit()
-            print(f"Email sent to {recipient_email}!")
-        except Exception as e:
-            print(f"Failed to send email to {recipient_email}: {e}")
+# Function to send email with the translated document (delivery runs in the background)
+def send_email(recipients, document_path):
+    body = "निम्नलिखित दस्तावेज़ इस सत्र के अनुवादित सबटाइटल से संबंधित है।"
+    return mail_dispatcher.send(recipients, document_path, "Translated Subtitles Document", body,
+                                on_progress=report_email_progress, on_done=report_email_done)
+
+# Capture runs in its own worker so the Tk mainloop stays responsive
+listener = threading.Thread(target=continuous_listen, daemon=True)
+session_ended = threading.Event()
 
 # Function to start listening
 def start_listening():
-    continuous_listen()
+    listener.start()
+
+# Function to stop capture and wait until every queued utterance has been saved
+def stop_capture():
+    stop_listening.set()
+    if listener.is_alive():
+        listener.join()  # continuous_listen drains the pipeline before it returns
+
+# Function to close the transcript once capture has stopped, replace it with its re-translation, then email it
+def deliver_transcript(recipients):
+    stop_capture()
+    save_to_word("Session ended.")
+    transcript.close()
+    if retranslate_transcripts:
+        retranslator.finish()
+    send_email(recipients, 'translated_subtitles.docx')
 
 # Function to end session and send email
 def end_session():
-    save_to_word("Session ended.")
+    if session_ended.is_set():
+        return
+    session_ended.set()
     recipients = ["student1@example.com", "student2@example.com"]  # Add more recipients
-    send_email(recipients, 'translated_subtitles.docx')
-    print("Session ended and document sent to all students.")
+    # Draining the pipeline and the re-translation pass run in the background so the window stays responsive
+    threading.Thread(target=deliver_transcript, args=(recipients,), daemon=True).start()
+    print("Session ending; saving the last subtitles and re-translating the transcript before sending it...")
 
 # GUI setup
 root = tk.Tk()
@@ -124,7 +235,26 @@ root.attributes('-topmost', True)
 subtitle_label = tk.Label(root, text="सबटाइटल यहां दिखाई देंगे...", font=("Helvetica", 20), wraplength=700, justify="center")
 subtitle_label.pack(side='bottom', pady=10)
 
+# Pipeline threads push subtitles here; the Tk thread renders the latest one per tick
+subtitle_display = SubtitleDisplay(root, subtitle_label)
+
+# Status line; the default model loads in the background so the window shows up right away
+status_label = tk.Label(root, text="अनुवाद मॉडल लोड हो रहा है...", font=("Helvetica", 10), fg="gray")
+status_label.pack(side='bottom')
+subtitle_display.add_label("status", status_label)
+threading.Thread(target=warm_up_model, daemon=True).start()
+
 # Start listening after 1 second
 root.after(1000, start_listening)
+# Function called when the window is closed: save every queued subtitle and write the document
+# (as End Session does, without emailing it); a paused re-translation pass must not outlive the session
+def on_close():
+    root.withdraw()  # draining the pipeline can take a moment
+    stop_capture()
+    transcript.close()
+    retranslator.close()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
 root.mainloop()
 
@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+import time
+
+# smtplib and email.mime are imported where they are used, so the subtitle
+# apps don't pay for them at startup; mail is only sent at session end.
+
+# Defaults for delivery
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+
+
+# Sends one document (or a few, e.g. one per language) to many recipients in the background.
+# Each attachment is read and base64-encoded once, and each worker thread keeps
+# one authenticated SMTP connection open for all the recipients it handles.
+#
+# To try it locally without a real mail server:
+#     python -m aiosmtpd -n -l localhost:8025
+#     MailDispatcher("localhost", 8025, "me@example.com", use_tls=False)
+# tests/test_mail_dispatcher.py runs it against a small stub server.
+class MailDispatcher:
+    def __init__(self, host, port, sender, password=None, use_tls=True, pool_size=DEFAULT_POOL_SIZE,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_seconds=DEFAULT_BACKOFF_SECONDS, timeout=30):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+
+    # Start delivery on background threads and return the thread that waits for it.
+    # on_progress(sent, failed, total, recipient, error) is called after each recipient;
+    # on_done(sent, failed) once everything is finished.
+    # document_path may be a single path or a list of paths.
+    def send(self, recipients, document_path, subject, body, on_progress=None, on_done=None):
+        paths = [document_path] if isinstance(document_path, str) else list(document_path)
+        attachments = [self._build_attachment(path) for path in paths]
+        thread = threading.Thread(
+            target=self._deliver_all,
+            args=(list(recipients), attachments, subject, body, on_progress, on_done),
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _build_attachment(self, document_path):
+        from email.mime.application import MIMEApplication
+        filename = os.path.basename(document_path)
+        with open(document_path, "rb") as file:
+            part = MIMEApplication(file.read(), Name=filename)
+        part["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return part
+
+    def _build_message(self, recipient, attachments, subject, body):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        msg = MIMEMultipart()
+        msg["From"] = self.sender
+        msg["To"] = recipient
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+        # The same, already encoded parts are shared by every message
+        for attachment in attachments:
+            msg.attach(attachment)
+        return msg.as_string()
+
+    def _deliver_all(self, recipients, attachments, subject, body, on_progress, on_done):
+        pending = queue.Queue()
+        for recipient in recipients:
+            pending.put(recipient)
+        progress = {"sent": 0, "failed": 0}
+        lock = threading.Lock()
+
+        def report(recipient, error):
+            with lock:
+                progress["failed" if error else "sent"] += 1
+                sent, failed = progress["sent"], progress["failed"]
+            if on_progress is not None:
+                on_progress(sent, failed, len(recipients), recipient, error)
+
+        workers = [
+            threading.Thread(target=self._worker, args=(pending, attachments, subject, body, report), daemon=True)
+            for _ in range(max(1, min(self.pool_size, len(recipients))))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if on_done is not None:
+            on_done(progress["sent"], progress["failed"])
+
+    def _worker(self, pending, attachments, subject, body, report):
+        import smtplib
+        server = None
+        try:
+            while True:
+                try:
+                    recipient = pending.get_nowait()
+                except queue.Empty:
+                    return
+                message = self._build_message(recipient, attachments, subject, body)
+                error = None
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        if server is None:
+                            server = self._connect()
+                        server.sendmail(self.sender, recipient, message)
+                        error = None
+                        break
+                    # smtplib's exceptions are OSErrors too, so the specific ones must come first
+                    except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                        # Connection problem: drop it and reconnect on the next attempt
+                        error = e
+                        server = self._close(server)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        # Retrying won't help a refused address; a temporary (4xx) refusal may pass later
+                        error = e
+                        if all(code >= 500 for code, _ in e.recipients.values()):
+                            break
+                    except smtplib.SMTPResponseException as e:
+                        error = e
+                        if e.smtp_code >= 500:
+                            break  # permanent (e.g. message rejected, bad credentials)
+                        # 4xx is temporary: retry on the same connection
+                    except (smtplib.SMTPException, OSError) as e:
+                        error = e
+                        server = self._close(server)
+                    if attempt < self.max_retries:
+                        time.sleep(self.backoff_seconds * (2 ** attempt))
+                report(recipient, error)
+        finally:
+            self._close(server)
+
+    def _connect(self):
+        import smtplib
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.password:
+            server.login(self.sender, self.password)
+        return server
+
+    def _close(self, server):
+        import smtplib
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        return None
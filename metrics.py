@@ -0,0 +1,120 @@
+import math
+import os
+import threading
+from collections import Counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Function to return the pct-th percentile (0-100) of a list of numbers
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _ngrams(words, n):
+    return Counter(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+
+
+# Function to compute corpus BLEU (0-100) with whitespace tokens, one reference per sentence
+def corpus_bleu(hypotheses, references, max_n=4):
+    matches = [0] * max_n
+    totals = [0] * max_n
+    hyp_length = ref_length = 0
+    for hypothesis, reference in zip(hypotheses, references):
+        hyp_words = hypothesis.split()
+        ref_words = reference.split()
+        hyp_length += len(hyp_words)
+        ref_length += len(ref_words)
+        for n in range(1, max_n + 1):
+            hyp_counts = _ngrams(hyp_words, n)
+            ref_counts = _ngrams(ref_words, n)
+            matches[n - 1] += sum(min(count, ref_counts[gram]) for gram, count in hyp_counts.items())
+            totals[n - 1] += max(0, len(hyp_words) - n + 1)
+    if hyp_length == 0 or 0 in matches:
+        return 0.0
+    log_precision = sum(math.log(matches[i] / totals[i]) for i in range(max_n)) / max_n
+    brevity = 1.0 if hyp_length > ref_length else math.exp(1 - ref_length / hyp_length)
+    return 100 * brevity * math.exp(log_precision)
+
+
+# Function to return the current resident memory of this process in MB (None if unknown)
+def current_rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# Function to return the peak resident memory of this process in MB (None if unknown)
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+# Keeps the most recent latency samples (in seconds) and summarizes them
+class LatencyStats:
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self.samples = []
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.samples.append(seconds)
+            if len(self.samples) > self.max_samples:
+                del self.samples[: len(self.samples) - self.max_samples]
+
+    # Sample counts per latency bucket; bucket_ms are the upper bounds in milliseconds
+    def histogram(self, bucket_ms=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)):
+        with self._lock:
+            samples = list(self.samples)
+        counts = {f"<={bound}ms": 0 for bound in bucket_ms}
+        counts[f">{bucket_ms[-1]}ms"] = 0
+        for seconds in samples:
+            milliseconds = seconds * 1000
+            for bound in bucket_ms:
+                if milliseconds <= bound:
+                    counts[f"<={bound}ms"] += 1
+                    break
+            else:
+                counts[f">{bucket_ms[-1]}ms"] += 1
+        return counts
+
+    # Summary in milliseconds
+    def summary(self):
+        with self._lock:
+            samples = list(self.samples)
+            count, total = self.count, self.total
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+        }
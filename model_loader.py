@@ -0,0 +1,119 @@
+import itertools
+import json
+import os
+import queue
+import threading
+
+from model_pool import model_pool
+
+# File where per-model usage counts are kept between sessions
+USAGE_FILE = "model_usage.json"
+
+# Request priorities: user-driven switches always run before prefetching
+SWITCH_PRIORITY = 0
+PREFETCH_PRIORITY = 1
+
+
+# Loads models on a background thread and swaps the active model atomically.
+# The previously active model keeps serving translate() until the new one is ready.
+class BackgroundModelLoader:
+    def __init__(self, pool=model_pool, usage_file=USAGE_FILE):
+        self.pool = pool
+        self.usage_file = usage_file
+        self.usage = self._read_usage()
+        self._active = None  # (model_name, tokenizer, model), replaced as a whole
+        self._wanted = None  # model name of the latest switch request
+        self._ready = threading.Event()  # set once any model is active
+        self._lock = threading.Lock()
+        self._requests = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # Return (model_name, tokenizer, model) for the active model, or None
+    def current(self):
+        return self._active
+
+    # Wait until a model is active (e.g. while the startup model warms up); returns current()
+    def wait_until_ready(self, timeout=None):
+        self._ready.wait(timeout)
+        return self._active
+
+    # Ask the background thread to load a model; on_ready(model_name) is called once it is active
+    def switch(self, model_name, on_ready=None):
+        with self._lock:
+            self._wanted = model_name
+        self._count_usage(model_name)
+        self._requests.put((SWITCH_PRIORITY, next(self._counter), model_name, on_ready))
+
+    # Load the startup model in the background; unlike switch() it isn't counted as a user choice
+    def warm_up(self, model_name, on_ready=None):
+        with self._lock:
+            self._wanted = model_name
+        self._requests.put((SWITCH_PRIORITY, next(self._counter), model_name, on_ready))
+
+    # Warm up models in the background, most used first, until the pool budget is full.
+    # Without names, every model registered with the pool is a candidate.
+    def prefetch(self, model_names=None):
+        if model_names is None:
+            model_names = self.pool.known_models
+        ordered = sorted(set(model_names), key=lambda name: self.usage.get(name, 0), reverse=True)
+        for model_name in ordered:
+            self._requests.put((PREFETCH_PRIORITY, next(self._counter), model_name, None))
+
+    def _run(self):
+        while True:
+            priority, _, model_name, on_ready = self._requests.get()
+            try:
+                if priority == PREFETCH_PRIORITY:
+                    self._prefetch_one(model_name)
+                    continue
+                with self._lock:
+                    stale = model_name != self._wanted
+                if stale:
+                    # A newer switch request superseded this one
+                    continue
+                tokenizer, model = self.pool.get(model_name)
+                with self._lock:
+                    stale = model_name != self._wanted
+                if not stale:
+                    self._activate(model_name, tokenizer, model)
+                    if on_ready is not None:
+                        on_ready(model_name)
+            except Exception as e:
+                print(f"Failed to load {model_name}: {e}")
+
+    def _prefetch_one(self, model_name):
+        # Prefetching never evicts warm models, so stop once the budget is full
+        if not self.pool.contains(model_name) and self.pool.has_room():
+            self.pool.get(model_name)
+
+    def _activate(self, model_name, tokenizer, model):
+        # A single reference assignment, so readers never see a mixed pair
+        self._active = (model_name, tokenizer, model)
+        self._ready.set()
+        print(f"Active model: {model_name}")
+
+    def _count_usage(self, model_name):
+        with self._lock:
+            self.usage[model_name] = self.usage.get(model_name, 0) + 1
+            usage = dict(self.usage)
+        try:
+            with open(self.usage_file, "w", encoding="utf-8") as f:
+                json.dump(usage, f, indent=2)
+        except OSError as e:
+            print(f"Could not save model usage: {e}")
+
+    def _read_usage(self):
+        if not os.path.exists(self.usage_file):
+            return {}
+        try:
+            with open(self.usage_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read model usage: {e}")
+            return {}
+
+
+# Shared loader used by all subtitle scripts
+model_loader = BackgroundModelLoader()
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# torch and transformers take seconds to import, so they are only imported
+# on first use (normally on the loader thread, after the window is up).
+
+# Default memory budget for warm models (in megabytes). Each opus-mt model is
+# roughly 300 MB in fp32, so the default keeps about four pairs warm.
+DEFAULT_BUDGET_MB = int(os.environ.get("SUBTITLE_MODEL_POOL_MB", "1200"))
+
+# Set SUBTITLE_QUANTIZE=1 to run every model with dynamic int8 Linear layers (CPU only)
+DEFAULT_QUANTIZE = os.environ.get("SUBTITLE_QUANTIZE", "0") == "1"
+
+
+# Function to set torch's intra-op and inter-op thread counts.
+# Inter-op threads can only be set before torch runs any parallel work.
+def configure_torch_threads(intra_op=None, inter_op=None):
+    if not intra_op and not inter_op:
+        return
+    import torch
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError as e:
+            print(f"Could not set inter-op threads: {e}")
+
+
+# Thread counts can be set from the environment, e.g. SUBTITLE_TORCH_THREADS=4
+configure_torch_threads(
+    int(os.environ.get("SUBTITLE_TORCH_THREADS", "0")),
+    int(os.environ.get("SUBTITLE_TORCH_INTEROP_THREADS", "0")),
+)
+
+
+# Function to replace a model's Linear layers with dynamic int8 versions
+def quantize_model(model):
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _tensor_bytes(value):
+    import torch
+    if torch.is_tensor(value):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        # Quantized Linear layers keep their packed (weight, bias) as a tuple
+        return sum(_tensor_bytes(item) for item in value)
+    return 0
+
+
+# Function to estimate how many bytes a loaded model keeps in memory
+def model_size_bytes(model):
+    return sum(_tensor_bytes(value) for value in model.state_dict().values())
+
+
+# Shared registry of warm tokenizer+model pairs, evicted LRU by bytes
+class ModelPool:
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, quantize=DEFAULT_QUANTIZE):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.quantize = quantize
+        self.known_models = set()  # every model the scripts may ask for (see register())
+        self._entries = OrderedDict()  # model_name -> (tokenizer, model, size)
+        self._used_bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # model_name -> threading.Event for in-flight loads
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    # Register the model names from one or more language tables; stats() lists the ones not loaded yet
+    def register(self, *tables):
+        for table in tables:
+            self.known_models.update(table.values())
+
+    # Return (tokenizer, model) for a model name, loading it on a miss
+    def get(self, model_name):
+        while True:
+            with self._lock:
+                entry = self._entries.get(model_name)
+                if entry is not None:
+                    self._entries.move_to_end(model_name)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                pending = self._loading.get(model_name)
+                if pending is None:
+                    # This thread loads the model; others wait on the event
+                    self.misses += 1
+                    pending = self._loading[model_name] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            start = time.perf_counter()
+            tokenizer, model = self._load(model_name)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.load_seconds += elapsed
+                self._insert(model_name, tokenizer, model)
+            print(f"Loaded {model_name} in {elapsed:.2f}s")
+            return tokenizer, model
+        finally:
+            with self._lock:
+                self._loading.pop(model_name).set()
+
+    # Add an already loaded pair (e.g. one a parent process shared with this one)
+    def adopt(self, model_name, tokenizer, model):
+        with self._lock:
+            if model_name not in self._entries:
+                self._insert(model_name, tokenizer, model)
+
+    # Return True if the model is already warm in the pool
+    def contains(self, model_name):
+        with self._lock:
+            return model_name in self._entries
+
+    # Return True if another model of the largest warm size fits without evicting
+    def has_room(self):
+        with self._lock:
+            if not self._entries:
+                return True
+            largest = max(entry[2] for entry in self._entries.values())
+            return self._used_bytes + largest <= self.budget_bytes
+
+    # Drop every warm model
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used_bytes = 0
+
+    # Snapshot of the pool counters
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+                "warm_models": list(self._entries.keys()),
+                "cold_models": sorted(self.known_models.difference(self._entries)),
+                "used_mb": round(self._used_bytes / (1024 * 1024), 1),
+                "budget_mb": round(self.budget_bytes / (1024 * 1024), 1),
+                "quantized": self.quantize,
+            }
+
+    def _load(self, model_name):
+        from transformers import MarianMTModel, MarianTokenizer
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        model = MarianMTModel.from_pretrained(model_name)
+        model.eval()
+        if self.quantize:
+            model = quantize_model(model)
+        return tokenizer, model
+
+    # Insert a loaded pair and evict least recently used ones over budget.
+    # Must be called with the lock held.
+    def _insert(self, model_name, tokenizer, model):
+        size = model_size_bytes(model)
+        self._entries[model_name] = (tokenizer, model, size)
+        self._used_bytes += size
+        # Always keep the newest model, even if it alone exceeds the budget
+        while self._used_bytes > self.budget_bytes and len(self._entries) > 1:
+            evicted_name, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._used_bytes -= evicted_size
+            self.evictions += 1
+            print(f"Evicted {evicted_name} from the model pool")
+
+
+# Shared pool used by all subtitle scripts
+model_pool = ModelPool()
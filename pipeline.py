@@ -0,0 +1,171 @@
+import queue
+import threading
+import time
+
+from metrics import LatencyStats
+
+# What a stage does when its input queue is full
+BLOCK = "block"              # wait for room (backpressure onto the previous stage)
+DROP_OLDEST = "drop_oldest"  # discard the oldest queued item to make room
+DROP_NEWEST = "drop_newest"  # discard the incoming item
+
+# Sentinel telling a stage worker to exit
+_STOP = object()
+
+
+# One pipeline stage: a worker thread reading from a bounded queue.
+# handler(item) returns the item for the next stages, or None to stop it there.
+class Stage:
+    def __init__(self, name, handler, maxsize=8, drop_policy=BLOCK):
+        if drop_policy not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.name = name
+        self.handler = handler
+        self.drop_policy = drop_policy
+        self.downstream = []
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.wait_latency = LatencyStats()     # time spent queued
+        self.service_latency = LatencyStats()  # time spent in handler
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._stopped = False
+
+    # Send this stage's output to the given stages as well
+    def then(self, *stages):
+        self.downstream.extend(stages)
+        return stages[-1] if stages else self
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    # Queue the sentinel behind the items already waiting, so the worker finishes them first.
+    # A BLOCK stage waits for room; a dropping stage makes room by its own policy.
+    def stop(self):
+        self._stopped = True
+        if self._thread is None or not self._thread.is_alive():
+            return
+        if self.drop_policy == BLOCK:
+            self._queue.put(_STOP)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(_STOP)
+                return
+            except queue.Full:
+                self._discard_oldest()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # Queue an item according to the drop policy; returns False if something was dropped
+    def put(self, item):
+        if self._stopped:
+            # Nothing would ever take it off the queue
+            self.dropped += 1
+            return False
+        entry = (time.perf_counter(), item)
+        if self.drop_policy == BLOCK:
+            self._queue.put(entry)
+            return True
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            pass
+        if self.drop_policy == DROP_NEWEST:
+            self.dropped += 1
+            return False
+        while True:
+            self._discard_oldest()
+            try:
+                self._queue.put_nowait(entry)
+                return False
+            except queue.Full:
+                continue
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queue_depth": self.depth(),
+            "wait": self.wait_latency.summary(),
+            "service": self.service_latency.summary(),
+            "service_histogram": self.service_latency.histogram(),
+        }
+
+    def _discard_oldest(self):
+        try:
+            self._queue.get_nowait()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            queued_at, item = entry
+            started = time.perf_counter()
+            self.wait_latency.add(started - queued_at)
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"[{self.name}] {e}")
+                continue
+            finally:
+                self.service_latency.add(time.perf_counter() - started)
+            self.processed += 1
+            if result is not None:
+                for stage in self.downstream:
+                    stage.put(result)
+
+
+# A set of stages started and stopped together
+class Pipeline:
+    def __init__(self, *stages):
+        self.stages = list(stages)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    # Drain and stop the stages upstream first: a stage is only stopped once every stage
+    # feeding it has finished, so nothing still in flight is lost. timeout applies per stage.
+    def stop(self, timeout=None):
+        for stage in self._upstream_first():
+            stage.stop()
+            stage.join(timeout)
+
+    # Stages ordered so that each one comes after all the stages that feed it
+    def _upstream_first(self):
+        feeding = {stage: 0 for stage in self.stages}
+        for stage in self.stages:
+            for target in stage.downstream:
+                if target in feeding:
+                    feeding[target] += 1
+        ready = [stage for stage in self.stages if feeding[stage] == 0]
+        ordered = []
+        while ready:
+            stage = ready.pop(0)
+            ordered.append(stage)
+            for target in stage.downstream:
+                if target in feeding:
+                    feeding[target] -= 1
+                    if feeding[target] == 0:
+                        ready.append(target)
+        # A cycle can't be drained in order; stop whatever is left as listed
+        return ordered + [stage for stage in self.stages if stage not in ordered]
+
+    # Per-stage counters and latency histograms
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
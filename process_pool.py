@@ -0,0 +1,292 @@
+import contextlib
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import zlib
+from concurrent.futures import Future
+
+from batch_translator import cache_key
+from decoding import get_profile
+from segmenter import DEFAULT_MAX_WORDS, join_chunks, split_text
+from translation_cache import translation_cache
+
+# Sentinel telling a worker process to exit
+_STOP = None
+
+# How often the collector checks that every worker process is still alive (in seconds)
+LIVENESS_INTERVAL = 0.5
+
+# How long close() waits for workers to finish before terminating them (in seconds)
+CLOSE_TIMEOUT = 10.0
+
+
+# Function to pick the start method for worker processes. Forking a parent
+# that already runs torch threads can deadlock the child, so workers are
+# started from a clean interpreter instead.
+def _start_method():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return "forkserver"
+    return "spawn"
+
+
+# Workers are started from a fresh interpreter, which would normally import the
+# calling script again first. The subtitle scripts run their whole session at
+# import time (window, microphone), so the script is hidden while workers start;
+# everything a worker needs comes from this module.
+@contextlib.contextmanager
+def _main_script_hidden():
+    main = sys.modules.get("__main__")
+    saved = {name: main.__dict__.pop(name) for name in ("__file__",) if main is not None and name in main.__dict__}
+    spec = getattr(main, "__spec__", None)
+    if main is not None:
+        main.__spec__ = None
+    try:
+        yield
+    finally:
+        if main is not None:
+            main.__dict__.update(saved)
+            main.__spec__ = spec
+
+
+# Worker process: keeps its own warm models and translates batches of texts.
+# shared holds models the parent loaded into shared memory; the rest of preload is loaded here.
+def _worker_main(worker_id, requests, results, threads, quantize, preload, shared):
+    import torch
+    from model_pool import ModelPool
+
+    torch.set_num_threads(threads)
+    pool = ModelPool(quantize=quantize)
+    for model_name, (tokenizer, model) in shared.items():
+        pool.adopt(model_name, tokenizer, model)
+    for model_name in preload:
+        pool.get(model_name)
+
+    while True:
+        request = requests.get()
+        if request is _STOP:
+            return
+        request_id, model_name, texts, profile = request
+        try:
+            tokenizer, model = pool.get(model_name)
+            inputs = tokenizer(texts, return_tensors="pt", padding=True)
+            settings = {}
+            if profile is not None:
+                settings = profile.generate_kwargs(max(len(ids) for ids in inputs["input_ids"]))
+            with torch.no_grad():
+                translated = model.generate(**inputs, **settings)
+            results.put((request_id, tokenizer.batch_decode(translated, skip_special_tokens=True), None))
+        except Exception as e:
+            results.put((request_id, None, f"worker {worker_id}: {e}"))
+
+
+# Multi-process translation backend. Each worker process holds its own copy of
+# the models it has seen; requests are routed by model name so a language pair
+# always lands on the same worker(s) and its model stays warm there. With
+# replicas > 1 a busy pair is spread over that many workers (least loaded first).
+# If a worker dies, its pending futures fail and its pairs move to the next live worker.
+#
+# Models named in preload are loaded once in the parent and handed to their
+# workers through shared memory, so N workers don't hold N copies of the
+# weights. Quantized models can't be shared that way; each worker quantizes its own.
+# PoolTranslator puts the pool behind the batch translator's submit().
+class ProcessTranslationPool:
+    def __init__(self, workers=None, threads_per_worker=None, quantize=False, preload=(), replicas=1):
+        self.workers = workers or os.cpu_count() or 1
+        self.replicas = max(1, min(replicas, self.workers))
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        context = multiprocessing.get_context(_start_method())
+        self._results = context.Queue()
+        self._requests = [context.Queue() for _ in range(self.workers)]
+        self._futures = {}  # request id -> (future, worker id)
+        self._outstanding = [0] * self.workers
+        self._dead = set()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+        # The parent keeps the shared models for the pool's lifetime
+        self._shared = {}
+        if preload and not quantize:
+            import torch.multiprocessing  # noqa: F401 - tensors sent to workers then travel through shared memory
+            from model_pool import ModelPool
+            parent_pool = ModelPool()
+            for model_name in preload:
+                tokenizer, model = parent_pool.get(model_name)
+                model.share_memory()
+                self._shared[model_name] = (tokenizer, model)
+
+        self._processes = []
+        with _main_script_hidden():
+            for worker_id, requests in enumerate(self._requests):
+                worker_models = [name for name in preload if worker_id in self._ring(name)[:self.replicas]]
+                shared = {name: self._shared[name] for name in worker_models if name in self._shared}
+                process = context.Process(
+                    target=_worker_main,
+                    args=(worker_id, requests, self._results, threads, quantize,
+                          [name for name in worker_models if name not in shared], shared),
+                    daemon=True,
+                )
+                process.start()
+                self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    # Translate a list of texts with one model; returns a Future with the list of translations.
+    # profile is a decoding profile (name or DecodingProfile); None keeps the model's defaults.
+    def submit(self, texts, model_name, profile=None):
+        profile = get_profile(profile)
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Translation pool is closed")
+            candidates = self._candidates(model_name)
+            if not candidates:
+                raise RuntimeError("No live translation worker")
+            worker_id = min(candidates, key=lambda candidate: self._outstanding[candidate])
+            self._outstanding[worker_id] += 1
+            self._futures[request_id] = (future, worker_id)
+        self._requests[worker_id].put((request_id, model_name, list(texts), profile))
+        return future
+
+    # Translate one text and wait for the result
+    def translate(self, text, model_name):
+        return self.submit([text], model_name).result()[0]
+
+    # Stop the workers, terminating any that do not exit within timeout seconds
+    def close(self, timeout=CLOSE_TIMEOUT):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for requests in self._requests:
+            requests.put(_STOP)
+        for process in self._processes:
+            process.join(timeout)
+        for process in self._processes:
+            if process.is_alive():
+                print(f"Terminating translation worker {process.pid}")
+                process.terminate()
+                process.join(1.0)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._results.put(_STOP)
+        self._collector.join()
+        self._fail(lambda worker_id: True, "translation pool closed")
+
+    # Every worker in the order a model prefers them; stable across runs and processes, unlike hash()
+    def _ring(self, model_name):
+        first = zlib.crc32(model_name.encode("utf-8")) % self.workers
+        return [(first + offset) % self.workers for offset in range(self.workers)]
+
+    # Live workers that may serve a model
+    def _candidates(self, model_name):
+        return [worker_id for worker_id in self._ring(model_name) if self._is_live(worker_id)][:self.replicas]
+
+    def _is_live(self, worker_id):
+        return worker_id not in self._dead and self._processes[worker_id].is_alive()
+
+    def _collect(self):
+        while True:
+            try:
+                result = self._results.get(timeout=LIVENESS_INTERVAL)
+            except queue.Empty:
+                result = ()
+            if result is _STOP:
+                return
+            if result:
+                request_id, texts, error = result
+                with self._lock:
+                    entry = self._futures.pop(request_id, None)
+                    if entry is not None:
+                        self._outstanding[entry[1]] -= 1
+                if entry is None:
+                    continue
+                if error is None:
+                    entry[0].set_result(texts)
+                else:
+                    entry[0].set_exception(RuntimeError(error))
+            self._reap()
+
+    # Mark workers that exited unexpectedly as dead and fail the requests they held
+    def _reap(self):
+        with self._lock:
+            if self._closed:
+                return
+            newly_dead = {
+                worker_id for worker_id, process in enumerate(self._processes)
+                if worker_id not in self._dead and not process.is_alive()
+            }
+            self._dead |= newly_dead
+        for worker_id in newly_dead:
+            exitcode = self._processes[worker_id].exitcode
+            print(f"Translation worker {worker_id} died (exit code {exitcode})")
+        if newly_dead:
+            self._fail(lambda worker_id: worker_id in newly_dead, "translation worker died")
+
+    # Fail every pending future whose worker matches
+    def _fail(self, matches, reason):
+        with self._lock:
+            failed = [request_id for request_id, (_, worker_id) in self._futures.items() if matches(worker_id)]
+            entries = [self._futures.pop(request_id) for request_id in failed]
+            for _, worker_id in entries:
+                self._outstanding[worker_id] -= 1
+        for future, worker_id in entries:
+            future.set_exception(RuntimeError(f"worker {worker_id}: {reason}"))
+
+
+# Adapter with the batch translator's submit(), so RoutedTranslator, FanOutTranslator
+# and SubtitleServer can translate through the process pool. The workers hold
+# the models, so it also stands in for the router's model pool: get() loads
+# nothing in this process. Long texts are split into chunks and sent as one
+# batch; results are cached like the batch translator's.
+class PoolTranslator:
+    def __init__(self, pool, cache=translation_cache, max_chunk_words=DEFAULT_MAX_WORDS):
+        self.pool = pool
+        self.cache = cache
+        self.max_chunk_words = max_chunk_words
+
+    # Queue a text for translation and return a Future with the translated text
+    def submit(self, text, model_name, tokenizer=None, model=None, profile=None):
+        profile = get_profile(profile)
+        key = cache_key(model_name, profile)
+        if self.cache is not None:
+            cached = self.cache.get(key, text)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+        chunks = (split_text(text, self.max_chunk_words) if self.max_chunk_words else []) or [text]
+        combined = Future()
+
+        def on_done(future):
+            try:
+                translated = join_chunks(future.result())
+            except Exception as e:
+                combined.set_exception(e)
+                return
+            combined.set_result(translated)
+            if self.cache is not None:
+                try:
+                    self.cache.put(key, text, translated)
+                except Exception as e:
+                    print(f"Could not cache translation: {e}")
+
+        self.pool.submit(chunks, model_name, profile).add_done_callback(on_done)
+        return combined
+
+    # Translate one text and wait for the result
+    def translate(self, text, model_name, tokenizer=None, model=None, profile=None):
+        return self.submit(text, model_name, tokenizer, model, profile).result()
+
+    # Stands in for ModelPool.get(): the models live in the workers
+    def get(self, model_name):
+        return None, None
+
+    def close(self):
+        self.pool.close()
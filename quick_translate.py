@@ -0,0 +1,50 @@
+from glossary import protect_terms, restore_terms
+from translation_cache import translation_cache
+
+
+# Shared by the googletrans subtitle scripts (ss9, ss10) and the end-to-end benchmark.
+# translator is anything with translate(text, src=..., dest=...).text, e.g. googletrans.Translator.
+def translate_with_glossary(text, translator, glossary, target_lang, whole_sentence=True, cache=translation_cache):
+    """Translates while retaining non-translatable technical terms.
+
+    whole_sentence=False translates word by word (one request per word).
+    """
+    if whole_sentence:
+        # Protect glossary terms with placeholders and translate the sentence in one request
+        protected_text, terms = protect_terms(text, glossary)
+        sentence_cache_key = f"googletrans:en-{target_lang}"
+        cached_text = translated_text = cache.get(sentence_cache_key, protected_text)
+        if translated_text is None:
+            try:
+                translated_text = translator.translate(protected_text, src='en', dest=target_lang).text
+            except Exception as e:
+                print(f"Translation error for '{text}': {e}")
+                return text  # Fallback
+        restored_text = restore_terms(translated_text, terms)
+        if restored_text is not None:
+            if cached_text is None:
+                cache.put(sentence_cache_key, protected_text, translated_text)
+            return restored_text
+        print("A glossary placeholder was lost in translation; translating word by word")
+
+    word_cache_key = f"googletrans-word:en-{target_lang}"
+    words = text.split()  # Split text into words
+    translated_words = []
+    
+    for word in words:
+        # Check if the word matches any non-translatable term (case-insensitive)
+        if glossary.contains(word):
+            translated_words.append(word)  # Keep the word as-is
+        else:
+            try:
+                # Translate only if it's not in the non-translatable list
+                translated_word = cache.get(word_cache_key, word)
+                if translated_word is None:
+                    translated_word = translator.translate(word, src='en', dest=target_lang).text
+                    cache.put(word_cache_key, word, translated_word)
+                translated_words.append(translated_word)
+            except Exception as e:
+                print(f"Translation error for '{word}': {e}")
+                translated_words.append(word)  # Fallback to original word on error
+
+    return ' '.join(translated_words)  # Join words back into a sentence
@@ -0,0 +1,391 @@
+import atexit
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from decoding import TRANSCRIPT
+from segmenter import DEFAULT_MAX_WORDS, join_chunks, split_text
+from transcript_writer import read_journal, write_document
+
+# Defaults for the background re-translation pass
+DEFAULT_IDLE_SECONDS = 20        # live stream must be quiet this long before a pass starts
+DEFAULT_PARAGRAPH_GAP = 4.0      # a longer pause between segments starts a new paragraph
+DEFAULT_PARAGRAPH_WORDS = 200    # longest paragraph re-split as one piece of text
+DEFAULT_BATCH_SIZE = 32          # sentences per generate() call
+DEFAULT_FINISH_TIMEOUT = 300     # seconds end_session waits before mailing the live transcript
+DEFAULT_THREADS = max(1, (os.cpu_count() or 2) // 2)
+POLL_SECONDS = 1.0
+LOW_PRIORITY = 19                # nice value of the worker process
+# The worker's own cache. It is never shared with the live process: the worker may be
+# stopped in the middle of a write, and would then hold the database's write lock.
+CACHE_FILE = "retranslation_cache.sqlite3"
+
+
+# Function to group consecutive segments into paragraphs: same language pair and no long pause.
+# Records without a source (e.g. "Session ended.") are kept as they are.
+def plan_paragraphs(records, source_language=None, language=None, paragraph_gap=DEFAULT_PARAGRAPH_GAP,
+                    max_words=DEFAULT_PARAGRAPH_WORDS):
+    paragraphs = []
+    current = None
+    for record in records:
+        if "source" not in record:
+            paragraphs.append({"time": record.get("time"), "text": record["text"]})
+            current = None
+            continue
+        pair = (record.get("source_language", source_language), record.get("language", language))
+        words = len(record["source"].split())
+        if (current is None or current["pair"] != pair or record["time"] - current["end"] > paragraph_gap
+                or current["words"] + words > max_words):
+            current = {"time": record["time"], "end": record["time"], "pair": pair, "words": 0,
+                       "sources": [], "texts": []}
+            paragraphs.append(current)
+        current["sources"].append(record["source"])
+        current["texts"].append(record["text"])
+        current["end"] = record["time"]
+        current["words"] += words
+    return paragraphs
+
+
+# Function to translate sentences along a route of models; each distinct text is translated once per hop.
+# Sentences go in shortest first, so each micro-batch holds sentences of similar length.
+def translate_sentences(sentences, route, translator, pool, profile):
+    current = {sentence: sentence for sentence in sentences}
+    for model_name in route:
+        tokenizer, model = pool.get(model_name)
+        texts = sorted(set(current.values()), key=lambda text: len(text.split()))
+        with getattr(translator, "burst", contextlib.nullcontext)():
+            futures = {text: translator.submit(text, model_name, tokenizer, model, profile) for text in texts}
+        translated = {text: future.result() for text, future in futures.items()}
+        current = {sentence: translated[text] for sentence, text in current.items()}
+    return current
+
+
+# Function to re-translate one journal. The recognizer cuts speech wherever the speaker
+# pauses, so each paragraph's source is joined and re-split at sentence boundaries:
+# the models see whole sentences instead of the fragments the live path had to translate.
+def retranslate_journal(entry, translator, pool, profile, write_documents=True):
+    routes = {(source, target): route for source, target, route in entry["routes"]}
+    records, _ = read_journal(entry["journal"])
+    paragraphs = plan_paragraphs(records, entry.get("source_language"), entry.get("language"),
+                                 entry.get("paragraph_gap", DEFAULT_PARAGRAPH_GAP))
+    report = {"segments": len(records), "paragraphs": 0, "sentences": 0, "failed_paragraphs": 0}
+
+    pending = {}  # language pair -> paragraphs with their sentences
+    for paragraph in paragraphs:
+        if "sources" in paragraph:
+            paragraph["sentences"] = split_text(" ".join(paragraph["sources"]), entry.get("max_words", DEFAULT_MAX_WORDS))
+            pending.setdefault(paragraph["pair"], []).append(paragraph)
+
+    for pair, group in pending.items():
+        route = routes.get(pair)
+        sentences = [sentence for paragraph in group for sentence in paragraph["sentences"]]
+        try:
+            if route is None:
+                raise ValueError(f"No route from {pair[0]} to {pair[1]}")
+            translated = translate_sentences(sentences, route, translator, pool, profile)
+        except Exception as e:
+            # Those paragraphs keep their live translation
+            print(f"Re-translation failed for {pair[0]} -> {pair[1]}: {e}", file=sys.stderr)
+            report["failed_paragraphs"] += len(group)
+            continue
+        for paragraph in group:
+            paragraph["text"] = join_chunks([translated[sentence] for sentence in paragraph["sentences"]])
+        report["paragraphs"] += len(group)
+        report["sentences"] += len(sentences)
+
+    if write_documents:
+        output = []
+        for paragraph in paragraphs:
+            text = paragraph.get("text")
+            if text is None:
+                text = " ".join(paragraph["texts"])
+            output.append({"time": paragraph["time"], "text": text})
+        write_document(output, entry["document"], entry["heading"])
+    return report
+
+
+# Function to run a whole job (every journal of the session); returns a report per journal
+def run_job(job, pool, translator):
+    from decoding import get_profile
+    profile = get_profile(job["profile"])
+    start = time.perf_counter()
+    report = {"journals": {}}
+    for entry in job["journals"]:
+        report["journals"][entry["document"]] = retranslate_journal(entry, translator, pool, profile,
+                                                                    job["write_documents"])
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+# Function to drop the calling process to the lowest CPU priority. Called before torch
+# starts its threads, which inherit it: the worker only gets cores the live path leaves idle.
+def lower_priority():
+    if hasattr(os, "sched_setscheduler") and hasattr(os, "SCHED_IDLE"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+            return
+        except OSError:
+            pass
+    if hasattr(os, "nice"):
+        try:
+            os.nice(LOW_PRIORITY)
+        except OSError:
+            pass
+
+
+# Re-translates the session transcripts with beam search once the live stream is
+# idle and again at end_session, then replaces the documents. The work runs in a
+# separate low-priority process (its own models and GIL), paused whenever live
+# speech comes in, so the live translate() path never waits behind it. Idle
+# passes only fill the worker's cache; the final pass then only translates
+# what was said since, and rewrites the .docx files before they are emailed.
+#
+# route(source_language, target_language) returns the model names the session
+# uses for that pair (the scripts' own routing rules); a journal may bring its own.
+# close() (also run at exit) kills a running pass, so a paused worker never outlives the session.
+class TranscriptRetranslator:
+    def __init__(self, route, profile=TRANSCRIPT, idle_seconds=DEFAULT_IDLE_SECONDS, threads=DEFAULT_THREADS,
+                 batch_size=DEFAULT_BATCH_SIZE, paragraph_gap=DEFAULT_PARAGRAPH_GAP, cache_path=CACHE_FILE):
+        self.route = route
+        self.profile = profile
+        self.idle_seconds = idle_seconds
+        self.threads = threads
+        self.batch_size = batch_size
+        self.paragraph_gap = paragraph_gap
+        self.cache_path = os.path.abspath(cache_path)
+        self.journals = []  # (journal, route, default source language, default target language)
+        self.passes = 0
+        self.paused_seconds = 0.0
+        self.last_report = None
+        self._lock = threading.Lock()
+        self._process = None
+        self._job_path = None
+        self._paused_at = None
+        self._last_activity = time.monotonic()
+        self._covered_size = 0  # journal bytes the last idle pass saw
+        self._stop = threading.Event()
+        self._closed = False
+        self._watcher = None
+        atexit.register(self.close)
+
+    # Re-translate this journal too; the language defaults apply to records without language fields
+    def add(self, journal, source_language=None, language=None, route=None):
+        self.journals.append((journal, route or self.route, source_language, language))
+
+    # Start watching for idle periods
+    def start(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, daemon=True)
+            self._watcher.start()
+
+    # Called by the live path for every segment: a running pass is paused until the stream is idle again.
+    # Once finish() has been called nothing would resume it, so the final pass is never paused.
+    def notify(self):
+        self._last_activity = time.monotonic()
+        with self._lock:
+            if self._stop.is_set():
+                return
+            if self._process is not None and self._paused_at is None and self._signal("SIGSTOP"):
+                self._paused_at = time.monotonic()
+
+    # Final pass after the journals are closed: rewrites the documents.
+    # Returns True if they were replaced within the timeout.
+    def finish(self, timeout=DEFAULT_FINISH_TIMEOUT):
+        with self._lock:
+            self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._resume()
+        # A running idle pass still fills the cache for the final one
+        finished = self._wait(deadline)
+        if finished:
+            with self._lock:
+                self.last_report = None
+            self._launch(write_documents=True)
+            finished = self._wait(deadline)
+        if self._closed:
+            return False
+        if not finished:
+            print("Transcript re-translation timed out; sending the live transcript")
+            return False
+        report = self.last_report
+        if report is None:
+            return False
+        print(f"Transcripts re-translated in {report['seconds']}s: {report['journals']}")
+        return True
+
+    # Stop for good: a running pass (even a paused one) is killed and no new one starts.
+    # Safe to call more than once, and from any thread but the watcher.
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._lock:
+            if self._process is not None:
+                # A stopped process gets SIGCONT first so it handles the kill right away
+                self._signal("SIGCONT")
+                self._process.kill()
+                self._process.wait()
+                self._cleanup()
+
+    def stats(self):
+        return {"passes": self.passes, "paused_seconds": round(self.paused_seconds, 2), "last": self.last_report}
+
+    # Journal I/O and process start-up happen outside the lock, so notify() never waits behind them
+    def _watch(self):
+        while not self._stop.wait(POLL_SECONDS):
+            if time.monotonic() - self._last_activity < self.idle_seconds:
+                continue
+            with self._lock:
+                running = self._process is not None
+                if running:
+                    self._resume()
+                    self._collect()
+            if running:
+                continue
+            size = self._journal_size()
+            if size != self._covered_size:
+                self._covered_size = size
+                self._launch(write_documents=False)
+
+    # Start a pass; only the swap of the running process is done under the lock
+    def _launch(self, write_documents):
+        job = self._job(write_documents)
+        handle, job_path = tempfile.mkstemp(prefix="retranslation-", suffix=".json")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        # A plain child process rather than multiprocessing: spawn would re-run the
+        # calling script, and forking a process that already runs torch threads can hang
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), job_path],
+            stdout=subprocess.PIPE, creationflags=getattr(subprocess, "IDLE_PRIORITY_CLASS", 0),
+        )
+        with self._lock:
+            self._process = process
+            self._job_path = job_path
+            if self._closed:
+                process.kill()
+                process.wait()
+                self._cleanup()
+                return
+            self.passes += 1
+            # Live speech may have come in while the process started
+            if (not self._stop.is_set() and time.monotonic() - self._last_activity < self.idle_seconds
+                    and self._signal("SIGSTOP")):
+                self._paused_at = time.monotonic()
+
+    # Job description for the worker process: every journal with the routes its language pairs need
+    def _job(self, write_documents):
+        entries = []
+        for journal, route, source_language, language in self.journals:
+            if not os.path.exists(journal.journal_path):
+                continue
+            records, _ = read_journal(journal.journal_path)
+            pairs = {(record.get("source_language", source_language), record.get("language", language))
+                     for record in records if "source" in record}
+            routes = []
+            for source, target in pairs:
+                try:
+                    routes.append((source, target, route(source, target)))
+                except Exception as e:
+                    print(f"No re-translation route from {source} to {target}: {e}")
+            entries.append({"journal": os.path.abspath(journal.journal_path),
+                            "document": os.path.abspath(journal.document_path), "heading": journal.heading,
+                            "source_language": source_language, "language": language, "routes": routes,
+                            "paragraph_gap": self.paragraph_gap})
+        return {"journals": entries, "profile": self.profile, "threads": self.threads,
+                "batch_size": self.batch_size, "cache_path": self.cache_path, "write_documents": write_documents}
+
+    # Wait for the running pass, if any, to end; False if it was killed at the deadline
+    def _wait(self, deadline):
+        while True:
+            with self._lock:
+                if self._process is None or self._collect():
+                    return True
+                if time.monotonic() >= deadline:
+                    self._process.kill()
+                    self._process.wait()
+                    self._cleanup()
+                    return False
+            time.sleep(0.1)
+
+    # Must be called with the lock held; once the process has exited, stores its
+    # report in last_report (None if it failed) and returns True
+    def _collect(self):
+        if self._process.poll() is None:
+            return False
+        # The worker prints its report last, after anything the model loader printed
+        output = self._process.stdout.read().decode("utf-8").strip().splitlines()
+        status = self._process.returncode
+        self._cleanup()
+        self.last_report = None
+        if status != 0 or not output:
+            print(f"Transcript re-translation exited with status {status}")
+            return True
+        try:
+            self.last_report = json.loads(output[-1])
+        except ValueError:
+            print(f"Unexpected output from the re-translation worker: {output[-1][:200]}")
+        return True
+
+    # Must be called with the lock held
+    def _cleanup(self):
+        self._process.stdout.close()
+        self._process = None
+        self._paused_at = None
+        try:
+            os.remove(self._job_path)
+        except OSError:
+            pass
+
+    # Must be called with the lock held
+    def _resume(self):
+        if self._paused_at is not None and self._signal("SIGCONT"):
+            self.paused_seconds += time.monotonic() - self._paused_at
+            self._paused_at = None
+
+    # Must be called with the lock held; False where the signal does not exist (Windows relies on the priority class)
+    def _signal(self, signal_name):
+        number = getattr(signal, signal_name, None)
+        if number is None or self._process.poll() is not None:
+            return False
+        self._process.send_signal(number)
+        return True
+
+    def _journal_size(self):
+        size = 0
+        for journal, _, _, _ in self.journals:
+            try:
+                size += os.path.getsize(journal.journal_path)
+            except OSError:
+                pass
+        return size
+
+
+def main():
+    # Usage: python retranslation.py job.json (started by TranscriptRetranslator)
+    lower_priority()
+    with open(sys.argv[1], encoding="utf-8") as f:
+        job = json.load(f)
+    from model_pool import configure_torch_threads, model_pool
+    from batch_translator import BatchTranslator
+    from translation_cache import TranslationCache
+    configure_torch_threads(job["threads"], 1)
+    translator = BatchTranslator(max_batch_size=job["batch_size"], cache=TranslationCache(job["cache_path"]),
+                                 group_workers=1)
+    report = run_job(job, model_pool, translator)
+    print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
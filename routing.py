@@ -0,0 +1,124 @@
+import contextlib
+import re
+import time
+from collections import deque
+
+from batch_translator import batch_translator
+from metrics import LatencyStats
+from model_pool import model_pool
+
+# Language names used in the GUI -> codes used in the opus-mt model names
+LANGUAGE_CODES = {
+    "English": "en",
+    "Gujarati": "gu",
+    "French": "fr",
+    "Spanish": "es",
+    "Hindi": "hi",
+    "Telugu": "te",
+}
+
+PIVOT = "en"
+MODEL_PATTERN = re.compile(r"opus-mt-([a-z]+)-([a-z]+)$")
+
+
+# Function to read the (source, target) codes out of a model name like 'Helsinki-NLP/opus-mt-gu-en'
+def parse_pair(model_name):
+    match = MODEL_PATTERN.search(model_name)
+    if match is None:
+        return None
+    return match.group(1), match.group(2)
+
+
+# Plans translation routes over the registered models. A direct pair is used
+# when it exists; otherwise the route goes through English (e.g. gu->en->te),
+# falling back to the shortest chain of any registered pairs.
+class RoutePlanner:
+    def __init__(self, *tables):
+        self.pairs = {}  # (source code, target code) -> model name
+        for table in tables:
+            for model_name in table.values():
+                pair = parse_pair(model_name)
+                if pair is not None:
+                    self.pairs.setdefault(pair, model_name)
+
+    # List of model names to apply in order; empty when source and target are the same
+    def route(self, source, target):
+        source = LANGUAGE_CODES.get(source, source)
+        target = LANGUAGE_CODES.get(target, target)
+        if source == target:
+            return []
+        if (source, target) in self.pairs:
+            return [self.pairs[(source, target)]]
+        if (source, PIVOT) in self.pairs and (PIVOT, target) in self.pairs:
+            return [self.pairs[(source, PIVOT)], self.pairs[(PIVOT, target)]]
+        return self._shortest(source, target)
+
+    def _shortest(self, source, target):
+        previous = {source: None}
+        waiting = deque([source])
+        while waiting:
+            language = waiting.popleft()
+            if language == target:
+                break
+            for (hop_source, hop_target), model_name in self.pairs.items():
+                if hop_source == language and hop_target not in previous:
+                    previous[hop_target] = (language, model_name)
+                    waiting.append(hop_target)
+        if target not in previous:
+            raise ValueError(f"No translation route from {source} to {target}")
+        route = []
+        language = target
+        while previous[language] is not None:
+            language, model_name = previous[language]
+            route.append(model_name)
+        return route[::-1]
+
+
+# Runs planned routes through the batch translator. Hops shared by several
+# targets (usually the first hop into English) are translated once per call,
+# and every intermediate result also lands in the translation cache.
+class RoutedTranslator:
+    def __init__(self, planner, translator=batch_translator, pool=model_pool):
+        self.planner = planner
+        self.translator = translator
+        self.pool = pool
+        self._hop_latency = {}  # model name -> LatencyStats
+
+    def translate(self, text, source, target, profile=None):
+        return self.translate_many(text, source, [target], profile)[target]
+
+    # Returns {target: translated text}; all targets' hops at the same depth run concurrently.
+    # profile is the decoding profile for every hop (see decoding.py).
+    def translate_many(self, text, source, targets, profile=None):
+        routes = {target: tuple(self.planner.route(source, target)) for target in targets}
+        outputs = {(): text}  # route prefix -> text after those hops
+        depth = 1
+        while True:
+            prefixes = {route[:depth] for route in routes.values() if len(route) >= depth}
+            if not prefixes:
+                break
+            start = time.perf_counter()
+            futures = {}
+            # Hops at the same depth go into one micro-batch
+            with getattr(self.translator, "burst", contextlib.nullcontext)():
+                for prefix in prefixes:
+                    model_name = prefix[-1]
+                    tokenizer, model = self.pool.get(model_name)
+                    futures[prefix] = self.translator.submit(outputs[prefix[:-1]], model_name, tokenizer, model,
+                                                             profile)
+            for prefix, future in futures.items():
+                outputs[prefix] = future.result()
+                self._latency(prefix[-1], profile).add(time.perf_counter() - start)
+            depth += 1
+        return {target: outputs[route] for target, route in routes.items()}
+
+    # Latency per hop (model, and decoding profile if one was named), from submission until the hop's result was ready
+    def stats(self):
+        return {hop: latency.summary() for hop, latency in self._hop_latency.items()}
+
+    def _latency(self, model_name, profile):
+        hop = model_name if profile is None else f"{model_name} ({profile})"
+        latency = self._hop_latency.get(hop)
+        if latency is None:
+            latency = self._hop_latency[hop] = LatencyStats()
+        return latency
@@ -0,0 +1,61 @@
+import re
+
+# Longest chunk handed to generate() as one sequence
+DEFAULT_MAX_WORDS = 32
+
+# Sentence ends, including the Devanagari danda
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?।])\s+")
+CLAUSE_PATTERN = re.compile(r"(?<=[,;:])\s+")
+
+# Good places to break unpunctuated speech (recognizers rarely add punctuation)
+CONJUNCTIONS = {"and", "but", "so", "because", "which", "while", "then", "or", "that", "when", "where", "if"}
+
+
+# Function to split recognized text into sentence/clause chunks of at most max_words words
+def split_text(text, max_words=DEFAULT_MAX_WORDS):
+    chunks = []
+    for sentence in SENTENCE_PATTERN.split(text.strip()):
+        if not sentence:
+            continue
+        if len(sentence.split()) <= max_words:
+            chunks.append(sentence)
+            continue
+        pieces = []
+        for clause in CLAUSE_PATTERN.split(sentence):
+            pieces.extend(_split_words(clause, max_words))
+        chunks.extend(_merge(pieces, max_words))
+    return chunks
+
+
+# Function to put translated chunks back together in their original order
+def join_chunks(translations):
+    return " ".join(translation.strip() for translation in translations if translation)
+
+
+# Cut a clause that is still too long, preferably just before a conjunction
+def _split_words(text, max_words):
+    words = text.split()
+    while len(words) > max_words:
+        cut = max_words
+        for i in range(max_words, max_words // 2, -1):
+            if words[i].lower() in CONJUNCTIONS:
+                cut = i
+                break
+        yield " ".join(words[:cut])
+        words = words[cut:]
+    if words:
+        yield " ".join(words)
+
+
+# Join neighbouring short pieces again so each chunk keeps some context
+def _merge(pieces, max_words):
+    merged = []
+    current = []
+    for piece in pieces:
+        if current and len(current) + len(piece.split()) > max_words:
+            merged.append(" ".join(current))
+            current = []
+        current.extend(piece.split())
+    if current:
+        merged.append(" ".join(current))
+    return merged
@@ -1,7 +1,14 @@
 import tkinter as tk
 from googletrans import Translator
 import speech_recognition as sr
+import os
 import threading
+from display import SubtitleDisplay
+from asr_backends import ASRRouter, GoogleBackend, VoskBackend
+import time
+from glossary import Glossary
+from quick_translate import translate_with_glossary
+from subtitle_writer import SubtitleFileWriter
 
 # Translator instance
 translator = Translator()
@@ -12,33 +19,40 @@ non_translatable_words = [
     "Filter", "Modulation", "Digital Signal Processing", "Impulse Response", "signal system", "z transform"
 ]
 
+# Extra course terms, one per line (optional)
+glossary_file = "course_terms.txt"
+
+# Compiled, case-insensitive index of the non-translatable terms (built once)
+glossary = Glossary(non_translatable_words)
+if os.path.exists(glossary_file):
+    glossary.load(glossary_file)
+
 # File to save subtitles
 output_file = "optimized_subtitles.txt"
+subtitle_cue_format = None  # "srt" or "vtt" to also write timestamped cues
+
+# Buffered writer thread, so disk work stays off the recognition loop
+subtitle_writer = SubtitleFileWriter(output_file, cue_format=subtitle_cue_format)
 
 # Real-time translation function
-def translate_text_quick(text, target_lang="gu"):
-    """Translates while retaining non-translatable technical terms."""
-    words = text.split()  # Split text into words
-    translated_words = []
-    
-    for word in words:
-        # Check if the word matches any non-translatable term (case-insensitive)
-        if word.lower() in [term.lower() for term in non_translatable_words]:
-            translated_words.append(word)  # Keep the word as-is
-        else:
-            try:
-                # Translate only if it's not in the non-translatable list
-                translated_word = translator.translate(word, src='en', dest=target_lang).text
-                translated_words.append(translated_word)
-            except Exception as e:
-                print(f"Translation error for '{word}': {e}")
-                translated_words.append(word)  # Fallback to original word on error
+def translate_text_quick(text, target_lang="gu", whole_sentence=True):
+    """Translates while retaining non-translatable technical terms.
+
+    whole_sentence=False translates word by word (one request per word).
+    """
+    return translate_with_glossary(text, translator, glossary, target_lang, whole_sentence)
 
-    return ' '.join(translated_words)  # Join words back into a sentence
 
+# Set offline_asr_model to a Vosk model directory to keep recognizing without Wi-Fi
+offline_asr_model = None
 
 def listen_and_translate_continuous():
     recognizer = sr.Recognizer()
+    # Google first, then the offline model when the network drops
+    asr_backends = [GoogleBackend(recognizer)]
+    if offline_asr_model:
+        asr_backends.append(VoskBackend(offline_asr_model))
+    asr = ASRRouter(asr_backends)
     mic = sr.Microphone()
 
     with mic as source:
@@ -47,8 +61,10 @@ def listen_and_translate_continuous():
             try:
                 print("Listening...")
                 audio = recognizer.listen(source, timeout=5, phrase_time_limit=4)
+                phrase_end = time.time()
+                phrase_start = phrase_end - len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
                 print("Recognizing...")
-                recognized_text = recognizer.recognize_google(audio)
+                recognized_text = asr.recognize(audio, language="en-US")
                 print(f"Recognized: {recognized_text}")
 
                 # Translate quickly
@@ -56,9 +72,8 @@ def listen_and_translate_continuous():
                 print(f"Translated: {translated_text}")
 
                 # Update GUI and save to file
-                subtitle_label.config(text=translated_text)
-                with open(output_file, "a", encoding="utf-8") as f:
-                    f.write(f"{translated_text}\n")
+                subtitle_display.push(translated_text)
+                subtitle_writer.write(translated_text, phrase_start, phrase_end)
 
             except sr.UnknownValueError:
                 print("Could not understand speech.")
@@ -71,6 +86,11 @@ def listen_and_translate_continuous():
 def start_listening():
     threading.Thread(target=listen_and_translate_continuous, daemon=True).start()
 
+# Flush the subtitle file before closing the window
+def quit_app():
+    subtitle_writer.close()
+    root.destroy()
+
 # Tkinter GUI setup
 root = tk.Tk()
 root.title("Real-Time Speech Translation")
@@ -85,11 +105,14 @@ root.attributes('-alpha', 0.8)  # Transparency (0.0 to 1.0)
 subtitle_label = tk.Label(root, text="", font=("Helvetica", 16), fg="white", bg="black", wraplength=780, justify="center")
 subtitle_label.pack(fill=tk.BOTH, expand=True)
 
+# The listening thread pushes subtitles here; the Tk thread renders the latest one per tick
+subtitle_display = SubtitleDisplay(root, subtitle_label)
+
 # Buttons (to quit if needed)
 control_frame = tk.Frame(root, bg="black")
 control_frame.pack(fill=tk.X)
 
-quit_button = tk.Button(control_frame, text="Quit", command=root.destroy, bg="red", fg="white", font=("Helvetica", 12))
+quit_button = tk.Button(control_frame, text="Quit", command=quit_app, bg="red", fg="white", font=("Helvetica", 12))
 quit_button.pack(side=tk.RIGHT, padx=10, pady=5)
 
 # Start listening when launched
@@ -1,15 +1,31 @@
 import speech_recognition as sr
-from transformers import MarianMTModel, MarianTokenizer
+import threading
+from model_pool import model_pool
+from model_loader import model_loader
+from batch_translator import batch_translator
 import tkinter as tk
 from tkinter import ttk
-from docx import Document
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
+from transcript_writer import TranscriptJournal
+from pipeline import Pipeline, Stage, DROP_OLDEST
+from streaming import StreamingTranscriber
+from display import SubtitleDisplay
+from mail_dispatcher import MailDispatcher
+from asr_backends import ASRRouter, GoogleBackend, VoskBackend
+from fanout import FanOutTranslator
+from routing import RoutePlanner, RoutedTranslator
+from subtitle_server import SubtitleServer
+from retranslation import TranscriptRetranslator
 
 # Initialize the speech recognizer
 recognizer = sr.Recognizer()
+
+# Speech recognition backends: Google first, then an offline model when the network drops.
+# Set offline_asr_model to a Vosk model directory to keep recognizing without Wi-Fi.
+offline_asr_model = None
+asr_backends = [GoogleBackend(recognizer)]
+if offline_asr_model:
+    asr_backends.append(VoskBackend(offline_asr_model))
+asr = ASRRouter(asr_backends)
     
 # Load translation models for different languages
 language_models = {
@@ -31,153 +47,354 @@ target_language_codes = {
     "Telugu": 'Helsinki-NLP/opus-mt-en-te'
 }
 
-# Initialize Word document
-doc = Document()
-doc.add_heading('Real-time Translated Subtitles', 0)
-
-# Default source language model
+# Register both model tables with the shared model pool
+model_pool.register(language_models, target_language_codes)
+
+# Process pool mode: routed translations (other target languages, fan-out, the subtitle server) run in
+# this many worker processes, each with its own GIL and share of the cores, e.g. 4. The source model path
+# stays in this process. 0 translates everything here.
+process_pool_workers = 0
+
+# Routes between any two languages, through English when there is no direct model (e.g. gu->en->te)
+if process_pool_workers:
+    from process_pool import PoolTranslator, ProcessTranslationPool
+    pool_translator = PoolTranslator(ProcessTranslationPool(workers=process_pool_workers))
+    router = RoutedTranslator(RoutePlanner(language_models, target_language_codes),
+                              translator=pool_translator, pool=pool_translator)
+else:
+    router = RoutedTranslator(RoutePlanner(language_models, target_language_codes))
+
+# Decoding profile per output (see decoding.py): the live subtitles decode greedily with a length cap,
+# the transcripts use beam search. None keeps the models' own generate() settings.
+decoding_profiles = {"subtitles": "live", "transcript": "transcript"}
+
+# Fan-out mode: subtitles in several target languages at once for the same speech,
+# e.g. ["Hindi", "Gujarati", "Telugu"]. Each language gets its own label and transcript.
+fanout_targets = []
+fanout = FanOutTranslator(fanout_targets, router, profile=decoding_profiles["subtitles"])
+fanout_transcripts = {
+    language: TranscriptJournal(f'translated_subtitles_{language}.jsonl', f'translated_subtitles_{language}.docx')
+    for language in fanout_targets
+}
+if fanout_targets:
+    threading.Thread(target=fanout.warm_up, args=("English",), daemon=True).start()
+
+# Server mode: also broadcast subtitles to students' browsers at http://<this machine>:8765/,
+# each in the language they pick. Recognition still runs once, and each language is translated
+# once per subtitle however many students follow it. headless runs without the window.
+server_mode = False
+headless = False
+subtitle_server = SubtitleServer(router, list(target_language_codes), profile=decoding_profiles["subtitles"])
+if server_mode or headless:
+    subtitle_server.start()
+
+# Transcript journal; the Word document is written at checkpoints and at session end
+transcript = TranscriptJournal('translated_subtitles.jsonl', 'translated_subtitles.docx')
+
+# Once the live stream has been quiet for a while, and again at end_session, the transcripts are
+# re-translated in a low-priority background process: whole sentences across segment boundaries,
+# in large beam search batches. The documents are replaced before they are emailed.
+retranslate_transcripts = True
+
+# Function to list the models a transcript segment went through:
+# the source model when the target is the source language (as translate() does), else the planned route
+def transcript_route(source_language, target):
+    if target == source_language:
+        return [language_models[source_language]]
+    return router.planner.route(source_language, target)
+
+retranslator = TranscriptRetranslator(transcript_route, profile=decoding_profiles["transcript"])
+retranslator.add(transcript)
+for language_transcript in fanout_transcripts.values():
+    retranslator.add(language_transcript, route=router.planner.route)
+if retranslate_transcripts:
+    retranslator.start()
+
+# Default source language model; it warms up in the background once the window is shown
 default_language = "English"
 default_model_name = language_models[default_language]
-source_tokenizer = MarianTokenizer.from_pretrained(default_model_name)
-source_model = MarianMTModel.from_pretrained(default_model_name)
+
+# Optionally warm up every source model in the background, most used first
+prefetch_models = False
+if prefetch_models:
+    model_loader.prefetch(language_models.values())
 
 # Function to update source language model
 def update_source_model(selected_language):
-    global source_tokenizer, source_model
     model_name = language_models[selected_language]
-    source_tokenizer = MarianTokenizer.from_pretrained(model_name)
-    source_model = MarianMTModel.from_pretrained(model_name)
+    # Loads in the background; the current model keeps translating until it is ready
+    model_loader.switch(model_name, on_ready=on_source_model_ready)
+
+# Function called by the loader once the new model is active
+def on_source_model_ready(model_name):
     print(f"Source language model updated to: {model_name}")
+    subtitle_display.push(f"Translation model ready: {model_name}", target="status")
+    print(f"Model pool: {model_pool.stats()}")
 
 
 # Function to save translated text to a Word document
-def save_to_word(translated_text):
-    doc.add_paragraph(translated_text)
-    doc.save('translated_subtitles.docx')
+def save_to_word(translated_text, source_text=None, source_language=None, target=None):
+    transcript.append(translated_text, source=source_text, language=target, source_language=source_language)
 
-# Function to translate text
+# Function to translate text with the source model (and the subtitles' decoding profile)
 def translate(text):
-    global source_tokenizer, source_model
-    if source_tokenizer is None or source_model is None:
+    retranslator.notify()  # live work first: a running re-translation pass pauses
+    # Take one snapshot so a model switch can't swap the pair mid-translation
+    # While the default model is still warming up, wait for it instead of failing
+    active = model_loader.current() or model_loader.wait_until_ready(timeout=120)
+    if active is None:
         raise RuntimeError("Source language model is not initialized. Please select a source language.")
+    model_name, source_tokenizer, source_model = active
     
-    # Tokenize the input text
-    inputs = source_tokenizer(text, return_tensors="pt", padding=True)
-    
-    # Generate translated text
-    translated = source_model.generate(**inputs)
-    
-    # Decode the generated tokens to text
-    translated_text = source_tokenizer.decode(translated[0], skip_special_tokens=True)
-    return translated_text
-
-# Function to continuously listen for audio input
-import time
-
+    # Batched with segments from other streams: one padded generate() per micro-batch
+    return batch_translator.translate(text, model_name, source_tokenizer, source_model,
+                                      decoding_profiles["subtitles"])
+
+# Current dropdown selections, mirrored here so worker threads never read Tk variables
+selected_languages = {"source": "English", "target": "English"}
+
+# Function to show a subtitle in the GUI
+def show_subtitle(text):
+    subtitle_display.push(text)
+
+# Pipeline stages: capture -> ASR -> MT -> display and persistence.
+# Each stage has its own worker thread and bounded queue, so capture never waits on slow work.
+stop_listening = threading.Event()
+
+def recognize_item(item):
+    try:
+        # Recognize the speech (Google, or the offline backend if Google is unreachable)
+        item["text"] = asr.recognize(item["audio"], language=item["language_code"])
+    except sr.UnknownValueError:
+        print("Sorry, I did not understand that.")
+        show_subtitle("Sorry, I did not understand that.")
+        return None
+    except sr.RequestError as e:
+        print(f"Could not request results; {e}")
+        show_subtitle(f"Error: {e}")
+        return None
+    print(f"Recognized ({item['language']}): {item['text']}")
+    if item["text"].lower() == "exit":
+        print("Exiting...")
+        stop_listening.set()
+    return item
+
+# Function to translate text into the target language: the source model when the target is
+# the source language (as before routing existed), otherwise a planned route
+def translate_to(text, source, target):
+    if target == source:
+        return translate(text)
+    retranslator.notify()
+    # No direct model for most pairs: the planner chains them through English (e.g. gu->en->te)
+    return router.translate(text, source, target, profile=decoding_profiles["subtitles"])
+
+def translate_item(item):
+    if fanout_targets and item["target"] != item["language"]:
+        retranslator.notify()
+        # One routed call for the main target and the fan-out targets: their hops share micro-batches,
+        # so fan-out adds little on top of the main subtitle
+        item["translated"], item["translations"] = fanout.translate_with(item["text"], item["language"],
+                                                                         item["target"])
+    else:
+        item["translated"] = translate_to(item["text"], item["language"], item["target"])
+        if fanout_targets:
+            # The first hop into English is shared by all targets (and usually cached already)
+            item["translations"] = fanout.translate(item["text"], item["language"])
+    print(f"Translated: {item['translated']}")
+    return item
+
+def display_item(item):
+    show_subtitle(item["translated"])
+    subtitle_server.publish(item)
+    for language, text in item.get("translations", {}).items():
+        if text is not None:
+            subtitle_display.push(text, target=language)
+
+def persist_item(item):
+    # Save the live translation; the re-translation pass replaces it in the document later
+    save_to_word(item["translated"], item["text"], item["language"], item.get("target", item["language"]))
+    for language, text in item.get("translations", {}).items():
+        if text is not None:
+            fanout_transcripts[language].append(text, source=item["text"], language=language,
+                                                source_language=item["language"])
+
+asr_stage = Stage("asr", recognize_item, maxsize=4, drop_policy=DROP_OLDEST)
+mt_stage = Stage("mt", translate_item, maxsize=4)
+display_stage = Stage("display", display_item, maxsize=1, drop_policy=DROP_OLDEST)
+persist_stage = Stage("persist", persist_item, maxsize=256)
+asr_stage.then(mt_stage)
+mt_stage.then(display_stage, persist_stage)
+pipeline = Pipeline(asr_stage, mt_stage, display_stage, persist_stage)
+
+# Streaming mode: partial subtitles on short audio windows instead of waiting for the whole phrase.
+# A higher stability shows fewer revisions but adds latency.
+streaming_mode = False
+streaming_settings = {"partial_interval": 0.5, "pause_seconds": 0.6, "stability": 2}
+
+def recognize_streamed(audio):
+    return asr.recognize(audio, language=selected_languages["source"].lower())
+
+# Function to translate streamed text into the selected target, like the phrase path
+def translate_streamed(text):
+    return translate_to(text, selected_languages["source"], selected_languages["target"])
+
+# Function called when a streamed segment is complete
+def on_final_segment(text, translated_text):
+    print(f"Recognized: {text}")
+    print(f"Translated: {translated_text}")
+    item = {"text": text, "translated": translated_text, "language": selected_languages["source"],
+            "target": selected_languages["target"]}
+    display_stage.put(item)
+    persist_stage.put(item)
+    if text.lower() == "exit":
+        print("Exiting...")
+        stop_listening.set()
+
+def listen_streaming(source):
+    transcriber = StreamingTranscriber(recognize_streamed, translate_streamed, show_subtitle, on_final_segment,
+                                       energy_threshold=recognizer.energy_threshold, **streaming_settings)
+    transcriber.run(source, stop_listening)
+
+# Ring buffer capture: a 20 ms frame VAD with a noise floor that keeps adapting, instead of recognizer.listen()
+ring_capture = False
+
+# Function to capture utterances with the ring buffer engine and hand them to the pipeline
+def listen_ring(source):
+    from capture import CaptureEngine  # NumPy is only imported when ring capture is used
+
+    def on_segment(segment):
+        # segment.audio shares the ring's memory; it is recognized long before the ring wraps
+        asr_stage.put({"audio": segment.audio, "language": selected_languages["source"], "language_code": selected_languages["source"].lower(), "target": selected_languages["target"]})
+    CaptureEngine(on_segment).run(source, stop_listening)
+
+# Function to capture whole phrases (up to 15 seconds) and hand them to the pipeline
+def listen_phrases(source):
+    while not stop_listening.is_set():
+        try:
+            print("Listening...")
+            audio = recognizer.listen(source, timeout=15, phrase_time_limit=15)
+        except sr.WaitTimeoutError:
+            print("No audio input detected. Retrying...")
+            continue
+        except KeyboardInterrupt:
+            print("Process interrupted by user.")
+            break
+        asr_stage.put({"audio": audio, "language": selected_languages["source"], "language_code": selected_languages["source"].lower(), "target": selected_languages["target"]})
+
+# Function to continuously capture audio and hand it to the pipeline
 def continuous_listen():
+    pipeline.start()
     with sr.Microphone() as source:
         recognizer.adjust_for_ambient_noise(source)
-        while True:
-            try:
-                print("Listening...")
-                audio = recognizer.listen(source, timeout=15, phrase_time_limit=15)
-
-                source_language_code = source_language_var.get().lower()
-                print(f"Source Language: {source_language_code}")  # Debug line
-
-                text = recognizer.recognize_google(audio, language=source_language_code)
-                print(f"Recognized ({source_language_var.get()}): {text}")
-
-                # Translate the recognized text
-                translated_text = translate(text)
-                print(f"Translated: {translated_text}")
-
-                # Update the subtitle label in the GUI
-                subtitle_label.config(text=translated_text)
-                root.update_idletasks()
-
-                # Save the translated text to the Word document
-                save_to_word(translated_text)
-
-                if text.lower() == "exit":
-                    print("Exiting...")
-                    break
-
-            except sr.UnknownValueError:
-                print("Sorry, I did not understand that.")
-                subtitle_label.config(text="Sorry, I did not understand that.")
-                root.update_idletasks()
-
-            except sr.RequestError as e:
-                print(f"Could not request results; {e}")
-                subtitle_label.config(text=f"Error: {e}")
-                root.update_idletasks()
-
-            except KeyboardInterrupt:
-                print("Process interrupted by user.")
-                break
-
-            except TimeoutError:
-                print("No audio input detected. Retrying...")
-                continue  # Retry listening
-
-            except Exception as e:
-                print(f"An unexpected error occurred: {e}")
-                subtitle_label.config(text="Error occurred. Restarting...")
-                root.update_idletasks()
-                break
-
-
-# Function to send email with the translated document
+        if streaming_mode:
+            listen_streaming(source)
+        elif ring_capture:
+            listen_ring(source)
+        else:
+            listen_phrases(source)
+    pipeline.stop()
+    print(f"Pipeline stats: {pipeline.stats()}")
+    print(f"Batch translator (per batch size): {batch_translator.stats()}")
+    print(f"ASR backends: {asr.stats()}")
+    if fanout_targets:
+        print(f"Fan-out latency: {fanout.stats()}")
+    print(f"Per-hop latency: {router.stats()}")
+    if subtitle_server.running:
+        print(f"Subtitle server: {subtitle_server.stats()}")
+
+# Mail settings; one authenticated connection is reused for many recipients
+sender_email = "youremail@example.com"
+sender_password = "yourpassword"
+mail_dispatcher = MailDispatcher('smtp.gmail.com', 587, sender_email, sender_password)
+
+# Function to report email delivery progress
+def report_email_progress(sent, failed, total, recipient, error):
+    if error is None:
+        print(f"Email sent to {recipient}! ({sent + failed}/{total})")
+    else:
+        print(f"Failed to send email to {recipient}: {error} ({sent + failed}/{total})")
+
+# Function called once every recipient has been handled
+def report_email_done(sent, failed):
+    print(f"Session ended and document sent to {sent} students ({failed} failed).")
+
+# Function to send email with the translated document (delivery runs in the background)
 def send_email(recipients, document_path):
-    sender_email = "youremail@example.com"
-    sender_password = "yourpassword"
-
-    for recipient_email in recipients:
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = "Translated Subtitles Document"
+    body = "Attached is the translated subtitles document from today's session."
+    return mail_dispatcher.send(recipients, document_path, "Translated Subtitles Document", body,
+                                on_progress=report_email_progress, on_done=report_email_done)
 
-        body = "Attached is the translated subtitles document from today's session."
-        msg.attach(MIMEText(body, 'plain'))
-
-        with open(document_path, 'rb') as file:
-            part = MIMEApplication(file.read(), Name='translated_subtitles.docx')
-            part['Content-Disposition'] = 'attachment; filename="translated_subtitles.docx"'
-            msg.attach(part)
-
-        try:
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, recipient_email, msg.as_string())
-            server.quit()
-            print(f"Email sent to {recipient_email}!")
-        except Exception as e:
-            print(f"Failed to send email to {recipient_email}: {e}")
+# Capture runs in its own worker so the Tk mainloop stays responsive
+listener = threading.Thread(target=continuous_listen, daemon=True)
+session_ended = threading.Event()
 
 # Function to start listening
 def start_listening():
-    continuous_listen()
+    listener.start()
+
+# Function to stop capture and wait until every queued utterance has been saved
+def stop_capture():
+    stop_listening.set()
+    if listener.is_alive():
+        listener.join()  # continuous_listen drains the pipeline before it returns
+
+# Function to close the transcripts once capture has stopped, replace them with their re-translation, then email them
+def deliver_transcripts(recipients, documents):
+    stop_capture()
+    save_to_word("Session ended.")
+    transcript.close()
+    for language_transcript in fanout_transcripts.values():
+        language_transcript.close()
+    if retranslate_transcripts:
+        retranslator.finish()
+    send_email(recipients, documents).join()
 
 # Function to end session and send email
 def end_session():
-    save_to_word("Session ended.")
+    if session_ended.is_set():
+        return None
+    session_ended.set()
     recipients = ["student1@example.com", "student2@example.com"]  # Add more recipients
-    send_email(recipients, 'translated_subtitles.docx')
-    print("Session ended and document sent to all students.")
+    documents = ['translated_subtitles.docx'] + [t.document_path for t in fanout_transcripts.values()]
+    # Draining the pipeline and the re-translation pass take a while; they run in the background
+    # so the window stays responsive
+    delivery = threading.Thread(target=deliver_transcripts, args=(recipients, documents), daemon=True)
+    delivery.start()
+    print("Session ending; saving the last subtitles and re-translating the transcript before sending it...")
+    return delivery
+
+# Headless: no window; status messages go to the server's clients.
+# The session ends when "exit" is heard or on Ctrl+C.
+if headless:
+    subtitle_display = subtitle_server
+    model_loader.warm_up(default_model_name, on_ready=on_source_model_ready)
+    try:
+        continuous_listen()
+    except KeyboardInterrupt:
+        stop_listening.set()
+    end_session().join()
+    subtitle_server.stop()
+    raise SystemExit
 
 # GUI setup
 root = tk.Tk()
 root.title("Real-time Translated Subtitles")
-root.geometry("800x250")
+root.geometry(f"800x{250 + 50 * len(fanout_targets)}")
 root.attributes('-topmost', True)
 
 # Subtitle label
 subtitle_label = tk.Label(root, text="Subtitles will appear here...", font=("Helvetica", 20), wraplength=700, justify="center")
 subtitle_label.pack(side='bottom', pady=10)
 
+# Pipeline threads push subtitles here; the Tk thread renders the latest one per tick
+subtitle_display = SubtitleDisplay(root, subtitle_label)
+
+# One extra label per fan-out language
+for language in fanout_targets:
+    language_label = tk.Label(root, text=f"{language} subtitles will appear here...", font=("Helvetica", 16), wraplength=700, justify="center")
+    language_label.pack(side='bottom', pady=5)
+    subtitle_display.add_label(language, language_label)
+
 # Source language dropdown
 source_language_var = tk.StringVar(value="English")
 source_language_dropdown = ttk.Combobox(root, textvariable=source_language_var, values=list(language_models.keys()), font=("Helvetica", 12))
@@ -193,17 +410,40 @@ target_language_dropdown.pack(pady=5)
 # Update source language model on selection
 def on_source_language_change(event):
     selected_language = source_language_var.get()
-def on_source_language_change(event):
-    selected_language = source_language_var.get()
+    selected_languages["source"] = selected_language
     update_source_model(selected_language)
 
 source_language_dropdown.bind("<<ComboboxSelected>>", on_source_language_change)
 
+# Keep the target selection in sync for worker threads
+def on_target_language_change(event):
+    selected_languages["target"] = target_language_var.get()
+
+target_language_dropdown.bind("<<ComboboxSelected>>", on_target_language_change)
+
 
 # End session button
 end_button = tk.Button(root, text="End Session and Send Email to All", command=end_session)
 end_button.pack(side='top', pady=10)
 
+# Status line; the default model loads in the background so the window shows up right away
+status_label = tk.Label(root, text="Warming up the translation model...", font=("Helvetica", 10), fg="gray")
+status_label.pack(side='bottom')
+subtitle_display.add_label("status", status_label)
+model_loader.warm_up(default_model_name, on_ready=on_source_model_ready)
+
 # Start listening after 1 second
 root.after(1000, start_listening)
+# Function called when the window is closed: save every queued subtitle and write the documents
+# (as End Session does, without emailing them); a paused re-translation pass must not outlive the session
+def on_close():
+    root.withdraw()  # draining the pipeline can take a moment
+    stop_capture()
+    transcript.close()
+    for language_transcript in fanout_transcripts.values():
+        language_transcript.close()
+    retranslator.close()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
 root.mainloop()
@@ -1,8 +1,13 @@
 import tkinter as tk
 from googletrans import Translator
 import speech_recognition as sr
-import pyttsx3  # Text-to-Speech library
+import os
 import threading
+from display import SubtitleDisplay
+from asr_backends import ASRRouter, GoogleBackend, VoskBackend
+from tts_worker import TTSWorker, SKIP_STALE
+from glossary import Glossary
+from quick_translate import translate_with_glossary
 
 # Translator instance
 translator = Translator()
@@ -13,49 +18,53 @@ non_translatable_words = [
     "Filter", "Modulation", "Digital Signal Processing", "Impulse Response", "signal system", "z transform"
 ]
 
+# Extra course terms, one per line (optional)
+glossary_file = "course_terms.txt"
+
+# Compiled, case-insensitive index of the non-translatable terms (built once)
+glossary = Glossary(non_translatable_words)
+if os.path.exists(glossary_file):
+    glossary.load(glossary_file)
+
 # Function to translate text while retaining non-translatable terms
-def translate_text_quick(text, target_lang="hi"):
-    words = text.split()
-    translated_words = []
-
-    for word in words:
-        if word.lower() in non_translatable_words:
-            translated_words.append(word)
-        else:
-            try:
-                translated_word = translator.translate(word, src='en', dest=target_lang).text
-                translated_words.append(translated_word)
-            except Exception as e:
-                print(f"Translation error for '{word}': {e}")
-                translated_words.append(word)  # Fallback
+def translate_text_quick(text, target_lang="hi", whole_sentence=True):
+    return translate_with_glossary(text, translator, glossary, target_lang, whole_sentence)
 
-    return ' '.join(translated_words)
+# Text-to-Speech runs on its own thread; stale items are skipped if speech falls behind.
+# Set tts_cache_dir to a folder to reuse synthesized audio for repeated phrases.
+tts_cache_dir = None
+tts_worker = TTSWorker(policy=SKIP_STALE, cache_dir=tts_cache_dir)
 
 # Speech-to-Text & Text-to-Speech functionality
+# Set offline_asr_model to a Vosk model directory to keep recognizing without Wi-Fi
+offline_asr_model = None
+
 def listen_and_translate_continuous():
     recognizer = sr.Recognizer()
+    # Google first, then the offline model when the network drops
+    asr_backends = [GoogleBackend(recognizer)]
+    if offline_asr_model:
+        asr_backends.append(VoskBackend(offline_asr_model))
+    asr = ASRRouter(asr_backends)
     mic = sr.Microphone()
 
-    engine = pyttsx3.init()  # Text-to-Speech engine
-
     with mic as source:
         recognizer.adjust_for_ambient_noise(source)
         while True:
             try:
                 print("Listening...")
                 audio = recognizer.listen(source, timeout=5, phrase_time_limit=4)
-                recognized_text = recognizer.recognize_google(audio)
+                recognized_text = asr.recognize(audio, language="en-US")
                 print(f"Recognized: {recognized_text}")
 
                 translated_text = translate_text_quick(recognized_text)
                 print(f"Translated: {translated_text}")
 
                 # Display translated text on GUI
-                subtitle_label.config(text=translated_text)
+                subtitle_display.push(translated_text)
 
-                # Convert translated text to speech
-                engine.say(translated_text)
-                engine.runAndWait()
+                # Convert translated text to speech (on the TTS thread, so listening continues)
+                tts_worker.say(translated_text)
 
             except sr.UnknownValueError:
                 print("Could not understand speech.")
@@ -64,6 +73,11 @@ def listen_and_translate_continuous():
             except Exception as e:
                 print(f"Error: {e}")
 
+# Report speech backlog and lag before closing the window
+def quit_app():
+    print(f"Text-to-speech stats: {tts_worker.stats()}")
+    root.destroy()
+
 # GUI setup
 root = tk.Tk()
 root.title("Real-Time Speech Translation")
@@ -76,10 +90,13 @@ root.attributes('-alpha', 0.8)
 subtitle_label = tk.Label(root, text="", font=("Helvetica", 16), fg="white", bg="black", wraplength=780, justify="center")
 subtitle_label.pack(fill=tk.BOTH, expand=True)
 
+# The listening thread pushes subtitles here; the Tk thread renders the latest one per tick
+subtitle_display = SubtitleDisplay(root, subtitle_label)
+
 control_frame = tk.Frame(root, bg="black")
 control_frame.pack(fill=tk.X)
 
-quit_button = tk.Button(control_frame, text="Quit", command=root.destroy, bg="red", fg="white", font=("Helvetica", 12))
+quit_button = tk.Button(control_frame, text="Quit", command=quit_app, bg="red", fg="white", font=("Helvetica", 12))
 quit_button.pack(side=tk.RIGHT, padx=10, pady=5)
 
 # Start listening
@@ -0,0 +1,122 @@
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+# Function to list the modules a script imports at module level, in order
+def script_imports(script_path):
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), script_path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            if name not in modules:
+                modules.append(name)
+    return modules
+
+
+# Function to import the modules in a fresh interpreter and read -X importtime.
+# Each module's cost is what it adds on top of the ones imported before it,
+# which is what the script pays at startup.
+def measure_imports(modules, cwd):
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    per_import = {}
+    per_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        per_package[name.split(".")[0]] += int(self_us)
+        if not indent and name in modules:
+            per_import[name] = int(cumulative_us) / 1000.0
+    return {
+        "imports_ms": {module: round(per_import.get(module, 0.0), 1) for module in modules},
+        "total_ms": round(sum(per_import.values()), 1),
+        "heaviest_packages_ms": {
+            package: round(us / 1000.0, 1)
+            for package, us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:10]
+        },
+    }
+
+
+# Function to time loading each model into a fresh pool
+def measure_models(model_names):
+    from model_pool import ModelPool, model_size_bytes
+
+    pool = ModelPool(budget_mb=1 << 20)
+    report = {}
+    for model_name in model_names:
+        start = time.perf_counter()
+        _, model = pool.get(model_name)
+        report[model_name] = {
+            "load_seconds": round(time.perf_counter() - start, 2),
+            "size_mb": round(model_size_bytes(model) / (1024 * 1024), 1),
+        }
+    return report
+
+
+# Function to start the script and wait for its first window (see display.STARTUP_PROBE)
+def measure_first_window(script_path, timeout):
+    env = dict(os.environ, SUBTITLE_STARTUP_PROBE=repr(time.time()))
+    try:
+        result = subprocess.run([sys.executable, os.path.basename(script_path)], cwd=os.path.dirname(script_path),
+                                env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    match = re.search(r"first_window_seconds=([\d.]+)", result.stdout)
+    return float(match.group(1)) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup cost of a subtitle app: imports, models and first window")
+    parser.add_argument("script", help="e.g. ss5.py")
+    parser.add_argument("--models", nargs="*", default=[], help="model names to time, e.g. Helsinki-NLP/opus-mt-en-fr")
+    parser.add_argument("--window", action="store_true", help="also launch the app and time its first window")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    script_path = os.path.abspath(args.script)
+    modules = script_imports(script_path)
+    report = {"script": args.script, "imports": measure_imports(modules, os.path.dirname(script_path))}
+    for module, ms in sorted(report["imports"]["imports_ms"].items(), key=lambda item: item[1], reverse=True):
+        print(f"{ms:>10.1f} ms  import {module}")
+    print(f"{report['imports']['total_ms']:>10.1f} ms  total")
+
+    if args.models:
+        report["models"] = measure_models(args.models)
+        for model_name, entry in report["models"].items():
+            print(f"{entry['load_seconds'] * 1000:>10.1f} ms  load {model_name} ({entry['size_mb']} MB)")
+    if args.window:
+        report["first_window_seconds"] = measure_first_window(script_path, args.timeout)
+        print(f"First window after {report['first_window_seconds']} s")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
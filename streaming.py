@@ -0,0 +1,131 @@
+import audioop
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+# Defaults for the stability/latency trade-off
+DEFAULT_PARTIAL_INTERVAL = 0.5  # seconds of new audio between partial hypotheses
+DEFAULT_PAUSE_SECONDS = 0.6     # silence that ends a segment
+DEFAULT_MAX_SEGMENT_SECONDS = 15
+DEFAULT_STABILITY = 2           # hypotheses that must agree before words are shown as stable
+PREROLL_CHUNKS = 3              # audio kept from just before speech starts
+
+
+# Function to return the longest common word prefix of several hypotheses
+def common_prefix(hypotheses):
+    prefix = []
+    for words in zip(*hypotheses):
+        if any(word.lower() != words[0].lower() for word in words):
+            break
+        prefix.append(words[-1])
+    return prefix
+
+
+# Streams partial subtitles while the speaker is still talking.
+# Audio is segmented with an energy VAD; every partial_interval seconds the
+# current segment is re-recognized, and words that the last `stability`
+# hypotheses agree on are translated and shown. The rest of the hypothesis is
+# shown untranslated until it settles. At the end of a segment the full text is
+# translated and replaces the partial subtitle.
+class StreamingTranscriber:
+    def __init__(self, recognize, translate, on_partial, on_final, energy_threshold=300,
+                 partial_interval=DEFAULT_PARTIAL_INTERVAL, pause_seconds=DEFAULT_PAUSE_SECONDS,
+                 max_segment_seconds=DEFAULT_MAX_SEGMENT_SECONDS, stability=DEFAULT_STABILITY):
+        self.recognize = recognize    # recognize(AudioData) -> text
+        self.translate = translate    # translate(text) -> text
+        self.on_partial = on_partial  # on_partial(subtitle_text)
+        self.on_final = on_final      # on_final(text, translated_text)
+        self.energy_threshold = energy_threshold
+        self.partial_interval = partial_interval
+        self.pause_seconds = pause_seconds
+        self.max_segment_seconds = max_segment_seconds
+        self.stability = max(1, stability)
+        # One worker keeps recognition results in order; capture never waits for it
+        self._worker = ThreadPoolExecutor(max_workers=1)
+        self._partial_pending = threading.Event()
+        self._segment_id = 0
+        self._hypotheses = []
+        self._stable_words = []
+        self._stable_translation = ""
+
+    # Read from an open sr.Microphone until stop_event is set
+    def run(self, source, stop_event):
+        chunk_seconds = source.CHUNK / source.SAMPLE_RATE
+        preroll = []
+        frames = []
+        in_speech = False
+        silence = 0.0
+        since_partial = 0.0
+
+        while not stop_event.is_set():
+            chunk = source.stream.read(source.CHUNK)
+            speech = audioop.rms(chunk, source.SAMPLE_WIDTH) > self.energy_threshold
+
+            if not in_speech:
+                preroll = (preroll + [chunk])[-PREROLL_CHUNKS:]
+                if not speech:
+                    continue
+                in_speech = True
+                frames = list(preroll)
+                silence = 0.0
+                since_partial = 0.0
+                self._segment_id += 1
+                continue
+
+            frames.append(chunk)
+            silence = 0.0 if speech else silence + chunk_seconds
+            since_partial += chunk_seconds
+
+            if silence >= self.pause_seconds or len(frames) * chunk_seconds >= self.max_segment_seconds:
+                audio = sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                self._worker.submit(self._final, self._segment_id, audio)
+                in_speech = False
+                preroll = []
+            elif since_partial >= self.partial_interval and not self._partial_pending.is_set():
+                # Skip a partial if the previous one is still being recognized
+                since_partial = 0.0
+                self._partial_pending.set()
+                audio = sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                self._worker.submit(self._partial, self._segment_id, audio)
+
+        self._worker.shutdown(wait=True)
+
+    def _recognize(self, audio):
+        try:
+            return self.recognize(audio)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            print(f"Could not request results; {e}")
+            return ""
+
+    def _partial(self, segment_id, audio):
+        try:
+            text = self._recognize(audio)
+            if not text or segment_id != self._segment_id:
+                return
+            words = text.split()
+            self._hypotheses = (self._hypotheses + [words])[-self.stability:]
+            if len(self._hypotheses) >= self.stability:
+                stable = common_prefix(self._hypotheses)
+                if len(stable) > len(self._stable_words):
+                    self._stable_words = stable
+                    self._stable_translation = self.translate(" ".join(stable))
+            tail = words[len(self._stable_words):]
+            self.on_partial(" ".join(part for part in [self._stable_translation] + tail if part))
+        except Exception as e:
+            print(f"Partial subtitle error: {e}")
+        finally:
+            self._partial_pending.clear()
+
+    def _final(self, segment_id, audio):
+        self._hypotheses = []
+        self._stable_words = []
+        self._stable_translation = ""
+        try:
+            text = self._recognize(audio)
+            if text:
+                self.on_final(text, self.translate(text))
+        except Exception as e:
+            print(f"Final subtitle error: {e}")
@@ -0,0 +1,399 @@
+import asyncio
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import LatencyStats
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8765
+DEFAULT_CLIENT_QUEUE = 32       # events buffered per client; a client that falls further behind is dropped
+DEFAULT_WRITE_TIMEOUT = 5.0     # seconds a client's socket may stay blocked before it is dropped
+DEFAULT_KEEPALIVE_SECONDS = 15  # idle connections get a comment/ping so dead ones are noticed
+DEFAULT_PENDING_EVENTS = 16     # published items waiting for translation; the oldest is dropped beyond this
+SEND_BUFFER_BYTES = 64 * 1024   # kernel send buffer per client, so a stalled client can't pin megabytes
+REQUEST_TIMEOUT = 10.0
+MAX_HEADER_BYTES = 8192
+MAX_CLIENT_MESSAGE = 4096
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# WebSocket opcodes
+_TEXT = 0x1
+_CLOSE = 0x8
+_PING = 0x9
+_PONG = 0xA
+
+# Page served at / : pick a language, subtitles arrive over Server-Sent Events
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Live subtitles</title>
+<style>body{font-family:Helvetica,sans-serif;margin:2em}#text{font-size:2em;margin-top:1em}#status{color:gray}</style></head>
+<body><select id="language"></select><div id="text">Subtitles will appear here...</div><div id="status"></div>
+<script>
+const select = document.getElementById("language"), text = document.getElementById("text");
+const status = document.getElementById("status");
+let source = null;
+function listen() {
+  if (source) source.close();
+  source = new EventSource("/events?language=" + encodeURIComponent(select.value));
+  source.onmessage = e => { text.textContent = JSON.parse(e.data).text; };
+  source.addEventListener("status", e => { status.textContent = JSON.parse(e.data).text; });
+}
+fetch("/languages").then(r => r.json()).then(languages => {
+  for (const l of languages) select.add(new Option(l, l));
+  select.onchange = listen;
+  listen();
+});
+</script></body></html>
+"""
+
+
+# Function to encode a server-to-client WebSocket frame (servers never mask)
+def websocket_frame(payload, opcode=_TEXT):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+# Function to read one client frame; returns (opcode, payload)
+async def read_websocket_frame(reader):
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_CLIENT_MESSAGE:
+        raise ValueError("WebSocket message too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+
+# One connected SSE or WebSocket client
+class _Client:
+    def __init__(self, writer, language, kind, queue_size):
+        self.writer = writer
+        self.language = language
+        self.kind = kind  # "sse" or "websocket"
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+
+
+# Broadcasts subtitle events to many local clients (browsers via SSE at
+# /events, or WebSocket at /ws) from one asyncio loop on its own thread.
+# Each client picks a language; every published item is translated once per
+# language somebody is listening in (through the router and the shared model
+# pool), encoded once, and the same bytes are queued for every client of that
+# language. A client whose queue fills up, or whose socket stays blocked, is
+# disconnected instead of holding the others back; EventSource reconnects on
+# its own and starts again from the latest subtitle.
+class SubtitleServer:
+    def __init__(self, router, languages, host=DEFAULT_HOST, port=DEFAULT_PORT, client_queue=DEFAULT_CLIENT_QUEUE,
+                 write_timeout=DEFAULT_WRITE_TIMEOUT, keepalive_seconds=DEFAULT_KEEPALIVE_SECONDS,
+                 pending_events=DEFAULT_PENDING_EVENTS, profile=None):
+        self.router = router
+        self.profile = profile  # decoding profile for the languages translated here
+        self.languages = list(languages)
+        self.host = host
+        self.port = port
+        self.client_queue = client_queue
+        self.write_timeout = write_timeout
+        self.keepalive_seconds = keepalive_seconds
+        self.pending_events = pending_events
+        self.published = 0
+        self.skipped = 0           # published items dropped before translation because MT fell behind
+        self.broadcast = 0         # published items handled (sent, or nobody was listening)
+        self.dropped_clients = 0
+        self.translate_latency = LatencyStats()  # per item, all languages
+        self.fanout_latency = LatencyStats()     # from publish() until queued for every client
+        self._clients = {language: set() for language in self.languages}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._events = None
+        self._broadcaster = None
+        self._ready = threading.Event()
+        self._next_id = 0
+        # One worker keeps events in order; translate_many already runs the languages concurrently
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="subtitle-server-mt")
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    # Start serving on a background thread; returns once the socket is listening
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="subtitle-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._server is None:
+            raise OSError(f"Subtitle server could not listen on {self.host}:{self.port}")
+        print(f"Serving subtitles on http://{self.host}:{self.port}/")
+
+    def stop(self):
+        if self._loop is not None and self.running:
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            except Exception as e:
+                print(f"Subtitle server did not shut down cleanly: {e!r}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+    # Queue a pipeline item ("text", "language" and optionally "target"/"translated"/"translations")
+    # for broadcast; safe to call from any thread, ignored while the server is not running
+    def publish(self, item):
+        if self._loop is None or not self.running:
+            return
+        event = {"text": item["text"], "language": item["language"], "published": time.time(),
+                 "known": self._known_translations(item), "clock": time.perf_counter()}
+        self._loop.call_soon_threadsafe(self._enqueue, event)
+
+    # Same interface as SubtitleDisplay.push, so the server can stand in for the window when headless.
+    # Only the "status" line is forwarded (to every client, untranslated); subtitles reach
+    # the clients through publish(), in each client's own language.
+    def push(self, text, target="main"):
+        if target != "status" or self._loop is None or not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._send_to_all, {"type": "status", "text": text})
+
+    def stats(self):
+        return {
+            "clients": {language: len(clients) for language, clients in self._clients.items()},
+            "published": self.published,
+            "skipped": self.skipped,
+            "broadcast": self.broadcast,
+            "dropped_clients": self.dropped_clients,
+            "translate": self.translate_latency.summary(),
+            "fanout": self.fanout_latency.summary(),
+        }
+
+    def _known_translations(self, item):
+        known = dict(item.get("translations") or {})
+        # Same-language items went through the source model, so only a real target counts
+        if item.get("target") not in (None, item.get("language")) and item.get("translated") is not None:
+            known[item["target"]] = item["translated"]
+        return known
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._events = asyncio.Queue()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+        except OSError as e:
+            print(f"Subtitle server failed to start: {e}")
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._broadcaster = self._loop.create_task(self._broadcast_events())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server = None
+            self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [self._broadcaster] + [client.task for clients in self._clients.values() for client in clients]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _enqueue(self, event):
+        self.published += 1
+        while self._events.qsize() >= self.pending_events:
+            self._events.get_nowait()
+            self.skipped += 1
+        self._events.put_nowait(event)
+
+    async def _broadcast_events(self):
+        while True:
+            event = await self._events.get()
+            await self._broadcast(event)
+            self.broadcast += 1
+
+    async def _broadcast(self, event):
+        wanted = [language for language, clients in self._clients.items() if clients]
+        if not wanted:
+            return
+        missing = [language for language in wanted if language not in event["known"]]
+        translations = dict(event["known"])
+        if missing:
+            start = time.perf_counter()
+            try:
+                translations.update(await self._loop.run_in_executor(
+                    self._executor, self.router.translate_many,
+                    event["text"], event["language"], missing, self.profile))
+            except Exception as e:
+                print(f"Subtitle server translation failed: {e}")
+                return
+            self.translate_latency.add(time.perf_counter() - start)
+        self._next_id += 1
+        for language in wanted:
+            payload = {"id": self._next_id, "type": "subtitle", "language": language,
+                       "text": translations[language], "source": event["text"], "published": event["published"]}
+            self._send(self._clients[language], payload)
+        self.fanout_latency.add(time.perf_counter() - event["clock"])
+
+    def _send_to_all(self, payload):
+        for clients in self._clients.values():
+            self._send(clients, payload)
+
+    # Encode once per payload and queue the same bytes for each client
+    def _send(self, clients, payload):
+        if not clients:
+            return
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        event = b"event: status\n" if payload["type"] == "status" else b""
+        encoded = {"sse": event + b"data: " + data + b"\n\n", "websocket": websocket_frame(data)}
+        for client in list(clients):
+            try:
+                client.queue.put_nowait(encoded[client.kind])
+            except asyncio.QueueFull:
+                self._drop(client)
+
+    def _drop(self, client):
+        self.dropped_clients += 1
+        self._clients[client.language].discard(client)
+        if client.task is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+        client.writer.transport.abort()
+
+    async def _handle(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        if len(head) > MAX_HEADER_BYTES:
+            await self._respond(writer, 431, "text/plain", b"Request headers too large")
+            return
+        lines = head.decode("latin-1").split("\r\n")
+        method, target = (lines[0].split(" ") + ["", ""])[:2]
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        language = parse_qs(url.query).get("language", [self.languages[0]])[0]
+
+        if method != "GET":
+            await self._respond(writer, 405, "text/plain", b"Only GET is supported")
+        elif url.path == "/":
+            await self._respond(writer, 200, "text/html; charset=utf-8", PAGE.encode("utf-8"))
+        elif url.path == "/languages":
+            await self._respond(writer, 200, "application/json", json.dumps(self.languages).encode("utf-8"))
+        elif url.path == "/stats":
+            await self._respond(writer, 200, "application/json", json.dumps(self.stats()).encode("utf-8"))
+        elif url.path in ("/events", "/ws") and language not in self._clients:
+            await self._respond(writer, 400, "text/plain", f"Unknown language: {language}".encode("utf-8"))
+        elif url.path == "/events":
+            await self._serve_sse(reader, writer, language)
+        elif url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket" and "sec-websocket-key" in headers:
+            await self._serve_websocket(reader, writer, language, headers["sec-websocket-key"])
+        else:
+            await self._respond(writer, 404, "text/plain", b"Not found")
+
+    async def _respond(self, writer, status, content_type, body):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  431: "Request Header Fields Too Large"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        try:
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        writer.close()
+
+    async def _serve_sse(self, reader, writer, language):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\n")
+        client = _Client(writer, language, "sse", self.client_queue)
+        await self._stream(client, b": keepalive\n\n", self._wait_for_disconnect(reader, client))
+
+    async def _serve_websocket(self, reader, writer, language, key):
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii"))
+        client = _Client(writer, language, "websocket", self.client_queue)
+        await self._stream(client, websocket_frame(b"", _PING), self._read_websocket(reader, client))
+
+    # Write a client's queued events until it disconnects, is dropped or the server stops.
+    # listener reads from the client meanwhile and ends the stream when the client goes away.
+    async def _stream(self, client, keepalive, listener):
+        client.task = asyncio.current_task()
+        self._clients[client.language].add(client)
+        listener = asyncio.ensure_future(listener)
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(client.queue.get(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    data = keepalive
+                # Under load, write everything that queued up meanwhile with one drain
+                while not client.queue.empty():
+                    data += client.queue.get_nowait()
+                client.writer.write(data)
+                await asyncio.wait_for(client.writer.drain(), self.write_timeout)
+        except asyncio.TimeoutError:
+            self._drop(client)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            listener.cancel()
+            self._clients[client.language].discard(client)
+            client.writer.close()
+
+    # SSE clients send nothing after the request, so any read result means they are gone
+    async def _wait_for_disconnect(self, reader, client):
+        try:
+            await reader.read(1)
+        except ConnectionError:
+            pass
+        client.task.cancel()
+
+    # WebSocket clients may switch language by sending {"language": "Hindi"}
+    async def _read_websocket(self, reader, client):
+        try:
+            while True:
+                opcode, payload = await read_websocket_frame(reader)
+                if opcode == _CLOSE:
+                    client.writer.write(websocket_frame(payload[:2], _CLOSE))
+                    break
+                if opcode == _PING:
+                    client.writer.write(websocket_frame(payload, _PONG))
+                elif opcode == _TEXT:
+                    try:
+                        language = json.loads(payload.decode("utf-8")).get("language")
+                    except (ValueError, AttributeError):
+                        continue
+                    if language in self._clients and client in self._clients[client.language]:
+                        self._clients[client.language].discard(client)
+                        client.language = language
+                        self._clients[language].add(client)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        if client.task is not None:
+            client.task.cancel()
@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+
+# Defaults for buffering and flushing
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_FLUSH_LINES = 20
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+
+
+# Function to format seconds as an SRT (00:00:01,500) or WebVTT (00:00:01.500) timestamp
+def format_timestamp(seconds, cue_format):
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    separator = "," if cue_format == "srt" else "."
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+# Long-lived subtitle file writer. Callers only put lines on a bounded queue;
+# a background thread coalesces them and writes on size/time thresholds.
+class SubtitleFileWriter:
+    def __init__(self, path, cue_format=None, max_queue=DEFAULT_MAX_QUEUE,
+                 flush_lines=DEFAULT_FLUSH_LINES, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 rotate_bytes=None, rotate_per_session=False):
+        if cue_format not in (None, "srt", "vtt"):
+            raise ValueError(f"Unknown cue format: {cue_format}")
+        self.path = path
+        self.cue_format = cue_format
+        self.cue_path = f"{os.path.splitext(path)[0]}.{cue_format}" if cue_format else None
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._session_start = time.time()
+        self._cue_index = 0
+        self._stopped = threading.Event()
+
+        if rotate_per_session:
+            self._rotate()
+        self._open()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # Queue one subtitle line; start/end are wall-clock times for the cue file.
+    # Never blocks: if the writer falls far behind, the line is dropped and counted.
+    def write(self, text, start=None, end=None):
+        now = time.time()
+        try:
+            self._queue.put_nowait((text, start if start is not None else now, end if end is not None else now))
+        except queue.Full:
+            self.dropped += 1
+
+    # Flush everything that is queued and stop the writer thread
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        pending = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = self.flush_interval
+            if pending:
+                timeout = max(0.01, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                pending.append(self._queue.get(timeout=timeout))
+                # Coalesce whatever else is already waiting
+                while len(pending) < self.flush_lines:
+                    pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            stopping = self._stopped.is_set()
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if pending and (len(pending) >= self.flush_lines or due or stopping):
+                self._flush(pending)
+                pending = []
+                last_flush = time.monotonic()
+            if stopping and self._queue.empty():
+                if pending:
+                    self._flush(pending)
+                self._close_files()
+                return
+
+    def _flush(self, entries):
+        self._text_file.write("".join(f"{text}\n" for text, _, _ in entries))
+        self._text_file.flush()
+        if self._cue_file is not None:
+            cues = []
+            for text, start, end in entries:
+                self._cue_index += 1
+                begin = format_timestamp(start - self._session_start, self.cue_format)
+                finish = format_timestamp(max(end, start + 0.5) - self._session_start, self.cue_format)
+                cue_id = f"{self._cue_index}\n" if self.cue_format == "srt" else ""
+                cues.append(f"{cue_id}{begin} --> {finish}\n{text}\n\n")
+            self._cue_file.write("".join(cues))
+            self._cue_file.flush()
+        if self.rotate_bytes is not None and self._text_file.tell() >= self.rotate_bytes:
+            self._close_files()
+            self._rotate()
+            self._open()
+
+    def _open(self):
+        self._text_file = open(self.path, "a", encoding="utf-8")
+        self._cue_file = None
+        if self.cue_path:
+            new_file = not os.path.exists(self.cue_path) or os.path.getsize(self.cue_path) == 0
+            self._cue_file = open(self.cue_path, "a", encoding="utf-8")
+            if new_file and self.cue_format == "vtt":
+                self._cue_file.write("WEBVTT\n\n")
+
+    def _close_files(self):
+        self._text_file.close()
+        if self._cue_file is not None:
+            self._cue_file.close()
+
+    # Move the current files aside with a timestamp suffix
+    def _rotate(self):
+        suffix = time.strftime("%Y%m%d-%H%M%S")
+        for path in (self.path, self.cue_path):
+            if path and os.path.exists(path) and os.path.getsize(path) > 0:
+                base, ext = os.path.splitext(path)
+                target = f"{base}.{suffix}{ext}"
+                counter = 1
+                while os.path.exists(target):
+                    target = f"{base}.{suffix}-{counter}{ext}"
+                    counter += 1
+                os.replace(path, target)
+        if self.cue_format == "srt":
+            self._cue_index = 0
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from batch_translator import BatchTranslator
+
+pytest.importorskip("torch")
+
+
+class FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [text.split() for text in texts]}
+
+    def batch_decode(self, outputs, **kwargs):
+        return outputs
+
+
+class FakeModel:
+    def generate(self, input_ids, **kwargs):
+        return [" ".join(ids).upper() for ids in input_ids]
+
+
+def translator(max_wait_ms):
+    return BatchTranslator(max_wait_ms=max_wait_ms, cache=None, group_workers=1)
+
+
+def test_single_stream_does_not_wait_for_a_batch():
+    batcher = translator(max_wait_ms=2000)
+    start = time.perf_counter()
+    assert batcher.translate("hello there", "model", FakeTokenizer(), FakeModel()) == "HELLO THERE"
+    assert batcher.translate("second", "model", FakeTokenizer(), FakeModel()) == "SECOND"
+    assert time.perf_counter() - start < 1.0
+    assert list(batcher.stats()) == [1]
+
+
+def test_burst_shares_one_batch_and_ends_the_wait():
+    batcher = translator(max_wait_ms=2000)
+    start = time.perf_counter()
+    with batcher.burst():
+        futures = [batcher.submit(text, "model", FakeTokenizer(), FakeModel()) for text in ("a", "b", "c")]
+    assert [future.result(timeout=5) for future in futures] == ["A", "B", "C"]
+    assert time.perf_counter() - start < 1.0
+    assert batcher.stats()[3]["batches"] == 1
+
+
+def test_concurrent_streams_wait_for_each_other():
+    batcher = translator(max_wait_ms=500)
+    tokenizer, model = FakeTokenizer(), FakeModel()
+
+    first_seen = threading.Event()
+    both_seen = threading.Barrier(2)
+    results = []
+
+    # Once both streams have submitted (one after the other), their segments are batched together
+    def stream(text, delay):
+        if text != "first":
+            first_seen.wait()
+        batcher.translate(f"warm {text}", "model", tokenizer, model)
+        first_seen.set()
+        both_seen.wait()
+        time.sleep(delay)
+        results.append(batcher.submit(text, "model", tokenizer, model))
+
+    workers = [threading.Thread(target=stream, args=(text, delay)) for text, delay in (("first", 0.1), ("second", 0.15))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sorted(future.result(timeout=5) for future in results) == ["FIRST", "SECOND"]
+    stats = batcher.stats()
+    assert (stats[1]["batches"], stats[2]["batches"]) == (2, 1)
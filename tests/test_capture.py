@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("speech_recognition")
+
+from capture import CaptureEngine, RingBuffer
+
+RATE = 16000
+QUIET = 20     # well under min_energy
+LOUD = 3000
+
+
+class FakeStream:
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def read(self, size):
+        chunk = self.data[self.position:self.position + size * 2]
+        self.position += size * 2
+        return chunk
+
+
+class FakeSource:
+    SAMPLE_RATE = RATE
+    SAMPLE_WIDTH = 2
+    CHUNK = 1000  # does not line up with the 20 ms frames or 200 ms VAD blocks
+
+    def __init__(self, *parts):
+        self.stream = FakeStream(b"".join(parts))
+
+
+def tone(seconds, amplitude):
+    samples = np.full(int(seconds * RATE), amplitude, dtype=np.int16)
+    samples[1::2] *= -1
+    return samples.tobytes()
+
+
+def capture(source, **options):
+    segments = []
+    CaptureEngine(lambda segment: segments.append((segment.start, segment.end)), **options).run(source)
+    return segments
+
+
+def test_ring_windows_stay_contiguous_across_the_wrap():
+    ring = RingBuffer(8)
+    ring.write(np.arange(6, dtype=np.int16).tobytes())
+    ring.write(np.arange(6, 12, dtype=np.int16).tobytes())
+    assert list(ring.samples(4, 12)) == list(range(4, 12))
+    assert bytes(ring.bytes_view(10, 12)) == np.arange(10, 12, dtype=np.int16).tobytes()
+    assert ring.is_valid(4)
+    assert not ring.is_valid(3)
+
+
+def test_each_utterance_is_emitted_once_across_block_boundaries():
+    source = FakeSource(tone(1.0, QUIET), tone(1.0, LOUD), tone(1.5, QUIET), tone(0.5, LOUD), tone(1.0, QUIET))
+    segments = capture(source, pause_seconds=0.8, preroll_seconds=0.3)
+    assert segments == [
+        (int(0.7 * RATE), int(2.0 * RATE)),
+        (int(3.2 * RATE), int(4.0 * RATE)),
+    ]
+
+
+def test_a_short_pause_does_not_end_the_segment():
+    source = FakeSource(tone(1.0, QUIET), tone(1.0, LOUD), tone(0.4, QUIET), tone(1.0, LOUD), tone(1.0, QUIET))
+    segments = capture(source, pause_seconds=0.8, preroll_seconds=0.0)
+    assert segments == [(int(1.0 * RATE), int(3.4 * RATE))]
+
+
+def test_long_speech_is_cut_at_the_maximum_length():
+    source = FakeSource(tone(1.0, QUIET), tone(5.0, LOUD), tone(1.0, QUIET))
+    segments = capture(source, max_segment_seconds=2, preroll_seconds=0.0)
+    assert segments == [
+        (int(1.0 * RATE), int(3.0 * RATE)),
+        (int(3.0 * RATE), int(5.0 * RATE)),
+        (int(5.0 * RATE), int(6.0 * RATE)),
+    ]
+
+
+def test_speech_still_open_at_end_of_stream_is_emitted():
+    source = FakeSource(tone(1.0, QUIET), tone(0.5, LOUD))
+    assert capture(source, preroll_seconds=0.0) == [(int(1.0 * RATE), int(1.5 * RATE))]
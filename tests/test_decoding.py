@@ -0,0 +1,29 @@
+import pytest
+
+from decoding import LIVE, TRANSCRIPT, DecodingProfile, get_profile
+
+
+def test_live_cap_grows_with_the_input():
+    live = get_profile(LIVE)
+    short = live.generate_kwargs(10)["max_new_tokens"]
+    long = live.generate_kwargs(400)["max_new_tokens"]
+    assert short >= 20 + 10
+    # An absolute cap would stop growing; long inputs must keep their room
+    assert long >= 2 * 400
+
+
+def test_transcript_uses_beam_search():
+    kwargs = get_profile(TRANSCRIPT).generate_kwargs(20)
+    assert kwargs["num_beams"] > 1 and kwargs["early_stopping"]
+
+
+def test_both_caps_take_the_smaller():
+    profile = DecodingProfile("test", max_new_tokens=50, length_ratio=1.0)
+    assert profile.generate_kwargs(10)["max_new_tokens"] == 20
+    assert profile.generate_kwargs(100)["max_new_tokens"] == 50
+
+
+def test_default_and_unknown_profiles():
+    assert get_profile(None) is None
+    with pytest.raises(ValueError):
+        get_profile("fastest")
@@ -0,0 +1,55 @@
+from concurrent.futures import Future
+
+from fanout import FanOutTranslator
+from routing import RoutePlanner, RoutedTranslator
+
+MODELS = {
+    "Gujarati": "Helsinki-NLP/opus-mt-gu-en",
+    "Hindi": "Helsinki-NLP/opus-mt-en-hi",
+    "Telugu": "Helsinki-NLP/opus-mt-en-te",
+    "French": "Helsinki-NLP/opus-mt-en-fr",
+}
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, text, model_name, tokenizer, model, profile=None):
+        self.calls.append(model_name[-5:])
+        future = Future()
+        future.set_result(f"{model_name[-5:]}({text})")
+        return future
+
+
+class FakePool:
+    def get(self, model_name):
+        return None, None
+
+
+def make_fanout(targets):
+    translator = FakeTranslator()
+    router = RoutedTranslator(RoutePlanner(MODELS), translator=translator, pool=FakePool())
+    return FanOutTranslator(targets, router), translator
+
+
+def test_main_target_shares_the_fanout_call():
+    fanout, translator = make_fanout(["Hindi", "Telugu"])
+    main, translations = fanout.translate_with("namaste", "Gujarati", "French")
+    assert main == "en-fr(gu-en(namaste))"
+    assert translations == {"Hindi": "en-hi(gu-en(namaste))", "Telugu": "en-te(gu-en(namaste))"}
+    # The shared first hop runs once, then every second hop is submitted together
+    assert translator.calls[0] == "gu-en"
+    assert sorted(translator.calls[1:]) == ["en-fr", "en-hi", "en-te"]
+
+
+def test_main_target_may_also_be_a_fanout_target():
+    fanout, translator = make_fanout(["Hindi", "Telugu"])
+    main, translations = fanout.translate_with("namaste", "Gujarati", "Hindi")
+    assert main == translations["Hindi"]
+    assert len(translator.calls) == 3
+
+
+def test_failed_fanout_maps_every_target_to_none():
+    fanout, _ = make_fanout(["Hindi", "Spanish"])
+    assert fanout.translate("namaste", "Gujarati") == {"Hindi": None, "Spanish": None}
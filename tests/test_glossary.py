@@ -0,0 +1,45 @@
+from glossary import Glossary, protect_terms, restore_terms
+
+
+def glossary():
+    return Glossary(["signal system", "Fourier transform", "transform", "Laplace", "time-invariant system"])
+
+
+def test_longest_match_wins_and_case_is_ignored():
+    text, terms = protect_terms("The fourier Transform of a signal", glossary())
+    assert text == "The [[0]] of a signal"
+    assert terms == ["fourier Transform"]
+
+
+def test_hyphens_and_spaces_are_equivalent():
+    assert glossary().find("a time invariant system") == [(2, 23)]
+    assert glossary().contains("Time-Invariant System")
+
+
+def test_terms_do_not_cross_sentence_or_clause_punctuation():
+    g = glossary()
+    text, terms = protect_terms("We measured the signal. System response was flat.", g)
+    assert terms == [] and text == "We measured the signal. System response was flat."
+    text, terms = protect_terms("Apply Fourier, transform it", g)
+    assert terms == ["transform"]
+    assert text == "Apply Fourier, [[0]] it"
+
+
+def test_match_falls_back_to_a_shorter_term():
+    # "fourier transform" is not a term here, but "transform" alone is
+    text, terms = protect_terms("Fourier; transform", glossary())
+    assert terms == ["transform"]
+
+
+def test_restore_round_trip_and_lost_placeholder():
+    text, terms = protect_terms("Laplace and Fourier transform", glossary())
+    assert restore_terms(text.replace("and", "und"), terms) == "Laplace und Fourier transform"
+    assert restore_terms("[[ 1 ]] und [[0]]", terms) == "Fourier transform und Laplace"
+    assert restore_terms("only [[0]]", terms) is None
+
+
+def test_load_skips_comments(tmp_path):
+    path = tmp_path / "terms.txt"
+    path.write_text("# physics\nLaplace\n\nFourier transform  # both words\n", encoding="utf-8")
+    g = Glossary.from_file(str(path))
+    assert len(g) == 2 and g.max_words == 2
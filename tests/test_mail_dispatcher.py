@@ -0,0 +1,151 @@
+import smtplib
+import socketserver
+import threading
+import time
+
+import pytest
+
+from mail_dispatcher import MailDispatcher
+
+
+# Minimal SMTP server: refuses recipients starting with "refused", answers 451 once for
+# recipients starting with "busy", and hangs up on the first drop_connections connections.
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, drop_connections=0):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.drop_connections = drop_connections
+        self.connections = 0
+        self.rcpt_attempts = []
+        self.delivered = []  # (recipient, message)
+        self.busy_answered = set()
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            if server.connections <= server.drop_connections:
+                return
+        self.reply("220 stub ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip("<> ")
+                with server.lock:
+                    server.rcpt_attempts.append(address)
+                    first_busy = address.startswith("busy") and address not in server.busy_answered
+                    server.busy_answered.add(address)
+                if address.startswith("refused"):
+                    self.reply("550 No such user")
+                elif first_busy:
+                    self.reply("451 Try again later")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b""):
+                        break
+                    lines.append(data)
+                with server.lock:
+                    for address in recipients:
+                        server.delivered.append((address, b"".join(lines)))
+                self.reply("250 Queued")
+            elif verb == "RSET" or verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "translated_subtitles.docx"
+    path.write_bytes(b"document bytes")
+    return str(path)
+
+
+def deliver(server, recipients, document, **kwargs):
+    progress = []
+    done = {}
+    kwargs.setdefault("backoff_seconds", 0.01)
+    dispatcher = MailDispatcher("127.0.0.1", server.server_address[1], "teacher@example.com", use_tls=False,
+                                timeout=5, **kwargs)
+    thread = dispatcher.send(recipients, document, "Subtitles", "Attached.",
+                             on_progress=lambda *args: progress.append(args),
+                             on_done=lambda sent, failed: done.update(sent=sent, failed=failed))
+    thread.join(10)
+    assert not thread.is_alive()
+    return progress, done
+
+
+def test_delivers_to_every_recipient_over_pooled_connections(document):
+    server = StubSMTPServer()
+    recipients = [f"student{i}@example.com" for i in range(5)]
+    progress, done = deliver(server, recipients, document, pool_size=2)
+    assert done == {"sent": 5, "failed": 0}
+    assert sorted(address for address, _ in server.delivered) == sorted(recipients)
+    assert server.connections == 2
+    assert all(b"translated_subtitles.docx" in message for _, message in server.delivered)
+    server.shutdown()
+
+
+def test_refused_recipient_is_not_retried(document):
+    server = StubSMTPServer()
+    start = time.perf_counter()
+    progress, done = deliver(server, ["refused@example.com"], document, pool_size=1, backoff_seconds=1.0)
+    assert done == {"sent": 0, "failed": 1}
+    assert server.rcpt_attempts == ["refused@example.com"]
+    assert server.connections == 1
+    assert isinstance(progress[0][4], smtplib.SMTPRecipientsRefused)
+    assert time.perf_counter() - start < 1.0  # no backoff
+    server.shutdown()
+
+
+def test_dropped_connections_are_retried(document):
+    server = StubSMTPServer(drop_connections=2)
+    progress, done = deliver(server, ["student@example.com"], document, pool_size=1, max_retries=3)
+    assert done == {"sent": 1, "failed": 0}
+    assert server.connections == 3
+    server.shutdown()
+
+
+def test_gives_up_after_max_retries(document):
+    server = StubSMTPServer(drop_connections=10)
+    progress, done = deliver(server, ["student@example.com"], document, pool_size=1, max_retries=2)
+    assert done == {"sent": 0, "failed": 1}
+    assert server.connections == 3
+    server.shutdown()
+
+
+def test_temporary_failure_is_retried_on_the_same_connection(document):
+    server = StubSMTPServer()
+    progress, done = deliver(server, ["busy@example.com"], document, pool_size=1)
+    assert done == {"sent": 1, "failed": 0}
+    assert server.rcpt_attempts == ["busy@example.com", "busy@example.com"]
+    assert server.connections == 1
+    server.shutdown()
@@ -0,0 +1,11 @@
+from model_pool import ModelPool
+
+
+def test_registered_models_are_reported_cold_until_loaded():
+    pool = ModelPool()
+    pool.register({"English": "Helsinki-NLP/opus-mt-en-hi"}, {"Hindi": "Helsinki-NLP/opus-mt-hi-en",
+                                                              "Gujarati": "Helsinki-NLP/opus-mt-en-hi"})
+    pool._entries["Helsinki-NLP/opus-mt-en-hi"] = (None, None, 0)
+    stats = pool.stats()
+    assert stats["warm_models"] == ["Helsinki-NLP/opus-mt-en-hi"]
+    assert stats["cold_models"] == ["Helsinki-NLP/opus-mt-hi-en"]
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import BLOCK, DROP_NEWEST, DROP_OLDEST, Pipeline, Stage
+
+
+def slow(seconds):
+    def handler(item):
+        time.sleep(seconds)
+        return item
+    return handler
+
+
+def test_stop_drains_items_in_flight():
+    persisted = []
+    first = Stage("asr", slow(0.02), maxsize=4)
+    second = Stage("mt", slow(0.02), maxsize=4)
+    last = Stage("persist", persisted.append, maxsize=16)
+    first.then(second)
+    second.then(last)
+    pipeline = Pipeline(last, second, first)  # listed out of order on purpose
+    pipeline.start()
+    for i in range(6):
+        first.put(i)
+    pipeline.stop()
+    assert persisted == list(range(6))
+    assert all(stage.dropped == 0 for stage in pipeline.stages)
+
+
+def test_stop_never_discards_from_block_queue():
+    release = threading.Event()
+    handled = []
+
+    def handler(item):
+        release.wait()
+        handled.append(item)
+
+    stage = Stage("persist", handler, maxsize=2, drop_policy=BLOCK)
+    stage.start()
+    for i in range(3):  # one in the handler, two queued: the queue is full
+        stage.put(i)
+    stopper = threading.Thread(target=Pipeline(stage).stop)
+    stopper.start()
+    time.sleep(0.05)
+    assert stopper.is_alive()  # waits for room instead of discarding
+    release.set()
+    stopper.join(2)
+    assert handled == [0, 1, 2]
+    assert stage.dropped == 0
+
+
+def test_drop_oldest_counts_and_keeps_newest():
+    stage = Stage("display", lambda item: None, maxsize=2, drop_policy=DROP_OLDEST)
+    results = [stage.put(i) for i in range(4)]  # not started: nothing is consumed
+    assert results == [True, True, False, False]
+    assert stage.dropped == 2
+    assert [stage._queue.get_nowait()[1] for _ in range(2)] == [2, 3]
+
+
+def test_drop_newest_counts_and_keeps_oldest():
+    stage = Stage("asr", lambda item: None, maxsize=2, drop_policy=DROP_NEWEST)
+    results = [stage.put(i) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert stage.dropped == 2
+    assert [stage._queue.get_nowait()[1] for _ in range(2)] == [0, 1]
+
+
+def test_put_after_stop_is_counted_as_dropped():
+    stage = Stage("persist", lambda item: None)
+    stage.start()
+    Pipeline(stage).stop()
+    assert stage.put("late") is False
+    assert stage.dropped == 1
+
+
+def test_handler_errors_are_counted_and_the_worker_continues():
+    handled = []
+
+    def handler(item):
+        if item == "bad":
+            raise ValueError("bad item")
+        handled.append(item)
+
+    stage = Stage("mt", handler)
+    stage.start()
+    for item in ("a", "bad", "b"):
+        stage.put(item)
+    Pipeline(stage).stop()
+    assert handled == ["a", "b"]
+    assert stage.errors == 1
+    assert stage.processed == 2
+
+
+def test_unknown_drop_policy():
+    with pytest.raises(ValueError):
+        Stage("x", lambda item: item, drop_policy="sometimes")
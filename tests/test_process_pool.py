@@ -0,0 +1,124 @@
+import importlib.util
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from process_pool import PoolTranslator, ProcessTranslationPool
+from translation_cache import TranslationCache
+
+# Workers import torch on start and exit without it
+needs_workers = pytest.mark.skipif(importlib.util.find_spec("torch") is None or not hasattr(signal, "SIGSTOP"),
+                                   reason="needs torch and POSIX signals")
+
+MODEL = "Helsinki-NLP/opus-mt-en-hi"
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+@needs_workers
+def test_pending_requests_fail_when_their_worker_dies():
+    pool = ProcessTranslationPool(workers=1)
+    try:
+        process = pool._processes[0]
+        # A stopped worker cannot pick the request up before it is killed
+        os.kill(process.pid, signal.SIGSTOP)
+        future = pool.submit(["hello"], MODEL)
+        os.kill(process.pid, signal.SIGKILL)
+
+        with pytest.raises(RuntimeError, match="worker 0"):
+            future.result(timeout=10)
+        wait_for(lambda: 0 in pool._dead)
+        with pytest.raises(RuntimeError, match="No live translation worker"):
+            pool.submit(["hello"], MODEL)
+    finally:
+        pool.close(timeout=1.0)
+
+
+@needs_workers
+def test_requests_move_to_a_live_worker():
+    pool = ProcessTranslationPool(workers=2)
+    try:
+        home = pool._candidates(MODEL)[0]
+        pool._processes[home].kill()
+        wait_for(lambda: home in pool._dead)
+        assert pool._candidates(MODEL) == [1 - home]
+    finally:
+        pool.close(timeout=1.0)
+
+
+@needs_workers
+def test_close_terminates_a_hung_worker():
+    pool = ProcessTranslationPool(workers=1)
+    process = pool._processes[0]
+    os.kill(process.pid, signal.SIGSTOP)
+    future = pool.submit(["hello"], MODEL)
+
+    start = time.monotonic()
+    pool.close(timeout=0.5)
+    assert time.monotonic() - start < 10
+    assert not process.is_alive()
+    with pytest.raises(RuntimeError, match="closed"):
+        future.result(timeout=1)
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.submit(["hello"], MODEL)
+
+
+class FakePool:
+    def __init__(self, error=None):
+        self.requests = []
+        self.error = error
+
+    def submit(self, texts, model_name, profile=None):
+        self.requests.append((texts, model_name, profile))
+        future = Future()
+        if self.error:
+            future.set_exception(self.error)
+        else:
+            future.set_result([text.upper() for text in texts])
+        return future
+
+
+def test_adapter_sends_a_text_as_one_batch_of_chunks(tmp_path):
+    pool = FakePool()
+    translator = PoolTranslator(pool, cache=TranslationCache(str(tmp_path / "cache.sqlite3")), max_chunk_words=3)
+    assert translator.translate("one two. three four five six", MODEL, profile="live") == "ONE TWO. THREE FOUR FIVE SIX"
+    texts, model_name, profile = pool.requests[0]
+    assert texts == ["one two.", "three four five", "six"]
+    assert profile.name == "live"
+    # Cached per model and profile
+    assert translator.translate("one two. three four five six", MODEL, profile="live") == "ONE TWO. THREE FOUR FIVE SIX"
+    assert len(pool.requests) == 1
+    assert translator.get(MODEL) == (None, None)
+
+
+def test_adapter_passes_worker_errors_on(tmp_path):
+    translator = PoolTranslator(FakePool(RuntimeError("worker 0: died")), cache=None)
+    with pytest.raises(RuntimeError, match="died"):
+        translator.translate("hello", MODEL)
+
+
+def test_workers_do_not_run_the_calling_script(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = tmp_path / "session.py"
+    script.write_text(
+        "print('session started', flush=True)\n"
+        "from process_pool import ProcessTranslationPool\n"
+        "pool = ProcessTranslationPool(workers=2)\n"
+        "import time; time.sleep(1)\n"
+        "pool.close(timeout=1)\n",
+        encoding="utf-8",
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+    output = subprocess.run([sys.executable, str(script)], cwd=tmp_path, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, timeout=60).stdout.decode("utf-8")
+    assert output.count("session started") == 1
@@ -0,0 +1,137 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from concurrent.futures import Future
+
+import pytest
+
+from retranslation import TranscriptRetranslator, plan_paragraphs, retranslate_journal
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, text, model_name, tokenizer, model, profile=None):
+        self.calls.append((model_name, text))
+        future = Future()
+        future.set_result(f"{model_name}({text})")
+        return future
+
+
+class FakePool:
+    def get(self, model_name):
+        return None, None
+
+
+def record(time, source, language="Hindi", source_language="English"):
+    return {"time": time, "text": f"live {source}", "source": source, "language": language,
+            "source_language": source_language}
+
+
+def test_paragraphs_split_on_pause_and_language_pair():
+    records = [
+        record(0.0, "the lecture today is"),
+        record(1.0, "about plants."),
+        record(10.0, "after a pause"),
+        record(10.5, "another target", language="Gujarati"),
+        {"time": 11.0, "text": "Session ended."},
+    ]
+    paragraphs = plan_paragraphs(records, paragraph_gap=4.0)
+    assert [paragraph.get("sources") for paragraph in paragraphs] == [
+        ["the lecture today is", "about plants."], ["after a pause"], ["another target"], None,
+    ]
+    assert paragraphs[-1]["text"] == "Session ended."
+
+
+def test_journal_is_retranslated_as_whole_sentences(tmp_path):
+    journal = tmp_path / "t.jsonl"
+    lines = [record(0.0, "the lecture today"), record(1.0, "is about plants. Light energy"),
+             record(2.0, "is converted."), record(3.0, "the lecture today")]
+    journal.write_text("".join(json.dumps(line) + "\n" for line in lines), encoding="utf-8")
+    translator = FakeTranslator()
+    entry = {"journal": str(journal), "routes": [["English", "Hindi", ["en-de", "de-hi"]]]}
+    report = retranslate_journal(entry, translator, FakePool(), None, write_documents=False)
+    assert report["sentences"] == 3 and report["failed_paragraphs"] == 0
+    # Sentences are re-joined across segment boundaries, shortest first, and translated once per hop
+    first_hop = [text for model, text in translator.calls if model == "en-de"]
+    assert first_hop == ["the lecture today", "Light energy is converted.", "the lecture today is about plants."]
+    assert len(translator.calls) == 6
+    assert all(model in ("en-de", "de-hi") for model, _ in translator.calls)
+
+
+def test_missing_route_keeps_live_text(tmp_path):
+    journal = tmp_path / "t.jsonl"
+    journal.write_text(json.dumps(record(0.0, "hello")) + "\n", encoding="utf-8")
+    entry = {"journal": str(journal), "routes": []}
+    report = retranslate_journal(entry, FakeTranslator(), FakePool(), None, write_documents=False)
+    assert report["failed_paragraphs"] == 1
+
+
+def _attach(retranslator, tmp_path, code):
+    retranslator._job_path = str(tmp_path / "job.json")
+    open(retranslator._job_path, "w").close()
+    retranslator._process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE)
+
+
+def test_garbage_worker_output_is_not_fatal(tmp_path):
+    retranslator = TranscriptRetranslator(lambda source, target: [])
+    _attach(retranslator, tmp_path, "print('not json')")
+    assert retranslator._wait(time.monotonic() + 10)
+    assert retranslator.last_report is None
+    assert retranslator._process is None
+
+
+def test_notify_does_not_pause_the_final_pass(tmp_path):
+    retranslator = TranscriptRetranslator(lambda source, target: [])
+    _attach(retranslator, tmp_path, "import time; time.sleep(0.5); print('{\"seconds\": 0}')")
+    retranslator._stop.set()
+    retranslator.notify()
+    assert retranslator._paused_at is None
+    assert retranslator._wait(time.monotonic() + 10)
+    assert retranslator.last_report == {"seconds": 0}
+
+
+def test_close_kills_a_paused_worker_and_removes_its_job(tmp_path):
+    retranslator = TranscriptRetranslator(lambda source, target: [])
+    _attach(retranslator, tmp_path, "import time; time.sleep(60)")
+    process = retranslator._process
+    retranslator.notify()
+    if hasattr(signal, "SIGSTOP"):
+        assert retranslator._paused_at is not None
+    retranslator.close()
+    assert process.poll() is not None
+    assert retranslator._process is None
+    assert not os.path.exists(tmp_path / "job.json")
+    # Closed for good: finish() does not start a final pass
+    assert not retranslator.finish(timeout=1)
+    assert retranslator.passes == 0
+
+
+def test_jobs_are_built_outside_the_lock(tmp_path, monkeypatch):
+    retranslator = TranscriptRetranslator(lambda source, target: [])
+    held = []
+    monkeypatch.setattr(retranslator, "_job", lambda write_documents: held.append(retranslator._lock.locked()) or
+                        {"journals": [], "profile": None, "threads": 1, "batch_size": 1,
+                         "cache_path": str(tmp_path / "cache.sqlite3"), "write_documents": False})
+    retranslator._launch(write_documents=False)
+    retranslator.close()
+    assert held == [False]
+
+
+def test_worker_does_not_open_the_live_cache(tmp_path):
+    pytest.importorskip("torch")
+    job = tmp_path / "job.json"
+    job.write_text(json.dumps({"journals": [], "profile": "transcript", "threads": 1, "batch_size": 4,
+                               "cache_path": str(tmp_path / "retranslation_cache.sqlite3"),
+                               "write_documents": False}), encoding="utf-8")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+    output = subprocess.run([sys.executable, os.path.join(root, "retranslation.py"), str(job)], cwd=tmp_path,
+                            env=env, check=True, stdout=subprocess.PIPE).stdout
+    assert json.loads(output.decode("utf-8").splitlines()[-1])["journals"] == {}
+    assert os.listdir(tmp_path) == ["job.json"]
@@ -0,0 +1,47 @@
+import pytest
+
+from routing import RoutePlanner, parse_pair
+
+MODELS = {
+    "Hindi": "Helsinki-NLP/opus-mt-en-hi",
+    "Gujarati": "Helsinki-NLP/opus-mt-en-gu",
+    "French": "Helsinki-NLP/opus-mt-en-fr",
+}
+REVERSE = {
+    "Gujarati": "Helsinki-NLP/opus-mt-gu-en",
+    "French": "Helsinki-NLP/opus-mt-fr-es",
+}
+
+
+def planner():
+    return RoutePlanner(MODELS, REVERSE)
+
+
+def test_parse_pair_reads_codes_from_model_name():
+    assert parse_pair("Helsinki-NLP/opus-mt-gu-en") == ("gu", "en")
+    assert parse_pair("t5-small") is None
+
+
+def test_same_language_needs_no_model():
+    assert planner().route("Hindi", "hi") == []
+
+
+def test_direct_pair_is_used():
+    assert planner().route("English", "Hindi") == ["Helsinki-NLP/opus-mt-en-hi"]
+
+
+def test_missing_pair_pivots_through_english():
+    assert planner().route("Gujarati", "Hindi") == ["Helsinki-NLP/opus-mt-gu-en", "Helsinki-NLP/opus-mt-en-hi"]
+
+
+def test_falls_back_to_the_shortest_chain():
+    assert planner().route("Gujarati", "Spanish") == [
+        "Helsinki-NLP/opus-mt-gu-en",
+        "Helsinki-NLP/opus-mt-en-fr",
+        "Helsinki-NLP/opus-mt-fr-es",
+    ]
+
+
+def test_unreachable_target_raises():
+    with pytest.raises(ValueError, match="No translation route"):
+        planner().route("Hindi", "Telugu")
@@ -0,0 +1,30 @@
+from segmenter import join_chunks, split_text
+
+
+def test_short_sentences_are_kept_whole():
+    assert split_text("  Hello there. How are you? Fine! ") == ["Hello there.", "How are you?", "Fine!"]
+
+
+def test_devanagari_danda_ends_a_sentence():
+    assert split_text("यह पहला वाक्य है। यह दूसरा है।") == ["यह पहला वाक्य है।", "यह दूसरा है।"]
+
+
+def test_long_sentence_splits_on_clauses_and_merges_short_pieces():
+    text = "one two three, four five, six seven eight nine ten."
+    assert split_text(text, max_words=5) == ["one two three, four five,", "six seven eight nine ten."]
+
+
+def test_unpunctuated_speech_is_cut_before_a_conjunction():
+    text = "we measure the signal at every sample and we filter it twice"
+    chunks = split_text(text, max_words=8)
+    assert chunks == ["we measure the signal at every sample", "and we filter it twice"]
+    assert all(len(chunk.split()) <= 8 for chunk in chunks)
+
+
+def test_words_are_cut_at_max_words_without_a_conjunction():
+    chunks = split_text(" ".join(str(i) for i in range(10)), max_words=4)
+    assert chunks == ["0 1 2 3", "4 5 6 7", "8 9"]
+
+
+def test_join_chunks_skips_empty_translations():
+    assert join_chunks([" first. ", "", None, "second."]) == "first. second."
@@ -0,0 +1,50 @@
+import json
+import threading
+
+import pytest
+
+from transcript_writer import TranscriptJournal, read_journal
+
+pytest.importorskip("docx")
+
+
+def test_append_after_close_is_a_no_op(tmp_path):
+    journal = TranscriptJournal(str(tmp_path / "t.jsonl"), str(tmp_path / "t.docx"), checkpoint_interval=None)
+    assert journal.append("namaste", source="hello", language="Hindi", source_language="English") is True
+    journal.close()
+    assert journal.append("late") is False
+    records, closed = read_journal(journal.journal_path)
+    assert closed
+    assert [record["text"] for record in records] == ["namaste"]
+    assert records[0]["source_language"] == "English"
+    assert [record["text"] for record in journal.records()] == ["namaste"]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "t.jsonl"
+    path.write_text(json.dumps({"time": 1, "text": "complete"}) + "\n" + '{"time": 2, "te', encoding="utf-8")
+    records, closed = read_journal(str(path))
+    assert [record["text"] for record in records] == ["complete"]
+    assert not closed
+
+
+def test_concurrent_close_writes_one_closed_marker(tmp_path):
+    journal = TranscriptJournal(str(tmp_path / "t.jsonl"), str(tmp_path / "t.docx"), checkpoint_interval=None)
+    journal.append("namaste")
+    errors = []
+
+    def close():
+        try:
+            journal.close()
+        except Exception as e:
+            errors.append(e)
+
+    closers = [threading.Thread(target=close) for _ in range(4)]
+    for closer in closers:
+        closer.start()
+    for closer in closers:
+        closer.join()
+    assert errors == []
+    lines = (tmp_path / "t.jsonl").read_text(encoding="utf-8").splitlines()
+    assert lines.count(json.dumps({"closed": True})) == 1
+    assert (tmp_path / "t.docx").exists()
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from batch_translator import BatchTranslator
+from translation_cache import TranslationCache
+
+
+class FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [text.split() for text in texts]}
+
+    def batch_decode(self, outputs, **kwargs):
+        return outputs
+
+
+class FakeModel:
+    def generate(self, input_ids, **kwargs):
+        return [text.upper() for text in (" ".join(ids) for ids in input_ids)]
+
+
+class BrokenCache:
+    def get(self, model_name, text):
+        return None
+
+    def put(self, model_name, text, translation):
+        raise sqlite3.OperationalError("database is locked")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), memory_entries=2, busy_timeout=0.05)
+    yield cache
+    cache.close()
+
+
+def test_put_then_get_normalizes_text(cache):
+    cache.put("model", "Hello  World", "namaste")
+    assert cache.get("model", "hello world") == "namaste"
+    assert cache.get("other-model", "hello world") is None
+
+
+def test_disk_tier_survives_memory_eviction(cache):
+    for i in range(4):
+        cache.put("model", f"text {i}", f"translation {i}")
+    assert cache.get("model", "text 0") == "translation 0"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=-1)
+    cache.put("model", "text", "translation")
+    assert cache.get("model", "text") is None
+    cache.close()
+
+
+def test_locked_database_is_a_miss_not_an_error(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TranslationCache(path, memory_entries=0, busy_timeout=0.05)
+    cache.put("model", "text", "translation")
+    other = sqlite3.connect(path)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        cache.put("model", "new text", "new translation")
+        assert cache.get("model", "text") is None
+        assert cache.stats()["disk_errors"] == 2
+    finally:
+        other.rollback()
+        other.close()
+    # Usable again once the other writer is gone
+    assert cache.get("model", "text") == "translation"
+    cache.close()
+
+
+def test_database_is_not_opened_until_first_use(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TranslationCache(path)
+    assert not os.path.exists(path)
+    cache.put("model", "text", "translation")
+    assert os.path.exists(path)
+    cache.close()
+
+
+def test_import_does_not_create_the_database(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+    subprocess.run([sys.executable, "-c", "import translation_cache"], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
+
+
+def test_locked_database_at_open_falls_back_to_memory(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    sqlite3.connect(path).close()
+    other = sqlite3.connect(path)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        cache = TranslationCache(path, busy_timeout=0.05)
+        cache.put("model", "text", "translation")
+        assert cache.get("model", "text") == "translation"
+        assert cache.get("model", "missing") is None
+        assert cache.stats()["disk_errors"] == 1
+    finally:
+        other.rollback()
+        other.close()
+    cache.close()
+
+
+def test_closed_database_keeps_memory_tier(cache):
+    cache.put("model", "text", "translation")
+    cache._db.close()
+    cache.put("model", "other", "other translation")
+    assert cache.get("model", "other") == "other translation"
+    assert cache.get("model", "missing") is None
+    assert cache.stats()["disk_errors"] == 2
+
+
+def test_failing_cache_put_does_not_kill_the_translator():
+    pytest.importorskip("torch")
+    translator = BatchTranslator(cache=BrokenCache(), max_wait_ms=1, group_workers=1)
+    tokenizer, model = FakeTokenizer(), FakeModel()
+    assert translator.submit("first text", "model", tokenizer, model).result(timeout=5) == "FIRST TEXT"
+    # The worker thread is still alive and serves later requests
+    assert translator.submit("second text", "model", tokenizer, model).result(timeout=5) == "SECOND TEXT"
+    assert translator._thread.is_alive()
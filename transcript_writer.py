@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Default file names and flush/checkpoint policy
+JOURNAL_FILE = "translated_subtitles.jsonl"
+DOCUMENT_FILE = "translated_subtitles.docx"
+HEADING = "Real-time Translated Subtitles"
+DEFAULT_FSYNC_EVERY = 10          # segments between fsyncs
+DEFAULT_FSYNC_INTERVAL = 2.0      # seconds between fsyncs
+DEFAULT_CHECKPOINT_INTERVAL = 300  # seconds between .docx checkpoints (None disables)
+
+
+# Function to read the segment records from a journal, skipping a torn last line
+def read_journal(journal_path):
+    records = []
+    closed = False
+    with open(journal_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("closed"):
+                closed = True
+            else:
+                records.append(record)
+    return records, closed
+
+
+# Function to build the Word document from journal records
+def write_document(records, document_path, heading=HEADING):
+    from docx import Document  # deferred: only needed at checkpoints and session end
+    doc = Document()
+    doc.add_heading(heading, 0)
+    for record in records:
+        doc.add_paragraph(record["text"])
+    # Save to a temporary file first so a crash never leaves a half-written .docx
+    temp_path = document_path + ".tmp"
+    doc.save(temp_path)
+    os.replace(temp_path, document_path)
+
+
+# Function to rebuild a .docx from a journal (e.g. after a crash)
+def recover_transcript(journal_path=JOURNAL_FILE, document_path=DOCUMENT_FILE, heading=HEADING):
+    records, _ = read_journal(journal_path)
+    write_document(records, document_path, heading)
+    return len(records)
+
+
+# Append-only transcript sink: each segment is one JSON line in a journal, and
+# the .docx is only materialized at checkpoints and when the session closes.
+class TranscriptJournal:
+    def __init__(self, journal_path=JOURNAL_FILE, document_path=DOCUMENT_FILE, heading=HEADING,
+                 fsync_every=DEFAULT_FSYNC_EVERY, fsync_interval=DEFAULT_FSYNC_INTERVAL,
+                 checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.journal_path = journal_path
+        self.document_path = document_path
+        self.heading = heading
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._last_checkpoint = time.monotonic()
+
+        self._recover_previous_session()
+        self._file = open(journal_path, "w", encoding="utf-8")
+
+    # Append one segment; source text, source language and target language are kept for later re-translation.
+    # Returns False (and writes nothing) once the journal is closed.
+    def append(self, text, source=None, language=None, source_language=None):
+        record = {"time": time.time(), "text": text}
+        if source is not None:
+            record["source"] = source
+        if language is not None:
+            record["language"] = language
+        if source_language is not None:
+            record["source_language"] = source_language
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            if self._file.closed:
+                return False
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+                self._sync(now)
+            checkpoint_due = (self.checkpoint_interval is not None
+                              and now - self._last_checkpoint >= self.checkpoint_interval)
+            if checkpoint_due:
+                self._last_checkpoint = now
+
+        if checkpoint_due:
+            threading.Thread(target=self.materialize, daemon=True).start()
+        return True
+
+    # Return the segment records written so far
+    def records(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+        records, _ = read_journal(self.journal_path)
+        return records
+
+    # Write the .docx from the journal
+    def materialize(self):
+        with self._checkpoint_lock:
+            write_document(self.records(), self.document_path, self.heading)
+
+    # Sync the journal, mark it closed and write the final .docx.
+    # Safe to call again, also from another thread (e.g. End Session and closing the window).
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync(time.monotonic())
+        self.materialize()
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps({"closed": True}) + "\n")
+            self._sync(time.monotonic())
+            self._file.close()
+
+    # Must be called with the lock held
+    def _sync(self, now):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = now
+
+    # A journal without a closed marker means the last session crashed
+    def _recover_previous_session(self):
+        if not os.path.exists(self.journal_path):
+            return
+        records, closed = read_journal(self.journal_path)
+        if closed or not records:
+            return
+        base, ext = os.path.splitext(self.document_path)
+        recovered_path = f"{base}.recovered{ext}"
+        write_document(records, recovered_path, self.heading)
+        print(f"Recovered {len(records)} segments from an unfinished session into {recovered_path}")
+
+
+if __name__ == "__main__":
+    # Usage: python transcript_writer.py [journal.jsonl] [output.docx]
+    journal = sys.argv[1] if len(sys.argv) > 1 else JOURNAL_FILE
+    document = sys.argv[2] if len(sys.argv) > 2 else DOCUMENT_FILE
+    count = recover_transcript(journal, document)
+    print(f"Rebuilt {document} with {count} segments")
@@ -0,0 +1,180 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Defaults for the two cache tiers
+CACHE_FILE = "translation_cache.sqlite3"
+DEFAULT_MEMORY_ENTRIES = 5000
+DEFAULT_DISK_ROWS = 200000
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_BUSY_TIMEOUT = 1.0  # seconds to wait for another writer before giving up on the disk tier
+
+
+# Function to normalize source text so trivial differences share one cache entry
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+# Two-tier translation cache: an in-memory LRU in front of a SQLite store.
+# Entries are keyed by (model name, normalized source text) and survive restarts.
+# The database is opened on first use, so creating a cache (or importing this
+# module) never touches the file; if it can't be opened the cache is memory-only.
+class TranslationCache:
+    def __init__(self, path=CACHE_FILE, memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 disk_rows=DEFAULT_DISK_ROWS, ttl_seconds=DEFAULT_TTL_SECONDS, busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        self.memory_entries = memory_entries
+        self.disk_rows = disk_rows
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # (model, text) -> (translation, expires)
+        self._lock = threading.Lock()
+        self._puts_since_trim = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+        self._path = path
+        self._busy_timeout = busy_timeout
+        self._db = None
+        self._opened = False  # True once opening the database has been tried
+
+    # Return the cached translation or None
+    def get(self, model_name, text):
+        key = (model_name, normalize(text))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+            # The disk tier is best-effort: a locked or broken database is a miss, never a failed translation
+            db = self._disk()
+            try:
+                row = None if db is None else db.execute(
+                    "SELECT translation, expires FROM translations WHERE model = ? AND source = ?", key
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    db.execute(
+                        "UPDATE translations SET last_used = ? WHERE model = ? AND source = ?", (now,) + key
+                    )
+                    db.commit()
+            except sqlite3.Error as e:
+                self._disk_error(e)
+                row = None
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+            return row[0]
+
+    # Store a translation in both tiers
+    def put(self, model_name, text, translation):
+        key = (model_name, normalize(text))
+        now = time.time()
+        expires = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, translation, expires)
+            db = self._disk()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO translations (model, source, translation, expires, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    key + (translation, expires, now),
+                )
+                db.commit()
+                self._puts_since_trim += 1
+                if self._puts_since_trim >= 1000:
+                    self._trim_disk()
+            except sqlite3.Error as e:
+                self._disk_error(e)
+
+    # Hit-rate counters
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_errors": self.disk_errors,
+            }
+
+    def close(self):
+        with self._lock:
+            self._opened = True
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # Must be called with the lock held; opens the database on first use and returns None when it is unusable
+    def _disk(self):
+        if self._opened:
+            return self._db
+        self._opened = True
+        try:
+            self._db = sqlite3.connect(self._path, timeout=self._busy_timeout, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " model TEXT NOT NULL,"
+                " source TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " expires REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, source))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+            self._trim_disk()
+        except sqlite3.Error as e:
+            self._disk_error(e)
+            print("Translation cache is memory-only for this session")
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        return self._db
+
+    # Must be called with the lock held
+    def _remember(self, key, translation, expires):
+        self._memory[key] = (translation, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # Must be called with the lock held; the failed statement's transaction is rolled back
+    def _disk_error(self, error):
+        self.disk_errors += 1
+        print(f"Translation cache disk error: {error}")
+        if self._db is None:
+            return
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+    # Drop expired rows, then the least recently used ones over the row limit
+    def _trim_disk(self):
+        self._puts_since_trim = 0
+        self._db.execute("DELETE FROM translations WHERE expires <= ?", (time.time(),))
+        count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.disk_rows:
+            self._db.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (count - self.disk_rows,),
+            )
+        self._db.commit()
+
+
+# Shared cache used by all subtitle scripts; its database is opened on first lookup
+translation_cache = TranslationCache()
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+
+from metrics import LatencyStats
+
+# What to do when speech falls behind the subtitles
+SKIP_STALE = "skip_stale"  # drop items that waited longer than max_lag
+MERGE = "merge"            # speak everything that is waiting as one utterance
+SPEED_UP = "speed_up"      # raise the speaking rate while there is a backlog
+
+DEFAULT_MAX_LAG = 6.0      # seconds
+DEFAULT_MAX_QUEUE = 20
+MAX_SPEED_FACTOR = 1.6
+
+
+# Function to find a way to play a cached WAV file, or None if this machine has none
+def _find_wav_player():
+    try:
+        import winsound
+        return lambda path: winsound.PlaySound(path, winsound.SND_FILENAME)
+    except ImportError:
+        pass
+    try:
+        import simpleaudio
+        return lambda path: simpleaudio.WaveObject.from_wave_file(path).play().wait_done()
+    except ImportError:
+        return None
+
+
+# Speaks translated text on its own thread, so the microphone keeps listening
+# while the previous translation is read aloud.
+class TTSWorker:
+    def __init__(self, policy=SKIP_STALE, max_lag=DEFAULT_MAX_LAG, max_queue=DEFAULT_MAX_QUEUE, cache_dir=None):
+        if policy not in (SKIP_STALE, MERGE, SPEED_UP):
+            raise ValueError(f"Unknown TTS policy: {policy}")
+        self.policy = policy
+        self.max_lag = max_lag
+        self.cache_dir = cache_dir
+        self.spoken = 0
+        self.skipped = 0
+        self.merged = 0
+        self.cache_hits = 0
+        self.lag = LatencyStats()  # time from say() to start of speech
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._play_wav = _find_wav_player() if cache_dir else None
+        if cache_dir and self._play_wav is None:
+            print("No WAV player available; speech caching is disabled")
+        if self._play_wav is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # Queue text to be spoken; never blocks the caller
+    def say(self, text):
+        entry = (time.monotonic(), text)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Make room by dropping the oldest item
+            try:
+                self._queue.get_nowait()
+                self.skipped += 1
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(entry)
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "spoken": self.spoken,
+            "skipped": self.skipped,
+            "merged": self.merged,
+            "cache_hits": self.cache_hits,
+            "lag": self.lag.summary(),
+        }
+
+    def _run(self):
+        # pyttsx3 engines must be used from the thread that created them;
+        # importing it here also keeps it off the startup path
+        import pyttsx3
+        engine = pyttsx3.init()
+        base_rate = engine.getProperty("rate")
+        while True:
+            queued_at, text = self._queue.get()
+
+            if self.policy == SKIP_STALE and time.monotonic() - queued_at > self.max_lag:
+                self.skipped += 1
+                continue
+            if self.policy == MERGE:
+                texts = [text]
+                while True:
+                    try:
+                        texts.append(self._queue.get_nowait()[1])
+                    except queue.Empty:
+                        break
+                self.merged += len(texts) - 1
+                text = " ".join(texts)
+
+            rate = base_rate
+            if self.policy == SPEED_UP:
+                backlog = self._queue.qsize()
+                rate = int(base_rate * min(MAX_SPEED_FACTOR, 1 + 0.15 * backlog))
+
+            self.lag.add(time.monotonic() - queued_at)
+            try:
+                self._speak(engine, text, rate)
+                self.spoken += 1
+            except Exception as e:
+                print(f"Text-to-speech error: {e}")
+
+    def _speak(self, engine, text, rate):
+        engine.setProperty("rate", rate)
+        if self._play_wav is None:
+            engine.say(text)
+            engine.runAndWait()
+            return
+        # Synthesize each (text, rate) once and replay the file afterwards
+        key = hashlib.sha1(f"{rate}:{text}".encode("utf-8")).hexdigest()
+        path = os.path.join(self.cache_dir, f"{key}.wav")
+        if os.path.exists(path):
+            self.cache_hits += 1
+        else:
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+        self._play_wav(path)